@@ -0,0 +1,65 @@
+"""
+Benchmark of the codecs of l2l.utils.compression on a trajectory holding one
+generation of MNIST-size individuals, i.e. 20 individuals with the 79510
+weights of a 784-100-10 network each. The weights are drawn from a normal
+distribution and stored as float64, as the optimizers produce them. For each
+codec and level, the size of the file and the time needed to write and read
+it are compared with a plain pickle.
+"""
+import os
+import pickle
+import tempfile
+import timeit
+
+import numpy as np
+
+from l2l.utils import compression
+from l2l.utils.individual import Population
+from l2l.utils.trajectory import Trajectory
+
+SETTINGS = [('none', None), ('zlib', 1), ('zlib', 6), ('zlib', 9),
+            ('lzma', 0), ('lzma', 6), ('bz2', 1), ('bz2', 9)]
+
+
+def make_trajectory(n_individuals=20, n_weights=784 * 100 + 100 * 10 + 110):
+    traj = Trajectory(name='benchmark')
+    weights = np.random.RandomState(0).normal(
+        0., 0.1, (n_individuals, n_weights))
+    traj.f_add_population(Population(0, np.arange(n_individuals),
+                                     ['individual.weights'], [(n_weights,)],
+                                     weights))
+    return traj
+
+
+def pickle_dump(obj, path):
+    with open(path, "wb") as handle:
+        pickle.dump(obj, handle, pickle.HIGHEST_PROTOCOL)
+
+
+def main():
+    repeat = 3
+    traj = make_trajectory()
+    path = os.path.join(tempfile.mkdtemp(), 'trajectory.bin')
+
+    pickle_dump(traj, path)
+    reference = os.path.getsize(path)
+    print("{:>12} {:>11} {:>7} {:>11} {:>10}".format(
+        'codec', 'size (MB)', 'ratio', 'write (s)', 'read (s)'))
+
+    def report(name, write, read):
+        write_time = min(timeit.repeat(write, number=1, repeat=repeat))
+        read_time = min(timeit.repeat(read, number=1, repeat=repeat))
+        size = os.path.getsize(path)
+        print("{:>12} {:>11.2f} {:>7.2f} {:>11.3f} {:>10.3f}".format(
+            name, size / 1e6, size / reference, write_time, read_time))
+
+    report('pickle', lambda: pickle_dump(traj, path),
+           lambda: compression.load(path))
+    for codec, level in SETTINGS:
+        name = codec if level is None else '{} {}'.format(codec, level)
+        report(name, lambda: compression.dump(traj, path, codec, level),
+               lambda: compression.load(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark of the expansion of a generation into the trajectory, as done
+by Optimizer._expand_trajectory at the end of every post-processing. The
+current implementation, which stacks float populations directly into an
+array, is compared with a copy of the former path through get_grouped_dict,
+a pure python cartesian_product and Trajectory.f_expand.
+"""
+import itertools as itools
+import timeit
+
+import numpy as np
+
+from l2l import get_grouped_dict
+from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.individual import Individual
+from l2l.utils.tools import cartesian_product
+from l2l.utils.trajectory import Trajectory
+
+
+def former_cartesian_product(parameter_dict, combined_parameters=()):
+    """
+    The former implementation of cartesian_product, appending one value at a
+    time
+    """
+    combined_parameters = list(combined_parameters)
+    for idx, item in enumerate(combined_parameters):
+        if isinstance(item, str):
+            combined_parameters[idx] = (item,)
+
+    iterator_list = []
+    for item_tuple in combined_parameters:
+        inner_iterator_list = [parameter_dict[key] for key in item_tuple]
+        iterator_list.append(zip(*inner_iterator_list))
+
+    result_dict = {}
+    for key in parameter_dict:
+        result_dict[key] = []
+
+    for cartesian_tuple in itools.product(*iterator_list):
+        for idx, item_tuple in enumerate(combined_parameters):
+            for inneridx, key in enumerate(item_tuple):
+                result_dict[key].append(cartesian_tuple[idx][inneridx])
+    return result_dict
+
+
+def former_expand(traj, generation, eval_pop):
+    """
+    The former Optimizer._expand_trajectory and Trajectory.f_expand, building
+    one Individual per evaluated Individual-Dict
+    """
+    grouped_params_dict = get_grouped_dict(eval_pop)
+    grouped_params_dict = {'individual.' + key: val
+                           for key, val in grouped_params_dict.items()}
+    final_params_dict = {'generation': [generation],
+                         'ind_idx': range(len(eval_pop))}
+    final_params_dict.update(grouped_params_dict)
+    build_dict = former_cartesian_product(
+        final_params_dict,
+        [('ind_idx',) + tuple(grouped_params_dict.keys()), 'generation'])
+
+    params = {key: val for key, val in build_dict.items()
+              if key not in ('generation', 'ind_idx')}
+    individuals = []
+    for i in build_dict['ind_idx']:
+        ind = Individual(generation, i, [])
+        for name in params:
+            ind.f_add_parameter(name, params[name][i])
+        individuals.append(ind)
+    traj.individuals[generation] = individuals
+
+
+def current_expand(traj, generation, eval_pop):
+    optimizer = Optimizer.__new__(Optimizer)
+    optimizer.g = generation
+    optimizer.eval_pop = eval_pop
+    optimizer._expand_trajectory(traj)
+
+
+def main():
+    n_individuals = 100000
+    repeat = 3
+    print("Expansion of {} individuals (best of {})".format(
+        n_individuals, repeat))
+    print("{:>20} {:>14} {:>14} {:>9}".format(
+        '', 'before (s)', 'after (s)', 'speedup'))
+    for dims in (2, 100):
+        eval_pop = [{'coords': np.random.rand(dims),
+                     'scale': float(np.random.rand())}
+                    for _ in range(n_individuals)]
+        traj = Trajectory()
+        times = []
+        for expand in (former_expand, current_expand):
+            times.append(min(timeit.repeat(
+                lambda: expand(traj, 0, eval_pop), number=1, repeat=repeat)))
+        print("{:>20} {:>14.3f} {:>14.3f} {:>8.1f}x".format(
+            '{} coordinates'.format(dims), times[0], times[1],
+            times[0] / times[1]))
+
+    # Parameters that can not be stored in a float array still go through
+    # cartesian_product, which now computes the combinations with numpy
+    grid = {'generation': [0], 'ind_idx': range(n_individuals),
+            'individual.n': list(range(n_individuals))}
+    combined = [('ind_idx', 'individual.n'), 'generation']
+    times = [min(timeit.repeat(lambda: product(grid, combined), number=1,
+                               repeat=repeat))
+             for product in (former_cartesian_product, cartesian_product)]
+    print("{:>20} {:>14.3f} {:>14.3f} {:>8.1f}x".format(
+        'cartesian_product', times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the evaluation of the benchmarked functions on many points,
+point by point with FunctionGenerator.cost_function and at once with
+FunctionGenerator.cost_function_batch, of the same evaluations on a
+LandscapeCache of the 2-D functions, and of a large synthetic Gaussian mixture.
+"""
+import timeit
+
+import numpy as np
+
+from l2l.optimizees.functions.benchmarked_functions import BenchmarkedFunctions
+from l2l.optimizees.functions.function_generator import FunctionGenerator, \
+    GaussianMixtureParameters
+from l2l.optimizees.functions.landscape_cache import LandscapeCache
+
+
+def main():
+    n_loop = 10000
+    n_batch = 1000000
+    print("Evaluation of {} points, the loop is timed on {} points".format(
+        n_batch, n_loop))
+    print("{:>14} {:>10} {:>10} {:>9}".format('', 'loop (s)', 'batch (s)',
+                                              'speedup'))
+    benchmarks = BenchmarkedFunctions()
+    for name, _ in benchmarks.function_name_map:
+        (_, fg), _ = benchmarks.get_function_by_name(name)
+        if fg.dims > 10:
+            continue
+        points = np.random.uniform(fg.bound[0], fg.bound[1],
+                                   (n_batch, fg.dims))
+        loop_time = timeit.timeit(
+            lambda: [fg.cost_function(x) for x in points[:n_loop]],
+            number=1) * n_batch / n_loop
+        batch_time = min(timeit.repeat(
+            lambda: fg.cost_function_batch(points), number=1, repeat=3))
+        print("{:>14} {:>10.2f} {:>10.3f} {:>8.0f}x".format(
+            name, loop_time, batch_time, loop_time / batch_time))
+
+    print("Same evaluations on a LandscapeCache of the 2-D functions")
+    print("{:>14} {:>10} {:>10} {:>10} {:>10}".format(
+        '', 'build (s)', 'loop (s)', 'batch (s)', 'max error'))
+    for name, _ in benchmarks.function_name_map:
+        (_, fg), _ = benchmarks.get_function_by_name(name)
+        if fg.dims != 2:
+            continue
+        build_time = timeit.timeit(lambda: LandscapeCache(fg), number=1)
+        cache = LandscapeCache(fg)
+        points = np.random.uniform(fg.bound[0], fg.bound[1], (n_batch, 2))
+        loop_time = timeit.timeit(
+            lambda: [cache.cost_function(x) for x in points[:n_loop]],
+            number=1) * n_batch / n_loop
+        batch_time = min(timeit.repeat(
+            lambda: cache.cost_function_batch(points), number=1, repeat=3))
+        print("{:>14} {:>10.2f} {:>10.2f} {:>10.3f} {:>10.1e}".format(
+            name, build_time, loop_time, batch_time, cache.measure_error()))
+
+    n_components, dims, n_points = 100, 50, 10000
+    random_state = np.random.RandomState(0)
+    factors = random_state.normal(0., 0.3, (n_components, dims, dims))
+    sigmas = np.einsum('kij,klj->kil', factors, factors) + np.eye(dims)
+    means = random_state.uniform(-3, 3, (n_components, dims))
+    params = GaussianMixtureParameters(sigmas, means, 'default')
+    build_time = min(timeit.repeat(
+        lambda: FunctionGenerator([params], dims=dims), number=1, repeat=3))
+    fg = FunctionGenerator([params], dims=dims)
+    points = random_state.uniform(-3, 3, (n_points, dims))
+    batch_time = min(timeit.repeat(lambda: fg.cost_function_batch(points),
+                                   number=1, repeat=3))
+    print("Mixture of {} Gaussians in {} dimensions: built in {:.3f} s, {} "
+          "points evaluated in {:.3f} s".format(n_components, dims,
+                                                build_time, n_points,
+                                                batch_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of the memory, attribute access latency, also after the
+`params` dictionary was used, and the pickle size and round trip time of
+individuals. The current slots based Individual is compared with a copy of
+the former dictionary based implementation.
+"""
+import gc
+import pickle
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from l2l.utils.individual import Individual
+
+
+class DictIndividual:
+    """
+    The former implementation of Individual, with an instance dictionary and
+    the parameter name built on every attribute access
+    """
+
+    def __init__(self, generation=0, ind_idx=0, params=[]):
+        self.params = {}
+        for i in params:
+            k = list(i.keys())[0]
+            self.params[k] = i[k]
+        self.generation = generation
+        self.ind_idx = ind_idx
+
+    def __getattr__(self, attr):
+        if attr == 'keys':
+            return self.params.keys()
+        return self.params.get('individual.' + attr)
+
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+
+
+def measure(cls, n_individuals, dims):
+    coords = [np.random.rand(dims) for _ in range(n_individuals)]
+    gc.collect()
+    tracemalloc.start()
+    individuals = [cls(0, i, [{'individual.coords': c},
+                              {'individual.scale': 1.0}])
+                   for i, c in enumerate(coords)]
+    memory = tracemalloc.get_traced_memory()[0] / n_individuals
+    tracemalloc.stop()
+
+    n_access = 1000000
+    access = min(timeit.repeat('ind.coords', number=n_access, repeat=5,
+                               globals={'ind': individuals[0]})) / n_access
+    # Attribute access once the parameters were used as a dictionary, e.g.
+    # by FitnessCache.key
+    sorted(individuals[1].params.keys())
+    touched = min(timeit.repeat('ind.coords', number=n_access, repeat=5,
+                                globals={'ind': individuals[1]})) / n_access
+
+    single = len(pickle.dumps(individuals[0], pickle.HIGHEST_PROTOCOL))
+    population = len(pickle.dumps(individuals, pickle.HIGHEST_PROTOCOL)) / \
+        n_individuals
+    roundtrip = min(timeit.repeat(
+        'pickle.loads(pickle.dumps(individuals, pickle.HIGHEST_PROTOCOL))',
+        number=1, repeat=3,
+        globals={'pickle': pickle, 'individuals': individuals})) / \
+        n_individuals
+    return memory, access, touched, single, population, roundtrip
+
+
+def main():
+    n_individuals = 100000
+    for dims in (2, 100):
+        print("{} individuals with {} coordinates".format(n_individuals,
+                                                          dims))
+        print("{:>16} {:>14} {:>12} {:>20} {:>14} {:>18} {:>16}".format(
+            '', 'memory (B/ind)', 'access (ns)', 'access, params (ns)',
+            'pickle (B/ind)', 'pickle list (B/ind)', 'roundtrip (us/ind)'))
+        for name, cls in (('dict (before)', DictIndividual),
+                          ('slots (after)', Individual)):
+            memory, access, touched, single, population, roundtrip = \
+                measure(cls, n_individuals, dims)
+            print("{:>16} {:>14.0f} {:>12.1f} {:>20.1f} {:>14d} {:>18.1f} "
+                  "{:>16.2f}".format(name, memory, access * 1e9,
+                                     touched * 1e9, single, population,
+                                     roundtrip * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,13 @@ import logging.config
 import os
 import warnings
 
+import numpy as np
 import yaml
 
 from l2l.optimizees.functions.function_generator import FunctionGenerator, GaussianParameters, PermutationParameters, \
     EasomParameters, LangermannParameters, MichalewiczParameters, ShekelParameters, RastriginParameters, \
     RosenbrockParameters, ChasmParameters, AckleyParameters
+from l2l.optimizees.functions.tools import plot
 from l2l.paths import Paths
 
 warnings.filterwarnings("ignore")
@@ -37,32 +39,34 @@ def main():
     print("Change the values in logging.yaml to control log level and destination")
     print("e.g. change the handler to console for the loggers you're interesting in to get output to stdout")
 
+    random_state = np.random.RandomState(0)
+
     fg_params = [GaussianParameters(sigma=[[1.5, .1], [.1, .3]], mean=[-1., -1.]),
                  GaussianParameters(sigma=[[.25, .3], [.3, 1.]], mean=[1., 1.]),
                  GaussianParameters(sigma=[[.5, .25], [.25, 1.3]], mean=[2., -2.])]
-    FunctionGenerator(fg_params, dims=2, noise=True).plot()
+    plot(FunctionGenerator(fg_params, dims=2, noise=True), random_state)
 
-    FunctionGenerator([PermutationParameters(beta=0.005)], dims=2).plot()
+    plot(FunctionGenerator([PermutationParameters(beta=0.005)], dims=2), random_state)
 
-    FunctionGenerator([EasomParameters()], dims=3).plot()
+    plot(FunctionGenerator([EasomParameters()], dims=2), random_state)
 
-    FunctionGenerator([LangermannParameters(A='default', c='default')], dims=2).plot()
+    plot(FunctionGenerator([LangermannParameters(A='default', c='default')], dims=2), random_state)
 
-    FunctionGenerator([MichalewiczParameters(m='default')], dims=2).plot()
+    plot(FunctionGenerator([MichalewiczParameters(m='default')], dims=2), random_state)
 
-    FunctionGenerator([ShekelParameters(A='default', c='default')], dims=2).plot()
+    plot(FunctionGenerator([ShekelParameters(A='default', c='default')], dims=2), random_state)
 
     fg_params = [ShekelParameters(A=[[8, 5]], c=[0.08]),
                  LangermannParameters(A='default', c='default')]
-    FunctionGenerator(fg_params, dims=2).plot()
+    plot(FunctionGenerator(fg_params, dims=2), random_state)
 
-    FunctionGenerator([RastriginParameters()], dims=2).plot()
+    plot(FunctionGenerator([RastriginParameters()], dims=2), random_state)
 
-    FunctionGenerator([RosenbrockParameters()], dims=2).plot()
+    plot(FunctionGenerator([RosenbrockParameters()], dims=2), random_state)
 
-    FunctionGenerator([ChasmParameters()], dims=2).plot()
+    plot(FunctionGenerator([ChasmParameters()], dims=2), random_state)
 
-    FunctionGenerator([AckleyParameters()], dims=2).plot()
+    plot(FunctionGenerator([AckleyParameters()], dims=2), random_state)
 
 
 if __name__ == '__main__':
@@ -268,6 +268,138 @@ def list_to_dict(input_list, dict_spec):
     return return_dict
 
 
+class DictSpec:
+    """
+    Compiled form of the dict specification returned by :func:`.dict_to_list`, which converts whole populations
+    between Individual-Dicts and vectors. The keys are sorted and the positions of the values in the vectors are
+    computed once, when the spec is built, instead of on every conversion.
+
+    :param dict_spec: The dict specification, as returned by :func:`.dict_to_list`
+    """
+
+    def __init__(self, dict_spec):
+        self.dict_spec = tuple(dict_spec)
+        self.names = []
+        self.slices = []
+        self.is_sequence = []
+        cursor = 0
+        for key, value_type, value_len in self.dict_spec:
+            self.names.append(key)
+            self.slices.append(slice(cursor, cursor + value_len))
+            self.is_sequence.append(value_type == DictEntryType.Sequence)
+            cursor += value_len
+        #: The length of the vectors
+        self.size = cursor
+
+    @classmethod
+    def from_dict(cls, input_dict):
+        """
+        Builds the spec of an Individual-Dict, e.g. one returned by `optimizee_create_individual`
+
+        :param dict input_dict: An Individual-Dict
+
+        :returns: The :class:`.DictSpec` of the dict
+        """
+        _, dict_spec = dict_to_list(input_dict, get_dict_spec=True)
+        return cls(dict_spec)
+
+    def encode(self, input_dict):
+        """
+        Converts one Individual-Dict into a vector. Equivalent to :func:`.dict_to_list`.
+
+        :param dict input_dict: The Individual-Dict
+
+        :returns: The vector, as a numpy array
+        """
+        import numpy as np
+
+        return_list = []
+        for key, is_sequence in zip(self.names, self.is_sequence):
+            if is_sequence:
+                return_list.extend(input_dict[key])
+            else:
+                return_list.append(input_dict[key])
+        return np.array(return_list)
+
+    def encode_batch(self, dicts):
+        """
+        Converts a list of Individual-Dicts into a 2-D array with one row per dict. Equivalent to
+        `np.array([dict_to_list(d) for d in dicts])`, but the values are gathered one key at a time.
+
+        :param list dicts: The Individual-Dicts
+
+        :returns: The array of shape (len(dicts), size)
+        """
+        import numpy as np
+
+        n_dicts = len(dicts)
+        columns = []
+        for key, key_slice in zip(self.names, self.slices):
+            column = np.array([d[key] for d in dicts])
+            columns.append(column.reshape(n_dicts, key_slice.stop - key_slice.start))
+        if not columns:
+            return np.empty((n_dicts, 0))
+        return np.hstack(columns)
+
+    def decode(self, input_list):
+        """
+        Converts one vector back into an Individual-Dict. Equivalent to :func:`.list_to_dict`.
+
+        :param input_list: The vector, as a list or numpy array
+
+        :returns: The Individual-Dict
+        """
+        import numpy as np
+
+        assert len(input_list) == self.size, "Incorrect Parameter List length, Somethings not right"
+        return_dict = {}
+        for key, key_slice, is_sequence in zip(self.names, self.slices, self.is_sequence):
+            if is_sequence:
+                return_dict[key] = np.array(input_list[key_slice])
+            else:
+                return_dict[key] = input_list[key_slice.start]
+        return return_dict
+
+    def decode_batch(self, array):
+        """
+        Converts a 2-D array with one vector per row back into a list of Individual-Dicts. The sequences of all the
+        dicts are rows of one copy of the array per key, so they do not share memory with `array`.
+
+        :param array: The 2-D array, or a list of vectors
+
+        :returns: The list of Individual-Dicts
+        """
+        import numpy as np
+
+        if len(array) == 0:
+            return []
+        array = np.asarray(array)
+        assert array.ndim == 2 and array.shape[1] == self.size, \
+            "Incorrect Parameter List length, Somethings not right"
+        return_dicts = [{} for _ in range(len(array))]
+        for key, key_slice, is_sequence in zip(self.names, self.slices, self.is_sequence):
+            if is_sequence:
+                values = np.array(array[:, key_slice])
+            else:
+                values = array[:, key_slice.start]
+            for return_dict, value in zip(return_dicts, values):
+                return_dict[key] = value
+        return return_dicts
+
+    def __iter__(self):
+        # Iterating gives the tuples of the dict specification, so that a DictSpec can be passed to list_to_dict
+        return iter(self.dict_spec)
+
+    def __len__(self):
+        return len(self.dict_spec)
+
+    def __eq__(self, other):
+        return isinstance(other, DictSpec) and self.dict_spec == other.dict_spec
+
+    def __hash__(self):
+        return hash(self.dict_spec)
+
+
 def get_grouped_dict(dict_iter):
     """
     This function takes an iterator of :class:`dict` objects and returns a grouped dict. It
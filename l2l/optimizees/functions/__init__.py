@@ -1,5 +1,6 @@
 from .benchmarked_functions import BenchmarkedFunctions
 from .optimizee import FunctionGeneratorOptimizee
 from .function_generator import FunctionGenerator
+from .landscape_cache import LandscapeCache
 
-__all__ = ['FunctionGenerator', 'FunctionGeneratorOptimizee', 'BenchmarkedFunctions']
+__all__ = ['FunctionGenerator', 'FunctionGeneratorOptimizee', 'BenchmarkedFunctions', 'LandscapeCache']
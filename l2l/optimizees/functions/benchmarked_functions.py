@@ -1,6 +1,7 @@
 from l2l.optimizees.functions.function_generator import FunctionGenerator, GaussianParameters, \
     MichalewiczParameters, ShekelParameters, EasomParameters, LangermannParameters, \
-    RastriginParameters, ChasmParameters, RosenbrockParameters, AckleyParameters, PermutationParameters
+    RastriginParameters, ChasmParameters, RosenbrockParameters, AckleyParameters, PermutationParameters, \
+    RotatedEllipsoidParameters, RotatedRastriginParameters, BlockCompositionParameters
 from collections import OrderedDict
 
 
@@ -24,7 +25,13 @@ class BenchmarkedFunctions:
                                   ("Permutation2d", self._create_permutation2d),
                                   ("Easom2d", self._create_easom2d),
                                   ("Easom10d", self._create_easom10d),
-                                  ("3Gaussians2d", self._create_3gaussians2d)]
+                                  ("3Gaussians2d", self._create_3gaussians2d),
+                                  ("RotatedEllipsoid100d", self._create_rotated_ellipsoid100d),
+                                  ("RotatedEllipsoid1000d", self._create_rotated_ellipsoid1000d),
+                                  ("RotatedRastrigin100d", self._create_rotated_rastrigin100d),
+                                  ("RotatedRastrigin1000d", self._create_rotated_rastrigin1000d),
+                                  ("BlockComposition1000d", self._create_block_composition1000d),
+                                  ("BlockComposition10000d", self._create_block_composition10000d)]
         self.function_name_index_map = OrderedDict([(name, index)
                                                     for index, (name, _) in enumerate(self.function_name_map)])
 
@@ -131,3 +138,32 @@ class BenchmarkedFunctions:
                      GaussianParameters(sigma=[[.25, .3], [.3, 1.]], mean=[1., 1.]),
                      GaussianParameters(sigma=[[.5, .25], [.25, 1.3]], mean=[2., -2.])]
         return FunctionGenerator(fg_params, dims=2, noise=noise, mu=mu, sigma=sigma)
+
+    # The high-dimensional families are shifted and rotated with a fixed seed, so that every call returns the same
+    # function. Their optimum is known, see FunctionGenerator.optimum
+
+    def _create_rotated_ellipsoid100d(self, noise, mu, sigma):
+        return FunctionGenerator([RotatedEllipsoidParameters(condition=1e6, block_size=20, seed=100)],
+                                 dims=100, noise=noise, mu=mu, sigma=sigma)
+
+    def _create_rotated_ellipsoid1000d(self, noise, mu, sigma):
+        return FunctionGenerator([RotatedEllipsoidParameters(condition=1e6, block_size=20, seed=1000)],
+                                 dims=1000, noise=noise, mu=mu, sigma=sigma)
+
+    def _create_rotated_rastrigin100d(self, noise, mu, sigma):
+        return FunctionGenerator([RotatedRastriginParameters(block_size=20, seed=100)],
+                                 dims=100, noise=noise, mu=mu, sigma=sigma)
+
+    def _create_rotated_rastrigin1000d(self, noise, mu, sigma):
+        return FunctionGenerator([RotatedRastriginParameters(block_size=20, seed=1000)],
+                                 dims=1000, noise=noise, mu=mu, sigma=sigma)
+
+    def _create_block_composition1000d(self, noise, mu, sigma):
+        return FunctionGenerator([BlockCompositionParameters(separable_fraction=0.5, condition=1e6, block_size=20,
+                                                             seed=1000)],
+                                 dims=1000, noise=noise, mu=mu, sigma=sigma)
+
+    def _create_block_composition10000d(self, noise, mu, sigma):
+        return FunctionGenerator([BlockCompositionParameters(separable_fraction=0.5, condition=1e6, block_size=20,
+                                                             seed=10000)],
+                                 dims=10000, noise=noise, mu=mu, sigma=sigma)
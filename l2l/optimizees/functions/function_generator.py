@@ -2,6 +2,10 @@ from abc import ABC, abstractmethod
 from collections import namedtuple, OrderedDict
 
 import numpy as np
+from scipy.linalg import solve_triangular
+
+# Number of points evaluated at once by FunctionGenerator.cost_function_batch
+_BATCH_ROWS = 1 << 16
 
 
 class FunctionGenerator:
@@ -17,6 +21,9 @@ class FunctionGenerator:
     :param noise: Boolean value indicating if the Gaussian noise will be applied on the resulting function.
     :param mu: Scalar indicating the mean of the Gaussian noise.
     :param sigma: Scalar indicating the standard deviation of the Gaussian noise.
+
+    If the generator holds a single function whose optimum is known, `optimum` holds the coordinates of its global
+    minimum and `optimum_value` the value of the function there, without noise. Otherwise both are None.
     """
 
     def __init__(self, fg_params, dims=2, bound=None, noise=False, mu=0., sigma=0.01):
@@ -26,6 +33,7 @@ class FunctionGenerator:
         self.sigma = sigma
         self.actual_optima = None
         cost_functions = dict(GaussianParameters=Gaussian,
+                              GaussianMixtureParameters=GaussianMixture,
                               PermutationParameters=Permutation,
                               EasomParameters=Easom,
                               LangermannParameters=Langermann,
@@ -34,7 +42,10 @@ class FunctionGenerator:
                               RastriginParameters=Rastrigin,
                               RosenbrockParameters=Rosenbrock,
                               AckleyParameters=Ackley,
-                              ChasmParameters=Chasm)
+                              ChasmParameters=Chasm,
+                              RotatedEllipsoidParameters=RotatedEllipsoid,
+                              RotatedRastriginParameters=RotatedRastrigin,
+                              BlockCompositionParameters=BlockComposition)
 
         self.gen_functions = []
         self.function_parameters = fg_params
@@ -53,6 +64,12 @@ class FunctionGenerator:
             bound_max = np.max(bounds_max)
             self.bound = [bound_min, bound_max]
 
+        self.optimum = None
+        self.optimum_value = None
+        if len(self.gen_functions) == 1 and self.gen_functions[0].optimum is not None:
+            self.optimum = self.gen_functions[0].optimum
+            self.optimum_value = self.gen_functions[0].optimum_value
+
     def cost_function(self, x, random_state=None):
         """It gets the value of the function. If the function includes noise, the `random_state`
         parameter must be specified
@@ -70,6 +87,50 @@ class FunctionGenerator:
 
         return res
 
+    def cost_function_batch(self, X, random_state=None):
+        """Same as :meth:`cost_function` for several points at once. The noise, if any, is drawn with a single
+        call to the random generator, which gives the same values as evaluating the points one by one.
+
+        :param X: array of shape (N, dims) with one point per row
+        :param ~numpy.random.RandomState random_state: The random generator used to generate the
+            noise for the function.
+        :return: array of shape (N,) with the value of the function at each point
+        """
+        X = np.asarray(X, dtype=float).reshape(-1, self.dims)
+        res = np.zeros(len(X))
+        # The points are evaluated in chunks, which bounds the size of the intermediate arrays of functions such as
+        # Shekel or Permutation
+        for start in range(0, len(X), _BATCH_ROWS):
+            chunk = X[start:start + _BATCH_ROWS]
+            for f in self.gen_functions:
+                res[start:start + _BATCH_ROWS] += f.batch(chunk)
+
+        if self.noise:
+            assert isinstance(random_state, np.random.RandomState)
+            res += random_state.normal(self.mu, self.sigma, size=len(X))
+
+        return res
+
+    @property
+    def provides_gradient(self):
+        """
+        True if all the functions of the generator provide their analytic gradient, see :meth:`gradient_batch`
+        """
+        return all(f.provides_gradient for f in self.gen_functions)
+
+    def gradient_batch(self, X):
+        """Analytic gradient of the cost function at several points. The noise does not depend on the point and
+        does not change the gradient.
+
+        :param X: array of shape (N, dims) with one point per row
+        :return: array of shape (N, dims) with the gradient at each point
+        """
+        X = np.asarray(X, dtype=float).reshape(-1, self.dims)
+        gradient = np.zeros(X.shape)
+        for f in self.gen_functions:
+            gradient += f.gradient_batch(X)
+        return gradient
+
     def get_params(self):
         fg_params = []
         for param in self.function_parameters:
@@ -88,7 +149,11 @@ class FunctionGenerator:
 class Function(ABC):
     """
     Base class for all test functions.
+    Functions whose global minimum is known set `optimum` to its coordinates and `optimum_value` to the value of the
+    function there.
     """
+    optimum = None
+    optimum_value = None
 
     @abstractmethod
     def __call__(self, x):
@@ -98,6 +163,33 @@ class Function(ABC):
         """
         pass
 
+    def batch(self, X):
+        """
+        Evaluates the function at several points. Subclasses override it with an implementation broadcast over the
+        rows of `X`, this default calls the function on each of them.
+
+        :param X: array of shape (N, dims) with one point per row
+        :return: array of shape (N,) with the value of the function at each point
+        """
+        return np.array([self(x) for x in np.asarray(X)], dtype=float)
+
+    def gradient_batch(self, X):
+        """
+        Optional analytic gradient of the function at several points. Functions which implement it are marked by
+        :attr:`provides_gradient`.
+
+        :param X: array of shape (N, dims) with one point per row
+        :return: array of shape (N, dims) with the gradient of the function at each point
+        """
+        raise NotImplementedError("{} does not provide its gradient".format(type(self).__name__))
+
+    @property
+    def provides_gradient(self):
+        """
+        True if the function implements :meth:`gradient_batch`
+        """
+        return type(self).gradient_batch is not Function.gradient_batch
+
 
 ShekelParameters = namedtuple('ShekelParameters', ['A', 'c'])
 ShekelParameters.__doc__ = """
@@ -146,6 +238,16 @@ class Shekel(Function):
             value += sum_diff_sq
         return -value
 
+    def batch(self, X):
+        diff = np.asarray(X)[:, np.newaxis, :] - self.A
+        sum_diff_sq = np.sum(diff ** 2 + self.c[:, np.newaxis], axis=2) ** -1
+        return -np.sum(sum_diff_sq, axis=1)
+
+    def gradient_batch(self, X):
+        diff = np.asarray(X)[:, np.newaxis, :] - self.A
+        sum_diff_sq = np.sum(diff ** 2 + self.c[:, np.newaxis], axis=2)
+        return np.einsum('nm,nmd->nd', 2 * sum_diff_sq ** -2, diff)
+
 
 MichalewiczParameters = namedtuple('MichalewiczParameters', ['m'])
 MichalewiczParameters.__doc__ = """
@@ -181,6 +283,20 @@ class Michalewicz(Function):
         value = -np.sum(np.sin(x) * b)
         return value
 
+    def batch(self, X):
+        X = np.asarray(X)
+        i = np.arange(1, self.dims + 1)
+        b = np.sin((i * X ** 2) / np.pi) ** (2 * self.m)
+        return -np.sum(np.sin(X) * b, axis=1)
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        i = np.arange(1, self.dims + 1)
+        a = (i * X ** 2) / np.pi
+        sin_a = np.sin(a)
+        d_b = 2 * self.m * sin_a ** (2 * self.m - 1) * np.cos(a) * (2 * i * X / np.pi)
+        return -(np.cos(X) * sin_a ** (2 * self.m) + np.sin(X) * d_b)
+
 
 LangermannParameters = namedtuple('LangermannParameters', ['A', 'c'])
 LangermannParameters.__doc__ = """
@@ -227,6 +343,19 @@ class Langermann(Function):
             value += self.c[i] * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq)
         return value
 
+    def batch(self, X):
+        sum_diff_sq = np.sum((np.asarray(X)[:, np.newaxis, :] - self.A) ** 2, axis=2)
+        values = self.c * np.exp((-1 / np.pi) * sum_diff_sq) * np.cos(np.pi * sum_diff_sq)
+        return np.sum(values, axis=1)
+
+    def gradient_batch(self, X):
+        diff = np.asarray(X)[:, np.newaxis, :] - self.A
+        sum_diff_sq = np.sum(diff ** 2, axis=2)
+        # Derivative of each term with respect to its squared distance
+        d_terms = self.c * np.exp((-1 / np.pi) * sum_diff_sq) * \
+            ((-1 / np.pi) * np.cos(np.pi * sum_diff_sq) - np.pi * np.sin(np.pi * sum_diff_sq))
+        return np.einsum('nm,nmd->nd', 2 * d_terms, diff)
+
 
 EasomParameters = namedtuple('EasomParameters', [])
 
@@ -243,6 +372,10 @@ class Easom(Function):
     def __init__(self, params, dims):
         self.dims = dims
         self.bound = [-10, 10]
+        # With an odd number of dimensions, the product of the cosines is negative at (pi, ..., pi)
+        if dims % 2 == 0:
+            self.optimum = np.full(dims, np.pi)
+            self.optimum_value = -1.
 
     def __call__(self, x):
         x = np.array(x)
@@ -251,6 +384,20 @@ class Easom(Function):
         value = -cos_x.prod() * np.exp(-np.sum(x_min_pi))
         return value
 
+    def batch(self, X):
+        X = np.asarray(X)
+        return -np.cos(X).prod(axis=1) * np.exp(-np.sum((X - np.pi) ** 2, axis=1))
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        cos_x = np.cos(X)
+        # Products of the cosines of all the other coordinates, without dividing by the cosines which may be 0
+        ones = np.ones((len(X), 1))
+        before = np.cumprod(np.hstack([ones, cos_x[:, :-1]]), axis=1)
+        after = np.cumprod(np.hstack([ones, cos_x[:, :0:-1]]), axis=1)[:, ::-1]
+        exp_term = np.exp(-np.sum((X - np.pi) ** 2, axis=1))[:, np.newaxis]
+        return exp_term * (np.sin(X) * before * after + 2 * (X - np.pi) * cos_x.prod(axis=1)[:, np.newaxis])
+
 
 PermutationParameters = namedtuple('PermutationParameters', ['beta'])
 PermutationParameters.__doc__ = """
@@ -281,6 +428,8 @@ class Permutation(Function):
         self.dims = dims
         self.beta = beta
         self.bound = [-dims, dims]
+        self.optimum = np.arange(1., dims + 1)
+        self.optimum_value = 0.
 
     def __call__(self, x):
         x = np.array(x)
@@ -290,6 +439,23 @@ class Permutation(Function):
         value = np.sum(value ** 2)
         return value
 
+    def batch(self, X):
+        X = np.asarray(X)
+        ks = np.arange(1, self.dims + 1)[:, np.newaxis]
+        i = np.arange(1, self.dims + 1)
+        # Axes (point, k, i)
+        terms = (i ** ks + self.beta) * ((X[:, np.newaxis, :] / i) ** ks - 1)
+        return np.sum(np.sum(terms, axis=2) ** 2, axis=1)
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        ks = np.arange(1, self.dims + 1)[:, np.newaxis]
+        i = np.arange(1, self.dims + 1)
+        scaled = X[:, np.newaxis, :] / i
+        inner = np.sum((i ** ks + self.beta) * (scaled ** ks - 1), axis=2)
+        d_terms = (i ** ks + self.beta) * ks * scaled ** (ks - 1) / i
+        return np.einsum('nk,nki->ni', 2 * inner, d_terms)
+
 
 GaussianParameters = namedtuple('GaussianParameters', ['sigma', 'mean'])
 GaussianParameters.__doc__ = """
@@ -298,9 +464,46 @@ GaussianParameters.__doc__ = """
 """
 
 
+def _factorize_covariance(sigma):
+    """
+    Factorizes a covariance matrix once, for the evaluation of Gaussian densities with triangular solves.
+
+    :param sigma: covariance matrix of shape (dims, dims)
+    :return: tuple (cholesky, log_norm) of the lower Cholesky factor of sigma and the log of the normalization
+        constant of the density
+    """
+    cholesky = np.linalg.cholesky(sigma)
+    log_det = 2 * np.sum(np.log(np.diag(cholesky)))
+    log_norm = -0.5 * (len(sigma) * np.log(2 * np.pi) + log_det)
+    return cholesky, log_norm
+
+
+def _log_density(diff, cholesky, log_norm):
+    """
+    :param diff: array of shape (N, dims) with the differences between the points and the mean
+    :return: array of shape (N,) with the log of the Gaussian density at each point
+    """
+    # With sigma = L L^T, the Mahalanobis distance is the norm of L^-1 (x - mean)
+    z = solve_triangular(cholesky, diff.T, lower=True, check_finite=False)
+    return log_norm - 0.5 * np.sum(z ** 2, axis=0)
+
+
+def _density_gradient(diff, cholesky, log_norm):
+    """
+    :return: array of shape (N, dims) with the gradient of the negated Gaussian density, the value of
+        :class:`Gaussian`, at each point
+    """
+    z = solve_triangular(cholesky, diff.T, lower=True, check_finite=False)
+    density = np.exp(log_norm - 0.5 * np.sum(z ** 2, axis=0))
+    # sigma^-1 (x - mean), from the factor of sigma
+    solved = solve_triangular(cholesky, z, lower=True, trans='T', check_finite=False)
+    return (solved * density).T
+
+
 class Gaussian(Function):
     """
     The multi-dimensional Gaussian (normal) distribution function.
+    The covariance matrix is factorized once at construction, each evaluation then only solves a triangular system.
 
     :param params: Instance of :func:`~collections.namedtuple` :class:`GaussianParameters`
     :param dims: dimensionality of the function
@@ -319,13 +522,84 @@ class Gaussian(Function):
         self.sigma = sigma
         self.mean = mean
         self.bound = [-5, 5]
+        self._cholesky, self._log_norm = _factorize_covariance(sigma.reshape(dims, dims))
+        self.optimum = mean.reshape(dims)
+        self.optimum_value = -np.exp(self._log_norm)
 
     def __call__(self, x):
-        x = np.array(x)
-        value = 1 / np.sqrt((2 * np.pi) ** self.dims * np.linalg.det(self.sigma))
-        value = value * np.exp(-0.5 * (np.transpose(x - self.mean).dot(np.linalg.inv(self.sigma))).dot((x - self.mean)))
+        return self.batch(np.reshape(x, (1, self.dims)))[0]
+
+    def batch(self, X):
+        diff = np.asarray(X) - self.mean.reshape(self.dims)
+        return -np.exp(_log_density(diff, self._cholesky, self._log_norm))
+
+    def gradient_batch(self, X):
+        diff = np.asarray(X) - self.mean.reshape(self.dims)
+        return _density_gradient(diff, self._cholesky, self._log_norm)
+
+
+GaussianMixtureParameters = namedtuple('GaussianMixtureParameters', ['sigmas', 'means', 'weights'])
+GaussianMixtureParameters.__doc__ = """
+:param sigmas: array k*n*n with the covariance matrix of each of the k components (n equals dims)
+:param means: matrix k*n with the mean of each component
+:param weights: list of the k non-negative weights of the components, or 'default' for equal weights of 1
+"""
+
+
+class GaussianMixture(Function):
+    """
+    Weighted sum of multi-dimensional Gaussian (normal) distribution functions, meant for synthetic landscapes with
+    many components in many dimensions. It is the same function as one :class:`Gaussian` per component scaled by
+    its weight, but the covariance matrices are factorized together at construction and the evaluation of a batch
+    of points solves one triangular system per component.
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`GaussianMixtureParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        sigmas = np.array(params.sigmas, dtype=float)
+        means = np.array(params.means, dtype=float)
+        if sigmas.ndim != 3 or sigmas.shape[1:] != (dims, dims) or means.shape != (len(sigmas), dims):
+            raise Exception("Shapes do not match the given dimensionality.")
+        if isinstance(params.weights, str) and params.weights == 'default':
+            weights = np.ones(len(sigmas))
+        else:
+            weights = np.array(params.weights, dtype=float)
+            if weights.shape != (len(sigmas),):
+                raise Exception("Parameters weights and means do not match.")
+            # The weights are applied through their logarithm
+            if np.any(weights < 0):
+                raise Exception("The weights of the mixture must be non-negative.")
+
+        self.dims = dims
+        self.sigmas = sigmas
+        self.means = means
+        self.weights = weights
+        self.bound = [-5, 5]
+        factors = [_factorize_covariance(sigma) for sigma in sigmas]
+        self._choleskys = np.array([cholesky for cholesky, _ in factors])
+        # The weights are folded into the normalization constants
+        with np.errstate(divide='ignore'):
+            self._log_norms = np.array([log_norm for _, log_norm in factors]) + np.log(weights)
+
+    def __call__(self, x):
+        return self.batch(np.reshape(x, (1, self.dims)))[0]
+
+    def batch(self, X):
+        X = np.asarray(X)
+        value = np.zeros(len(X))
+        for mean, cholesky, log_norm in zip(self.means, self._choleskys, self._log_norms):
+            value += np.exp(_log_density(X - mean, cholesky, log_norm))
         return -value
 
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        gradient = np.zeros(X.shape)
+        for mean, cholesky, log_norm in zip(self.means, self._choleskys, self._log_norms):
+            gradient += _density_gradient(X - mean, cholesky, log_norm)
+        return gradient
+
 
 RastriginParameters = namedtuple('RastriginParameters', [])
 
@@ -341,11 +615,20 @@ class Rastrigin(Function):
     def __init__(self, params, dims):
         self.dims = dims
         self.bound = [-5, 5]
+        self.optimum = np.zeros(dims)
+        self.optimum_value = 0.
 
     def __call__(self, x):
         x = np.array(x)
         return np.sum(x ** 2 + 10 - 10 * np.cos(2 * np.pi * x))
 
+    def batch(self, X):
+        X = np.asarray(X)
+        return np.sum(X ** 2 + 10 - 10 * np.cos(2 * np.pi * X), axis=1)
+
+    def gradient_batch(self, X):
+        return _rastrigin_gradient(np.asarray(X))
+
 
 RosenbrockParameters = namedtuple('RosenbrockParameters', [])
 
@@ -361,6 +644,8 @@ class Rosenbrock(Function):
     def __init__(self, params, dims):
         self.dims = dims
         self.bound = [-2, 2]
+        self.optimum = np.ones(dims)
+        self.optimum_value = 0.
 
     def __call__(self, x):
         x = np.array(x)
@@ -370,6 +655,26 @@ class Rosenbrock(Function):
         value = sum(value)
         return value
 
+    def batch(self, X):
+        X = np.asarray(X)
+        x_1 = X[:, 1:self.dims]
+        x_0 = X[:, 0:self.dims - 1]
+        terms = 100 * (x_1 - x_0 ** 2) ** 2 + (1 - x_0) ** 2
+        # Summed column by column, in the order of the built-in sum used by __call__
+        value = np.zeros(len(X))
+        for column in terms.T:
+            value += column
+        return value
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        x_1 = X[:, 1:self.dims]
+        x_0 = X[:, 0:self.dims - 1]
+        gradient = np.zeros(X.shape)
+        gradient[:, :-1] = -400 * x_0 * (x_1 - x_0 ** 2) - 2 * (1 - x_0)
+        gradient[:, 1:] += 200 * (x_1 - x_0 ** 2)
+        return gradient
+
 
 AckleyParameters = namedtuple('AckleyParameters', [])
 
@@ -386,12 +691,28 @@ class Ackley(Function):
     def __init__(self, params, dims):
         self.dims = dims
         self.bound = [-2, 2]
+        self.optimum = np.zeros(dims)
+        self.optimum_value = 0.
 
     def __call__(self, x):
         x = np.array(x)
         return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(x ** 2) / self.dims)) \
             - np.exp(np.sum(np.cos(2 * np.pi * x)) / self.dims)
 
+    def batch(self, X):
+        X = np.asarray(X)
+        return np.exp(1) + 20 - 20 * np.exp(-0.2 * np.sqrt(np.sum(X ** 2, axis=1) / self.dims)) \
+            - np.exp(np.sum(np.cos(2 * np.pi * X), axis=1) / self.dims)
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        radius = np.sqrt(np.sum(X ** 2, axis=1) / self.dims)[:, np.newaxis]
+        # The gradient of the first term vanishes at the origin
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d_radius = np.where(radius > 0, X / (self.dims * radius), 0.)
+        cos_term = np.exp(np.sum(np.cos(2 * np.pi * X), axis=1) / self.dims)[:, np.newaxis]
+        return 4 * np.exp(-0.2 * radius) * d_radius + cos_term * 2 * np.pi * np.sin(2 * np.pi * X) / self.dims
+
 
 ChasmParameters = namedtuple('ChasmParameters', [])
 
@@ -410,7 +731,232 @@ class Chasm(Function):
 
         self.dims = dims
         self.bound = [-2, 2]
+        self.optimum = np.zeros(dims)
+        self.optimum_value = 0.
 
     def __call__(self, x):
         x = np.array(x)
         return 1e3 * np.abs(x[0]) / (1e3 * np.abs(x[0]) + 1) + 1e-2 * np.abs(x[1])
+
+    def batch(self, X):
+        X = np.asarray(X)
+        return 1e3 * np.abs(X[:, 0]) / (1e3 * np.abs(X[:, 0]) + 1) + 1e-2 * np.abs(X[:, 1])
+
+    def gradient_batch(self, X):
+        X = np.asarray(X)
+        # The subgradient 0 is used where the absolute values are not differentiable
+        gradient = np.zeros(X.shape)
+        gradient[:, 0] = 1e3 * np.sign(X[:, 0]) / (1e3 * np.abs(X[:, 0]) + 1) ** 2
+        gradient[:, 1] = 1e-2 * np.sign(X[:, 1])
+        return gradient
+
+
+class _BlockRotation:
+    """
+    Random orthogonal transformation of the inputs of a function, applied in O(dims * block_size). The coordinates
+    are permuted and grouped into consecutive blocks of `block_size` coordinates, and each block is rotated by its
+    own random orthogonal matrix, instead of rotating all the coordinates by a dense dims*dims matrix. The first
+    `n_separable` permuted coordinates are not rotated.
+
+    :param dims: dimensionality of the function
+    :param block_size: number of coordinates rotated together
+    :param random_state: :class:`~numpy.random.RandomState` used to draw the permutation and the rotations
+    :param n_separable: number of coordinates left unrotated
+    """
+
+    def __init__(self, dims, block_size, random_state, n_separable=0):
+        if block_size < 1:
+            raise Exception("The block size must be positive.")
+        self.permutation = random_state.permutation(dims)
+        self.n_separable = n_separable
+        n_rotated = dims - n_separable
+        block_size = min(block_size, max(n_rotated, 1))
+        self.block_size = block_size
+        self.n_blocks = n_rotated // block_size
+        self.rotations = np.array([self._random_rotation(block_size, random_state)
+                                   for _ in range(self.n_blocks)]).reshape(self.n_blocks, block_size, block_size)
+        # The coordinates which do not fill a whole block are rotated together
+        n_last = n_rotated - self.n_blocks * block_size
+        self.last_rotation = self._random_rotation(n_last, random_state)
+
+    @staticmethod
+    def _random_rotation(size, random_state):
+        # Orthogonal matrix distributed uniformly (Haar measure), from the QR decomposition of a Gaussian matrix
+        q, r = np.linalg.qr(random_state.normal(size=(size, size)))
+        return q * np.sign(np.diag(r))
+
+    def __call__(self, X):
+        """
+        :param X: array of shape (N, dims) with one point per row
+        :return: array of shape (N, dims) with the transformed points
+        """
+        Y = np.asarray(X)[:, self.permutation]
+        start = self.n_separable
+        stop = start + self.n_blocks * self.block_size
+        blocks = Y[:, start:stop].reshape(len(Y), self.n_blocks, self.block_size)
+        Y[:, start:stop] = np.einsum('nbj,bij->nbi', blocks, self.rotations).reshape(len(Y), -1)
+        Y[:, stop:] = Y[:, stop:].dot(self.last_rotation.T)
+        return Y
+
+    def transpose(self, Z):
+        """
+        Applies the transposed, i.e. inverse, transformation, e.g. to map the gradient of a function of the
+        transformed points back to the original coordinates.
+
+        :param Z: array of shape (N, dims) with one transformed point per row
+        :return: array of shape (N, dims)
+        """
+        Y = np.array(Z, dtype=float)
+        start = self.n_separable
+        stop = start + self.n_blocks * self.block_size
+        blocks = Y[:, start:stop].reshape(len(Y), self.n_blocks, self.block_size)
+        Y[:, start:stop] = np.einsum('nbi,bij->nbj', blocks, self.rotations).reshape(len(Y), -1)
+        Y[:, stop:] = Y[:, stop:].dot(self.last_rotation)
+        X = np.empty_like(Y)
+        X[:, self.permutation] = Y
+        return X
+
+
+def _rastrigin_gradient(X):
+    return 2 * X + 20 * np.pi * np.sin(2 * np.pi * X)
+
+
+def _condition_weights(condition, n):
+    """
+    :return: the n weights condition ** (i / (n - 1)), from 1 to `condition`
+    """
+    if n < 2:
+        return np.ones(n)
+    return condition ** (np.arange(n) / (n - 1.))
+
+
+def _draw_optimum(dims, bound, random_state):
+    # The optimum is kept away from the bounds
+    return random_state.uniform(0.8 * bound[0], 0.8 * bound[1], dims)
+
+
+RotatedEllipsoidParameters = namedtuple('RotatedEllipsoidParameters', ['condition', 'block_size', 'seed'])
+RotatedEllipsoidParameters.__doc__ = """
+:param condition: ratio between the largest and the smallest curvature of the ellipsoid
+:param block_size: number of coordinates rotated together
+:param seed: seed of the random shift and rotation
+"""
+
+
+class RotatedEllipsoid(Function):
+    """
+    The ellipsoid function sum_i condition^(i/(dims-1)) z_i^2 of the shifted and rotated inputs z = R (x - x*). It
+    is unimodal and ill-conditioned, and the rotation makes it non-separable. The shift x* and the rotation R, made of
+    random orthogonal blocks, are drawn from the seed. An evaluation costs O(dims * block_size), so that the function
+    can be used with thousands of dimensions.
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`RotatedEllipsoidParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        random_state = np.random.RandomState(params.seed)
+        self.dims = dims
+        self.bound = [-5, 5]
+        self.optimum = _draw_optimum(dims, self.bound, random_state)
+        self.optimum_value = 0.
+        self.rotation = _BlockRotation(dims, params.block_size, random_state)
+        self.weights = _condition_weights(params.condition, dims)
+
+    def __call__(self, x):
+        return self.batch(np.reshape(x, (1, self.dims)))[0]
+
+    def batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        return (Z ** 2).dot(self.weights)
+
+    def gradient_batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        return self.rotation.transpose(2 * self.weights * Z)
+
+
+RotatedRastriginParameters = namedtuple('RotatedRastriginParameters', ['block_size', 'seed'])
+RotatedRastriginParameters.__doc__ = """
+:param block_size: number of coordinates rotated together
+:param seed: seed of the random shift and rotation
+"""
+
+
+class RotatedRastrigin(Function):
+    """
+    The Rastrigin function of the shifted and rotated inputs z = R (x - x*). The rotation makes it non-separable,
+    so that its local minima are no longer aligned with the axes. The shift x* and the rotation R, made of random
+    orthogonal blocks, are drawn from the seed. An evaluation costs O(dims * block_size).
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`RotatedRastriginParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        random_state = np.random.RandomState(params.seed)
+        self.dims = dims
+        self.bound = [-5, 5]
+        self.optimum = _draw_optimum(dims, self.bound, random_state)
+        self.optimum_value = 0.
+        self.rotation = _BlockRotation(dims, params.block_size, random_state)
+
+    def __call__(self, x):
+        return self.batch(np.reshape(x, (1, self.dims)))[0]
+
+    def batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        return np.sum(Z ** 2 + 10 - 10 * np.cos(2 * np.pi * Z), axis=1)
+
+    def gradient_batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        return self.rotation.transpose(_rastrigin_gradient(Z))
+
+
+BlockCompositionParameters = namedtuple('BlockCompositionParameters',
+                                        ['separable_fraction', 'condition', 'block_size', 'seed'])
+BlockCompositionParameters.__doc__ = """
+:param separable_fraction: fraction of the coordinates which are separable
+:param condition: ratio between the largest and the smallest curvature of the non-separable part
+:param block_size: number of non-separable coordinates rotated together
+:param seed: seed of the random shift, partition and rotation
+"""
+
+
+class BlockComposition(Function):
+    """
+    Partially separable function, as in the large scale global optimization benchmarks. The shifted inputs
+    x - x* are randomly split into a separable part, on which the function is the Rastrigin function, and a
+    non-separable part, grouped into randomly rotated blocks on which it is an ill-conditioned ellipsoid.
+    An evaluation costs O(dims * block_size).
+
+    :param params: Instance of :func:`~collections.namedtuple` :class:`BlockCompositionParameters`
+    :param dims: dimensionality of the function
+    """
+
+    def __init__(self, params, dims):
+        if not 0 <= params.separable_fraction <= 1:
+            raise Exception("The separable fraction must be between 0 and 1.")
+        random_state = np.random.RandomState(params.seed)
+        self.dims = dims
+        self.bound = [-5, 5]
+        self.optimum = _draw_optimum(dims, self.bound, random_state)
+        self.optimum_value = 0.
+        self.n_separable = int(round(params.separable_fraction * dims))
+        self.rotation = _BlockRotation(dims, params.block_size, random_state, self.n_separable)
+        self.weights = _condition_weights(params.condition, dims - self.n_separable)
+
+    def __call__(self, x):
+        return self.batch(np.reshape(x, (1, self.dims)))[0]
+
+    def batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        separable = Z[:, :self.n_separable]
+        value = np.sum(separable ** 2 + 10 - 10 * np.cos(2 * np.pi * separable), axis=1)
+        return value + (Z[:, self.n_separable:] ** 2).dot(self.weights)
+
+    def gradient_batch(self, X):
+        Z = self.rotation(np.asarray(X) - self.optimum)
+        gradient = np.empty(Z.shape)
+        gradient[:, :self.n_separable] = _rastrigin_gradient(Z[:, :self.n_separable])
+        gradient[:, self.n_separable:] = 2 * self.weights * Z[:, self.n_separable:]
+        return self.rotation.transpose(gradient)
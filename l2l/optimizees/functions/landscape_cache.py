@@ -0,0 +1,294 @@
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+
+logger = logging.getLogger("optimizees.LandscapeCache")
+
+# Number of grid points evaluated by each task of the pool
+_CHUNK_POINTS = 1 << 16
+# Default number of grid points per dimension, for 1, 2 and 3 dimensions
+_DEFAULT_POINTS = {1: 65537, 2: 1025, 3: 129}
+
+# This global only exists inside the worker processes, where it is set once by the pool initializer so that the
+# function generator is not sent along with every chunk of the grid
+_worker_landscape = None
+
+
+def _init_worker(landscape):
+    global _worker_landscape
+    _worker_landscape = landscape
+
+
+def _evaluate_chunk(chunk):
+    start, stop = chunk
+    return _worker_landscape._evaluate_indices(start, stop)
+
+
+class LandscapeCache:
+    """
+    Tabulated surrogate of a deterministic 1 to 3 dimensional :class:`~.FunctionGenerator`, for sweeps which evaluate
+    the same landscape many times. The function is evaluated once on a dense regular grid over its bounds, and
+    queries are answered by multilinear interpolation between the grid points, with numpy operations over whole
+    batches of points. Points outside the bounds are evaluated exactly.
+
+    The cache has the interface of the function generator used by :class:`~.FunctionGeneratorOptimizee`
+    (`cost_function`, `cost_function_batch`, `dims`, `bound`, `get_params`), so that it can be passed in its place.
+    The noise of the function generator, if any, is added to the interpolated values as by the function generator.
+
+    With a path, the grid is stored in a .npy file and opened as a memory-mapped array. A file written before for the
+    same function and grid is reused without evaluating the function again. When the grid is refined, only the file of
+    the final grid is kept, and the number of points it was refined to is recorded in a .key file next to the path, so
+    that the same refinement starts from the final grid.
+
+    :param fg_instance: Instance of the :class:`~.FunctionGenerator` class, with 1 to 3 dimensions
+    :param n_points: number of grid points per dimension. By default 65537, 1025 and 129 points for 1, 2 and 3
+        dimensions
+    :param tolerance: If given, the grid is refined, by halving its spacing, until the largest interpolation error
+        measured on random points within the bounds is at most `tolerance`, or until it has more than `max_points`
+        points
+    :param max_points: the largest number of grid points reached by the refinement
+    :param path: If given, path of the .npy file storing the grid
+    :param n_processes: number of processes evaluating the grid, the number of CPUs if None
+    """
+
+    def __init__(self, fg_instance, n_points=None, tolerance=None, max_points=1 << 26, path=None, n_processes=None):
+        if not 1 <= fg_instance.dims <= 3:
+            raise Exception("Only functions with 1 to 3 dimensions can be tabulated.")
+        self.fg_instance = fg_instance
+        self.dims = fg_instance.dims
+        self.bound = fg_instance.bound
+        self.noise = fg_instance.noise
+        self.mu = fg_instance.mu
+        self.sigma = fg_instance.sigma
+        self.optimum = getattr(fg_instance, 'optimum', None)
+        self.optimum_value = getattr(fg_instance, 'optimum_value', None)
+        self.path = path
+        self.n_processes = n_processes or multiprocessing.cpu_count()
+        self.tolerance = tolerance
+        #: Largest interpolation error measured on random points, set when a tolerance is given
+        self.max_error = None
+
+        n_points = n_points or _DEFAULT_POINTS[self.dims]
+        assert n_points >= 2, "The grid needs at least 2 points per dimension"
+        refinement_key = None
+        if tolerance is not None and path is not None:
+            # A refinement done before with the same settings is resumed from the grid it ended with
+            refinement_key = repr((self.fg_instance.get_params(), list(self.bound), self.dims, n_points, tolerance,
+                                   max_points))
+            n_points = self._load_refinement(refinement_key) or n_points
+        superseded = None
+        while True:
+            computed = self._build(n_points)
+            if superseded is not None:
+                self._remove_grid(superseded)
+            if tolerance is None:
+                break
+            self.max_error = self.measure_error()
+            if self.max_error <= tolerance:
+                break
+            n_points = 2 * n_points - 1
+            if n_points ** self.dims > max_points:
+                logger.warning("The interpolation error %g is above the tolerance %g with the largest allowed grid "
+                               "of %d points per dimension", self.max_error, tolerance, self.n_points)
+                break
+            # Grids loaded from files, e.g. the final grid of a refinement with another tolerance, are kept
+            superseded = self._grid_path() if computed else None
+        if refinement_key is not None:
+            with open(self.path + '.key', 'w') as handle:
+                handle.write('{}\n{}'.format(refinement_key, self.n_points))
+        logger.info("Tabulated the function on a grid of %d points per dimension", self.n_points)
+
+    def _build(self, n_points):
+        """
+        Loads or computes the grid with the given number of points per dimension
+
+        :return: True if the grid was computed, False if it was loaded from its file
+        """
+        self.n_points = n_points
+        self.shape = (n_points,) * self.dims
+        self.axis = np.linspace(self.bound[0], self.bound[1], n_points)
+        self.spacing = (self.bound[1] - self.bound[0]) / (n_points - 1.)
+        self._corners = list(np.ndindex(*(2,) * self.dims))
+
+        path = self._grid_path()
+        if path is not None and self._load(path):
+            return False
+        if path is None:
+            self.grid = np.empty(self.shape)
+        else:
+            self.grid = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.float64, shape=self.shape)
+        size = int(np.prod(self.shape))
+        chunks = [(start, min(start + _CHUNK_POINTS, size)) for start in range(0, size, _CHUNK_POINTS)]
+        flat_grid = self.grid.reshape(-1)
+        if self.n_processes > 1 and len(chunks) > 1:
+            with multiprocessing.Pool(self.n_processes, initializer=_init_worker,
+                                      initargs=(self._static_copy(),)) as pool:
+                for (start, stop), values in zip(chunks, pool.imap(_evaluate_chunk, chunks)):
+                    flat_grid[start:stop] = values
+        else:
+            for start, stop in chunks:
+                flat_grid[start:stop] = self._evaluate_indices(start, stop)
+
+        if path is not None:
+            self.grid.flush()
+            del flat_grid
+            self.grid = None
+            os.replace(path + '.tmp', path)
+            with open(path + '.key', 'w') as handle:
+                handle.write(self._key())
+            self._load(path)
+        return True
+
+    def _static_copy(self):
+        # The workers only need the function generator and the grid coordinates, not the grid itself
+        copy = LandscapeCache.__new__(LandscapeCache)
+        copy.fg_instance = self.fg_instance
+        copy.dims = self.dims
+        copy.shape = self.shape
+        copy.axis = self.axis
+        return copy
+
+    def _grid_path(self):
+        if self.path is None:
+            return None
+        # Each refinement of the grid has its own file
+        root, extension = os.path.splitext(self.path)
+        return '{}_{}{}'.format(root, self.n_points, extension or '.npy')
+
+    def _load_refinement(self, refinement_key):
+        """
+        Returns the number of grid points per dimension chosen by a refinement with the same settings, recorded next
+        to the path of the grid, or None
+        """
+        if not os.path.isfile(self.path + '.key'):
+            return None
+        with open(self.path + '.key') as handle:
+            key, _, n_points = handle.read().rpartition('\n')
+        if key != refinement_key:
+            return None
+        return int(n_points)
+
+    @staticmethod
+    def _remove_grid(path):
+        """
+        Removes the file of a grid superseded by a refinement, and its key file
+        """
+        for name in (path, path + '.key'):
+            if os.path.isfile(name):
+                os.remove(name)
+
+    def _key(self):
+        return repr((self.fg_instance.get_params(), list(self.bound), self.shape))
+
+    def _load(self, path):
+        """
+        Opens the grid stored in a file, if it was computed for the same function and grid
+        """
+        if not os.path.isfile(path) or not os.path.isfile(path + '.key'):
+            return False
+        with open(path + '.key') as handle:
+            if handle.read() != self._key():
+                return False
+        grid = np.load(path, mmap_mode='r')
+        if grid.shape != self.shape:
+            return False
+        self.grid = grid
+        return True
+
+    def _evaluate_indices(self, start, stop):
+        """
+        Evaluates the function, without noise, at the grid points with the given range of flat indices
+        """
+        indices = np.unravel_index(np.arange(start, stop), self.shape)
+        points = np.column_stack([self.axis[index] for index in indices])
+        return self._evaluate(points)
+
+    def _evaluate(self, points):
+        return np.sum([f.batch(points) for f in self.fg_instance.gen_functions], axis=0)
+
+    def interpolate(self, X):
+        """
+        Interpolates the function, without noise, at several points.
+
+        :param X: array of shape (N, dims) with one point per row
+        :return: array of shape (N,) with the interpolated value at each point
+        """
+        X = np.asarray(X, dtype=float).reshape(-1, self.dims)
+        position = (X - self.bound[0]) * (1. / self.spacing)
+        # Index of the lower corner of the cell holding each point, and position of the point within the cell
+        lower = np.clip(position.astype(np.intp), 0, self.n_points - 2)
+        fraction = position - lower
+        # The corners of the cells are gathered from the flattened grid, by their offsets to the lower corner
+        strides = self.n_points ** np.arange(self.dims - 1, -1, -1)
+        base = lower.dot(strides)
+        flat_grid = self.grid.reshape(-1)
+        values = np.zeros(len(X))
+        for corner in self._corners:
+            weight = None
+            for d, offset in enumerate(corner):
+                factor = fraction[:, d] if offset else 1 - fraction[:, d]
+                weight = factor if weight is None else weight * factor
+            values += weight * flat_grid.take(base + np.dot(corner, strides))
+
+        outside = np.any((X < self.bound[0]) | (X > self.bound[1]), axis=1)
+        if np.any(outside):
+            values[outside] = self._evaluate(X[outside])
+        return values
+
+    def measure_error(self, n_samples=10000, seed=0):
+        """
+        Measures the largest interpolation error on random points within the bounds.
+
+        :param n_samples: number of random points
+        :param seed: seed of the random points
+        :return: the largest absolute difference between the interpolated and the exact values
+        """
+        points = np.random.RandomState(seed).uniform(self.bound[0], self.bound[1], (n_samples, self.dims))
+        return np.max(np.abs(self.interpolate(points) - self._evaluate(points)))
+
+    def cost_function(self, x, random_state=None):
+        """
+        Same as :meth:`~.FunctionGenerator.cost_function`, with the interpolated value of the function
+        """
+        res = self._interpolate_point(np.ravel(x).tolist())
+        if self.noise:
+            assert isinstance(random_state, np.random.RandomState)
+            res += random_state.normal(self.mu, self.sigma)
+        return res
+
+    def _interpolate_point(self, x):
+        """
+        Same as :meth:`interpolate` for a single point given as a list, with python scalars, which is faster than
+        going through arrays of one point
+        """
+        lower = []
+        fractions = []
+        for value in x:
+            if not self.bound[0] <= value <= self.bound[1]:
+                return float(self._evaluate(np.array([x]))[0])
+            position = (value - self.bound[0]) / self.spacing
+            index = min(int(position), self.n_points - 2)
+            lower.append(index)
+            fractions.append(position - index)
+        res = 0.
+        for corner in self._corners:
+            weight = 1.
+            for offset, fraction in zip(corner, fractions):
+                weight *= fraction if offset else 1. - fraction
+            res += weight * self.grid[tuple(index + offset for index, offset in zip(lower, corner))]
+        return float(res)
+
+    def cost_function_batch(self, X, random_state=None):
+        """
+        Same as :meth:`~.FunctionGenerator.cost_function_batch`, with the interpolated values of the function
+        """
+        res = self.interpolate(X)
+        if self.noise:
+            assert isinstance(random_state, np.random.RandomState)
+            res += random_state.normal(self.mu, self.sigma, size=len(res))
+        return res
+
+    def get_params(self):
+        return self.fg_instance.get_params()
@@ -16,6 +16,8 @@ class FunctionGeneratorOptimizee(Optimizee):
         NOTE that this seed is converted to an np.uint32.
     """
 
+    provides_batch = True
+
     def __init__(self, traj, fg_instance, seed):
         super().__init__(traj)
 
@@ -60,3 +62,29 @@ class FunctionGeneratorOptimizee(Optimizee):
 
         individual = np.array(traj.individual.coords)
         return (self.cost_fn(individual, random_state=self.random_state), )
+
+    def simulate_batch(self, individuals_array):
+        """
+        Returns the values of the function chosen during initialization for all the given individuals
+
+        :param ~numpy.ndarray individuals_array: Array of shape (N, dims) with the coordinates of the individuals
+        :return: an array of shape (N, 1) containing the value of the chosen function for each individual
+        """
+        values = self.fg_instance.cost_function_batch(individuals_array, random_state=self.random_state)
+        return values.reshape(-1, 1)
+
+    @property
+    def provides_gradient(self):
+        """
+        True if the function generator provides the analytic gradient of all its functions
+        """
+        return getattr(self.fg_instance, 'provides_gradient', False)
+
+    def gradient(self, individuals_array):
+        """
+        Returns the analytic gradient of the function chosen during initialization for all the given individuals
+
+        :param ~numpy.ndarray individuals_array: Array of shape (N, dims) with the coordinates of the individuals
+        :return: an array of shape (N, 1, dims) containing the gradient of the function for each individual
+        """
+        return self.fg_instance.gradient_batch(individuals_array)[:, np.newaxis, :]
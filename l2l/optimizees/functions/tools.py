@@ -1,9 +1,11 @@
+import numpy as np
+
+
 def plot(fn, random_state):
     """
     Implements plotting of 2D functions generated by FunctionGenerator
-    :param fn: Instance of FunctionGenerator
+    :param fn: Instance of FunctionGenerator, or of LandscapeCache
     """
-    import numpy as np
     from l2l.matplotlib_ import plt
     from mpl_toolkits.mplot3d import Axes3D
     from matplotlib import cm
@@ -16,8 +18,8 @@ def plot(fn, random_state):
     X = np.arange(fn.bound[0], fn.bound[1], 0.05)
     Y = np.arange(fn.bound[0], fn.bound[1], 0.05)
     XX, YY = np.meshgrid(X, Y)
-    Z = [fn.cost_function([x, y], random_state=random_state) for x, y in zip(XX.ravel(), YY.ravel())]
-    Z = np.array(Z).reshape(XX.shape)
+    Z = fn.cost_function_batch(np.column_stack([XX.ravel(), YY.ravel()]), random_state=random_state)
+    Z = Z.reshape(XX.shape)
 
     # Plot the surface.
     surf = ax.plot_surface(XX, YY, Z, cmap=cm.coolwarm, linewidth=0, antialiased=False)
@@ -33,3 +35,27 @@ def plot(fn, random_state):
     fig.colorbar(surf, shrink=0.5, aspect=5)
     plt.savefig('function.png')
     plt.show()
+
+
+def evaluations_to_target(values, optimum_value, precision=1e-8, objective=0):
+    """
+    Counts the evaluations an optimizer needed to reach the optimum of a function within a given precision, e.g.
+    for the functions of :class:`~l2l.optimizees.functions.benchmarked_functions.BenchmarkedFunctions` whose
+    `optimum_value` is known.
+    :param values: the values of the function in the order of evaluation, or a
+        :class:`~l2l.utils.result_table.ResultTable` holding them, e.g. `traj.result_table`
+    :param optimum_value: the value of the function at its global minimum
+    :param precision: the target is reached by values lower than or equal to `optimum_value + precision`
+    :param objective: for a result table, the index of the value of the function in the fitness vectors
+    :return: the number of evaluations up to and including the first one reaching the target, or None if it was not
+        reached
+    """
+    if hasattr(values, 'rows'):
+        rows = values.rows
+        # Sorted by generation, keeping the order of the runs within each generation
+        rows = rows[np.argsort(rows['generation'], kind='mergesort')]
+        values = rows['fitness'][:, objective]
+    hits = np.flatnonzero(np.ravel(values) <= optimum_value + precision)
+    if not len(hits):
+        return None
+    return int(hits[0]) + 1
@@ -36,3 +36,37 @@ class Optimizee:
             multi-dimensional fitness function.
 
         """
+
+    #: True if the optimizee implements :meth:`simulate_batch`, so that an
+    #: :class:`~l2l.utils.environment.Environment` created with `batch=True` can evaluate whole generations at once
+    provides_batch = False
+
+    def simulate_batch(self, individuals_array):
+        """
+        Optional batched version of :meth:`simulate`, for optimizees which set :attr:`provides_batch`. It evaluates a
+        whole generation in a single call, when the :class:`~l2l.utils.environment.Environment` is created with
+        `batch=True`.
+
+        :param ~numpy.ndarray individuals_array: A 2-D array of shape (N, D) with one row per individual. Each row
+            is the list representation of the individual as created by :func:`~l2l.dict_to_list`, i.e. the
+            parameters are sorted by name and sequences are flattened.
+
+        :return: a 2-D array of shape (N, K) containing the K fitness values of each of the N individuals, in the
+            same order as the rows of `individuals_array`
+        """
+
+    #: True if the optimizee implements :meth:`gradient`, so that gradient based optimizers such as the
+    #: :class:`~l2l.optimizers.gradientdescent.optimizer.GradientDescentOptimizer` can use exact gradients instead of
+    #: estimating them from simulations
+    provides_gradient = False
+
+    def gradient(self, individuals_array):
+        """
+        Optional analytic gradient of the fitness, for optimizees which set :attr:`provides_gradient`.
+
+        :param ~numpy.ndarray individuals_array: A 2-D array of shape (N, D) with one row per individual, with the
+            same layout as for :meth:`simulate_batch`
+
+        :return: a 3-D array of shape (N, K, D) containing the gradient of each of the K fitness values of each of
+            the N individuals with respect to the D entries of its row
+        """
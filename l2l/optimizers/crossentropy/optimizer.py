@@ -3,7 +3,7 @@ from collections import namedtuple
 
 import numpy as np
 
-from l2l import dict_to_list, list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.crossentropy")
@@ -104,9 +104,8 @@ class CrossEntropyOptimizer(Optimizer):
 
         self.random_state = np.random.RandomState(traj.parameters.seed)
 
-        temp_indiv, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(),
-                                                                       get_dict_spec=True)
-        traj.f_add_derived_parameter('dimension', len(temp_indiv),
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(self.optimizee_create_individual())
+        traj.f_add_derived_parameter('dimension', self.optimizee_individual_dict_spec.size,
                                      comment='The dimension of the parameter space of the optimizee')
         traj.f_add_derived_parameter('n_elite', int(parameters.rho * parameters.pop_size),
                                      comment='Number of samples to be considered as elite')
@@ -138,7 +137,7 @@ class CrossEntropyOptimizer(Optimizer):
             current_eval_pop = [self.optimizee_bounding_func(ind) for ind in current_eval_pop]
 
         self.eval_pop = current_eval_pop
-        self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+        self.eval_pop_asarray = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
 
         # Max Likelihood
         self.current_distribution = parameters.distribution
@@ -153,14 +152,19 @@ class CrossEntropyOptimizer(Optimizer):
 
         self._expand_trajectory(traj)
 
+        # Bookkeeping of the asynchronous (ask/tell) mode
+        self.n_asked = 0
+        self.n_told = 0
+        self.async_population = []
+        self.async_fitness = []
+
     def post_process(self, traj, fitnesses_results):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
         """
 
-        n_iteration, smoothing, temp_decay = \
-            traj.n_iteration, traj.smoothing, traj.temp_decay
-        stop_criterion, n_elite = traj.stop_criterion, traj.n_elite
+        n_iteration, temp_decay, stop_criterion = \
+            traj.n_iteration, traj.temp_decay, traj.stop_criterion
 
         weighted_fitness_list = []
         #**************************************************************************************************************
@@ -180,12 +184,44 @@ class CrossEntropyOptimizer(Optimizer):
         traj.v_idx = -1  # set trajectory back to default
 
         weighted_fitness_list = np.array(weighted_fitness_list).ravel()
+        self._update_distribution(traj, self.eval_pop_asarray, weighted_fitness_list)
+
+        #**************************************************************************************************************
+        # Create the next generation by sampling the inferred distribution
+        #**************************************************************************************************************
+        # Note that this is only done in case the evaluated run is not the last run
+        fitnesses_results.clear()
+        self.eval_pop.clear()
+
+        # check if to stop
+        if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
+            #Sample from the constructed distribution
+            self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
+            self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(self.eval_pop_asarray)
+            # Clip to boundaries
+            if self.optimizee_bounding_func is not None:
+                self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
+                self.eval_pop_asarray = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
+            self.g += 1  # Update generation counter
+            self.T *= temp_decay
+            self._expand_trajectory(traj)
+
+    def _update_distribution(self, traj, eval_pop_asarray, weighted_fitness_list):
+        """
+        Selects the elite (and temperature selected non-elite) individuals of an evaluated generation, fits the
+        distribution to them and stores the generation parameters in the trajectory.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that contains the parameters of the optimizer
+        :param eval_pop_asarray: Array with the evaluated individuals as rows
+        :param weighted_fitness_list: Array with the weighted fitness of each evaluated individual
+        """
+        smoothing, temp_decay, n_elite = traj.smoothing, traj.temp_decay, traj.n_elite
 
         # Performs descending arg-sort of weighted fitness
         fitness_sorting_indices = list(reversed(np.argsort(weighted_fitness_list)))
 
         # Sorting the data according to fitness
-        sorted_population = self.eval_pop_asarray[fitness_sorting_indices]
+        sorted_population = eval_pop_asarray[fitness_sorting_indices]
         sorted_fitness = np.asarray(weighted_fitness_list)[fitness_sorting_indices]
 
         # Elite individuals are with performance better than or equal to the (1-rho) quantile.
@@ -197,7 +233,7 @@ class CrossEntropyOptimizer(Optimizer):
         self.gamma = sorted_fitness[n_elite - 1]
 
         logger.info("-- End of generation %d --", self.g)
-        logger.info("  Evaluated %d individuals", len(fitnesses_results))
+        logger.info("  Evaluated %d individuals", len(weighted_fitness_list))
         logger.info('  Best Fitness: %.4f', self.best_fitness_in_run)
         logger.info('  Average Fitness: %.4f', np.mean(sorted_fitness))
         logger.debug('  Calculated gamma: %.4f', self.gamma)
@@ -255,33 +291,47 @@ class CrossEntropyOptimizer(Optimizer):
             comment="These are the parameters of the distribution inferred from the currently evaluated"
                     " generation")
 
-        #**************************************************************************************************************
-        # Create the next generation by sampling the inferred distribution
-        #**************************************************************************************************************
-        # Note that this is only done in case the evaluated run is not the last run
-        fitnesses_results.clear()
-        self.eval_pop.clear()
+    def ask(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.ask`
 
-        # check if to stop
-        if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
-            #Sample from the constructed distribution
-            self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
-            self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
-                             for ind_asarray in self.eval_pop_asarray]
-            # Clip to boundaries
-            if self.optimizee_bounding_func is not None:
-                self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
-                self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
-            self.g += 1  # Update generation counter
-            self.T *= temp_decay
-            self._expand_trajectory(traj)
+        The initial individuals are handed out first. Afterwards individuals are sampled one at a time from the
+        current distribution, which is refitted every `pop_size` evaluations.
+        """
+        if self.n_asked >= traj.n_iteration * traj.pop_size or self.best_fitness_in_run >= traj.stop_criterion:
+            return None
+        self.n_asked += 1
+        if self.eval_pop:
+            return self.eval_pop.pop(0)
+        individual = self.optimizee_individual_dict_spec.decode(self.current_distribution.sample(1)[0])
+        if self.optimizee_bounding_func is not None:
+            individual = self.optimizee_bounding_func(individual)
+        return individual
+
+    def tell(self, traj, individual, fitness):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.tell`
+
+        Once `pop_size` evaluations have been told, the distribution is fitted to them, regardless of the
+        distribution they were sampled from.
+        """
+        self.async_population.append(self.optimizee_individual_dict_spec.encode(individual))
+        self.async_fitness.append(np.dot(fitness, self.optimizee_fitness_weights))
+        self.n_told += 1
+        if len(self.async_population) == self.pop_size:
+            self._update_distribution(traj, np.array(self.async_population),
+                                      np.array(self.async_fitness).ravel())
+            self.async_population.clear()
+            self.async_fitness.clear()
+            if self.n_told < traj.n_iteration * traj.pop_size:
+                self.g += 1  # Update generation counter
+                self.T *= traj.temp_decay
 
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
-        best_last_indiv_dict = list_to_dict(self.best_individual_in_run.tolist(),
-                                            self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(self.best_individual_in_run.tolist())
 
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', self.best_fitness_in_run)
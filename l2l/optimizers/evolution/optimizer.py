@@ -6,7 +6,7 @@ from collections import namedtuple
 from deap import base, creator, tools
 from deap.tools import HallOfFame
 
-from l2l import dict_to_list, list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("l2l-ga")
@@ -50,7 +50,7 @@ class GeneticAlgorithmOptimizer(Optimizer):
                          optimizee_fitness_weights=optimizee_fitness_weights,
                          parameters=parameters, optimizee_bounding_func=optimizee_bounding_func)
         self.optimizee_bounding_func = optimizee_bounding_func
-        __, self.optimizee_individual_dict_spec = dict_to_list(optimizee_create_individual(), get_dict_spec=True)
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(optimizee_create_individual())
 
         traj.f_add_parameter('seed', parameters.seed, comment='Seed for RNG')
         traj.f_add_parameter('popsize', parameters.popsize, comment='Population size')  # 185
@@ -69,7 +69,7 @@ class GeneticAlgorithmOptimizer(Optimizer):
         toolbox = base.Toolbox()
         # Structure initializers
         toolbox.register("individual", tools.initIterate, creator.Individual,
-                         lambda: dict_to_list(optimizee_create_individual()))
+                         lambda: self.optimizee_individual_dict_spec.encode(optimizee_create_individual()))
         toolbox.register("population", tools.initRepeat, list, toolbox.individual)
 
         # Operator registering
@@ -82,11 +82,10 @@ class GeneticAlgorithmOptimizer(Optimizer):
                 else:
                     # Deap Functions modify individuals in-place, Hence we must do the same
                     result_individuals_deap = func(*args, **kwargs)
-                    result_individuals = [list_to_dict(x, self.optimizee_individual_dict_spec)
-                                          for x in result_individuals_deap]
+                    result_individuals = self.optimizee_individual_dict_spec.decode_batch(result_individuals_deap)
                     bounded_individuals = [self.optimizee_bounding_func(x) for x in result_individuals]
                     for i, deap_indiv in enumerate(result_individuals_deap):
-                        deap_indiv[:] = dict_to_list(bounded_individuals[i])
+                        deap_indiv[:] = self.optimizee_individual_dict_spec.encode(bounded_individuals[i])
                     print("Bounded Individual: {}".format(bounded_individuals))
                     return result_individuals_deap
 
@@ -102,8 +101,7 @@ class GeneticAlgorithmOptimizer(Optimizer):
         # NOTE: The Individual object implements the list interface.
         self.pop = toolbox.population(n=traj.popsize)
         self.eval_pop_inds = [ind for ind in self.pop if not ind.fitness.valid]
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
-                         for ind in self.eval_pop_inds]
+        self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(self.eval_pop_inds)
 
         self.g = 0  # the current generation
         self.toolbox = toolbox  # the DEAP toolbox
@@ -111,6 +109,11 @@ class GeneticAlgorithmOptimizer(Optimizer):
 
         self._expand_trajectory(traj)
 
+        # Bookkeeping of the asynchronous (steady-state) mode
+        self.n_asked = 0
+        self.n_told = 0
+        self.async_pending = {}
+
     def post_process(self, traj, fitnesses_results):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
@@ -141,14 +144,14 @@ class GeneticAlgorithmOptimizer(Optimizer):
         logger.info("-- End of generation {} --".format(self.g))
         best_inds = tools.selBest(self.eval_pop_inds, 2)
         for best_ind in best_inds:
-            print("Best individual is %s, %s" % (list_to_dict(best_ind, self.optimizee_individual_dict_spec),
+            print("Best individual is %s, %s" % (self.optimizee_individual_dict_spec.decode(best_ind),
                                                  best_ind.fitness.values))
 
         self.hall_of_fame.update(self.eval_pop_inds)
 
         logger.info("-- Hall of fame --")
         for hof_ind in tools.selBest(self.hall_of_fame, 2):
-            logger.info("HOF individual is %s, %s" % (list_to_dict(hof_ind, self.optimizee_individual_dict_spec),
+            logger.info("HOF individual is %s, %s" % (self.optimizee_individual_dict_spec.decode(hof_ind),
                                                       hof_ind.fitness.values))
 
         # ------- Create the next generation by crossover and mutation -------- #
@@ -183,12 +186,75 @@ class GeneticAlgorithmOptimizer(Optimizer):
             self.pop[:] = offspring
 
             self.eval_pop_inds = [ind for ind in self.pop if not ind.fitness.valid]
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
-                             for ind in self.eval_pop_inds]
+            self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(self.eval_pop_inds)
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
+    def ask(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.ask`
+
+        Steady-state variant of the genetic algorithm. The individuals of the initial population are handed out
+        first. Afterwards each new individual is the offspring of two parents selected by tournament among the
+        evaluated individuals of the population.
+        """
+        if self.n_asked >= traj.n_iteration * traj.popsize:
+            return None
+        if self.n_asked < len(self.eval_pop_inds):
+            deap_individual = self.eval_pop_inds[self.n_asked]
+            individual = self.eval_pop[self.n_asked]
+        else:
+            evaluated = [ind for ind in self.pop if ind.fitness.valid]
+            if not evaluated:
+                # Wait until the first individuals of the population are evaluated
+                return None
+            child, other = map(self.toolbox.clone, self.toolbox.select(evaluated, 2))
+            changed = False
+            if random.random() < traj.CXPB:
+                self.toolbox.mate(child, other)
+                changed = True
+            # An unchanged child would only repeat the evaluation of its parent
+            if not changed or random.random() < traj.MUTPB:
+                self.toolbox.mutate(child)
+            del child.fitness.values
+            deap_individual = child
+            individual = self.optimizee_individual_dict_spec.decode(child)
+
+        self.n_asked += 1
+        self.async_pending[id(individual)] = deap_individual
+        return individual
+
+    def tell(self, traj, individual, fitness):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.tell`
+
+        An evaluated offspring replaces the worst evaluated individual of the population if it is fitter.
+        """
+        deap_individual = self.async_pending.pop(id(individual))
+        deap_individual.fitness.values = fitness
+        self.hall_of_fame.update([deap_individual])
+
+        if not any(deap_individual is ind for ind in self.pop):
+            evaluated = [i for i, ind in enumerate(self.pop) if ind.fitness.valid]
+            worst = min(evaluated, key=lambda i: self.pop[i].fitness)
+            if deap_individual.fitness > self.pop[worst].fitness:
+                self.pop[worst] = deap_individual
+
+        self.n_told += 1
+        if self.n_told % traj.popsize == 0 and self.n_told < traj.n_iteration * traj.popsize:
+            logger.info("-- End of generation {} --".format(self.g))
+            self.g += 1
+
+    def save_state(self):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.save_state`. The DEAP toolbox is left out, since it holds
+        closures and is rebuilt by `__init__`
+        """
+        state = super().save_state()
+        state['attributes'].pop('toolbox', None)
+        return state
+
     def end(self):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
@@ -2,7 +2,7 @@ import logging
 from collections import namedtuple
 
 import numpy as np
-from l2l import dict_to_list, list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.evolutionstrategies")
@@ -137,9 +137,10 @@ class EvolutionStrategiesOptimizer(Optimizer):
 
         self.random_state = np.random.RandomState(traj.parameters.seed)
 
-        self.current_individual_arr, self.optimizee_individual_dict_spec = \
-            dict_to_list(
-                self.optimizee_create_individual(), get_dict_spec=True)
+        individual = self.optimizee_create_individual()
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(individual)
+        self.current_individual_arr = \
+            self.optimizee_individual_dict_spec.encode(individual)
 
         noise_std_shape = np.array(parameters.noise_std).shape
         ind_shape = self.current_individual_arr.shape
@@ -175,13 +176,13 @@ class EvolutionStrategiesOptimizer(Optimizer):
         # as vectors
         self.current_perturbations = self._get_perturbations(traj)
 
-        current_eval_pop_arr = (
-            self.current_individual_arr + self.current_perturbations).tolist()
+        current_eval_pop_arr = \
+            self.current_individual_arr + self.current_perturbations
 
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec)
-                         for ind in current_eval_pop_arr]
-        self.eval_pop.append(list_to_dict(self.current_individual_arr,
-                                          self.optimizee_individual_dict_spec))
+        self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(
+            current_eval_pop_arr)
+        self.eval_pop.append(self.optimizee_individual_dict_spec.decode(
+            self.current_individual_arr))
 
         # Bounding function has to be applied AFTER the individual has been
         # converted to a dict
@@ -189,11 +190,23 @@ class EvolutionStrategiesOptimizer(Optimizer):
             self.eval_pop[:] = [self.optimizee_bounding_func(ind) for ind in
                                 self.eval_pop]
 
-        self.eval_pop_arr = np.array(
-            [dict_to_list(ind) for ind in self.eval_pop])
+        self.eval_pop_arr = self.optimizee_individual_dict_spec.encode_batch(
+            self.eval_pop)
 
         self._expand_trajectory(traj)
 
+        # Bookkeeping of the asynchronous (ask/tell) mode. The initial
+        # individual is the last one of eval_pop and has no perturbation
+        self.n_asked = 0
+        self.n_told = 0
+        self.async_pending = {}
+        self.async_queue = list(zip(
+            self.eval_pop, list(self.current_perturbations) + [None]))
+        self.async_population = []
+        self.async_fitness = []
+        self.async_perturbations = []
+        self.async_current_fitness = None
+
     def _get_perturbations(self, traj):
         pop_size, noise_std, mirrored_sampling_enabled = \
             traj.pop_size, traj.noise_std, traj.mirrored_sampling_enabled
@@ -210,10 +223,7 @@ class EvolutionStrategiesOptimizer(Optimizer):
         See :meth:`~l2l.optimizers.optimizer.Optimizer.post_process`
         """
 
-        n_iteration, stop_criterion, learning_rate = \
-            traj.n_iteration, traj.stop_criterion, traj.learning_rate
-        noise_std, fitness_shaping_enabled = \
-            traj.noise_std, traj.fitness_shaping_enabled
+        n_iteration, stop_criterion = traj.n_iteration, traj.stop_criterion
 
         weighted_fitness_list = []
         # *********************************************************************
@@ -244,23 +254,81 @@ class EvolutionStrategiesOptimizer(Optimizer):
         weighted_fitness_list = weighted_fitness_list[:-1]
         current_individual_fitness = weighted_fitness_list[-1]
 
+        self._update_current_individual(
+            traj, self.eval_pop_arr, weighted_fitness_list,
+            self.current_perturbations, current_individual_fitness,
+            len(weighted_fitness_list) + 1)
+
+        # *********************************************************************
+        # Create the next generation by sampling the inferred distribution
+        # *********************************************************************
+        # Note that this is only done in case the evaluated run is not the
+        # last run
+        self.eval_pop.clear()
+
+        # check if to stop
+        max_g = n_iteration - 1
+        if self.g < max_g and self.best_fitness_in_run < stop_criterion:
+            self.current_perturbations = self._get_perturbations(traj)
+            current_eval_pop_arr = \
+                self.current_individual_arr + self.current_perturbations
+
+            self.eval_pop[:] = \
+                self.optimizee_individual_dict_spec.decode_batch(
+                    current_eval_pop_arr)
+            self.eval_pop.append(self.optimizee_individual_dict_spec.decode(
+                self.current_individual_arr))
+
+            # Bounding function has to be applied AFTER the individual has been
+            # converted to a dict
+            if self.optimizee_bounding_func is not None:
+                self.eval_pop[:] = [self.optimizee_bounding_func(ind)
+                                    for ind in self.eval_pop]
+
+            self.eval_pop_arr[:] = \
+                self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
+
+            self.g += 1  # Update generation counter
+            self._expand_trajectory(traj)
+
+    def _update_current_individual(self, traj, eval_pop_arr,
+                                   weighted_fitness_list, perturbations,
+                                   current_individual_fitness, n_evaluated):
+        """
+        Updates `current_individual_arr` with the fitness weighted
+        perturbations of an evaluated generation and stores the generation
+        parameters in the trajectory.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that
+          contains the parameters of the optimizer
+        :param eval_pop_arr: Array with the evaluated individuals as rows
+        :param weighted_fitness_list: Array with the weighted fitness of the
+          perturbed individuals
+        :param perturbations: Array with the perturbation of each of the
+          perturbed individuals
+        :param current_individual_fitness: Weighted fitness of the current
+          individual
+        :param n_evaluated: Number of evaluated individuals, for logging
+        """
+        learning_rate, noise_std, fitness_shaping_enabled = \
+            traj.learning_rate, traj.noise_std, traj.fitness_shaping_enabled
+
         # Performs descending arg-sort of weighted fitness
         fitness_sorting_indices = list(
             reversed(np.argsort(weighted_fitness_list)))
 
         # Sorting the data according to fitness
-        sorted_population = self.eval_pop_arr[fitness_sorting_indices]
+        sorted_population = eval_pop_arr[fitness_sorting_indices]
         sorted_fitness = np.asarray(weighted_fitness_list)[
             fitness_sorting_indices]
-        sorted_perturbations = self.current_perturbations[
+        sorted_perturbations = perturbations[
             fitness_sorting_indices]
 
         self.best_individual_in_run = sorted_population[0]
         self.best_fitness_in_run = sorted_fitness[0]
 
         logger.info("-- End of generation %d --", self.g)
-        logger.info("  Evaluated %d individuals",
-                    len(weighted_fitness_list) + 1)
+        logger.info("  Evaluated %d individuals", n_evaluated)
         logger.info('  Best Fitness: %.4f', self.best_fitness_in_run)
         logger.info('  Average Fitness: %.4f', np.mean(sorted_fitness))
 
@@ -317,47 +385,73 @@ class EvolutionStrategiesOptimizer(Optimizer):
         weight = len(fitnesses_to_fit) * np.asarray(noise_std) ** 2
         self.current_individual_arr += learning_rate * (sum_fits / weight)
 
-        # *********************************************************************
-        # Create the next generation by sampling the inferred distribution
-        # *********************************************************************
-        # Note that this is only done in case the evaluated run is not the
-        # last run
-        self.eval_pop.clear()
-
-        # check if to stop
-        max_g = n_iteration - 1
-        if self.g < max_g and self.best_fitness_in_run < stop_criterion:
-            self.current_perturbations = self._get_perturbations(traj)
-            perturbated = \
-                self.current_individual_arr + self.current_perturbations
-            current_eval_pop_arr = perturbated.tolist()
-
-            self.eval_pop[:] = [
-                list_to_dict(ind, self.optimizee_individual_dict_spec)
-                for ind in current_eval_pop_arr]
-            self.eval_pop.append(
-                list_to_dict(self.current_individual_arr,
-                             self.optimizee_individual_dict_spec))
+    def ask(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.ask`
 
-            # Bounding function has to be applied AFTER the individual has been
-            # converted to a dict
+        The individuals of the initial generation are handed out first.
+        Afterwards, whenever the individuals of a generation have all been
+        handed out, new perturbations of the current individual are sampled
+        without waiting for the pending evaluations.
+        """
+        generation_size = len(self.current_perturbations)
+        if self.n_asked >= traj.n_iteration * generation_size or \
+                self.best_fitness_in_run >= traj.stop_criterion:
+            return None
+        if not self.async_queue:
+            perturbations = self._get_perturbations(traj)
+            individuals = self.optimizee_individual_dict_spec.decode_batch(
+                self.current_individual_arr + perturbations)
             if self.optimizee_bounding_func is not None:
-                self.eval_pop[:] = [self.optimizee_bounding_func(ind)
-                                    for ind in self.eval_pop]
-
-            self.eval_pop_arr[:] = np.asarray(
-                [dict_to_list(ind) for ind in self.eval_pop])
+                individuals = [self.optimizee_bounding_func(ind)
+                               for ind in individuals]
+            self.async_queue[:] = zip(individuals, perturbations)
+        individual, perturbation = self.async_queue.pop(0)
+        if perturbation is not None:
+            self.n_asked += 1
+        self.async_pending[id(individual)] = perturbation
+        return individual
+
+    def tell(self, traj, individual, fitness):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.tell`
 
-            self.g += 1  # Update generation counter
-            self._expand_trajectory(traj)
+        The current individual is updated every time the fitnesses of as many
+        perturbations as in one generation have been told. The perturbations
+        are used as they are, even if the current individual moved since they
+        were sampled.
+        """
+        perturbation = self.async_pending.pop(id(individual))
+        weighted_fitness = np.dot(fitness, self.optimizee_fitness_weights)
+        if perturbation is None:
+            # This is the evaluation of the initial individual
+            self.async_current_fitness = weighted_fitness
+            return
+
+        self.async_population.append(
+            self.optimizee_individual_dict_spec.encode(individual))
+        self.async_fitness.append(weighted_fitness)
+        self.async_perturbations.append(perturbation)
+        self.n_told += 1
+        generation_size = len(self.current_perturbations)
+        if len(self.async_fitness) == generation_size:
+            self._update_current_individual(
+                traj, np.array(self.async_population),
+                np.array(self.async_fitness).ravel(),
+                np.array(self.async_perturbations),
+                self.async_current_fitness, generation_size)
+            self.async_population.clear()
+            self.async_fitness.clear()
+            self.async_perturbations.clear()
+            if self.n_told < traj.n_iteration * generation_size:
+                self.g += 1  # Update generation counter
 
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
-        best_last_indiv_dict = list_to_dict(
-            self.best_individual_in_run.tolist(),
-            self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(
+            self.best_individual_in_run.tolist())
 
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', self.best_fitness_in_run)
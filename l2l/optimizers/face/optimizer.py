@@ -3,7 +3,7 @@ from collections import namedtuple
 
 import numpy as np
 
-from l2l import dict_to_list, list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.face")
@@ -108,9 +108,8 @@ class FACEOptimizer(Optimizer):
                              comment='Random seed used by optimizer')
 
         self.random_state = np.random.RandomState(seed=traj.par.seed)
-        temp_indiv, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(),
-                                                                       get_dict_spec=True)
-        traj.f_add_derived_parameter('dimension', len(temp_indiv),
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(self.optimizee_create_individual())
+        traj.f_add_derived_parameter('dimension', self.optimizee_individual_dict_spec.size,
                                      comment='The dimension of the parameter space of the optimizee')
 
         # Added a generation-wise parameter logging
@@ -139,7 +138,7 @@ class FACEOptimizer(Optimizer):
             current_eval_pop = [self.optimizee_bounding_func(ind) for ind in current_eval_pop]
 
         self.eval_pop = current_eval_pop
-        self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+        self.eval_pop_asarray = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
 
         # Max Likelihood
         self.current_distribution = parameters.distribution
@@ -261,12 +260,11 @@ class FACEOptimizer(Optimizer):
         if expand:
             # Sample from the constructed distribution
             self.eval_pop_asarray = self.current_distribution.sample(self.pop_size)
-            self.eval_pop = [list_to_dict(ind_asarray, self.optimizee_individual_dict_spec)
-                             for ind_asarray in self.eval_pop_asarray]
+            self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(self.eval_pop_asarray)
             # Clip to boundaries
             if self.optimizee_bounding_func is not None:
                 self.eval_pop = [self.optimizee_bounding_func(individual) for individual in self.eval_pop]
-                self.eval_pop_asarray = np.array([dict_to_list(x) for x in self.eval_pop])
+                self.eval_pop_asarray = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
             self.g += 1  # Update generation counter
             self.T *= temp_decay
             self._expand_trajectory(traj)
@@ -275,8 +273,7 @@ class FACEOptimizer(Optimizer):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
-        best_last_indiv_dict = list_to_dict(self.best_individual_in_run.tolist(),
-                                            self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(self.best_individual_in_run.tolist())
 
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', self.best_fitness_in_run)
@@ -2,8 +2,8 @@ import logging
 from collections import namedtuple
 
 import numpy as np
-from l2l import dict_to_list
-from l2l import list_to_dict
+from l2l import DictSpec
+from l2l.optimizees.optimizee import Optimizee
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.gradientdescent")
@@ -108,6 +108,19 @@ class GradientDescentOptimizer(Optimizer):
       :func:`~collections.namedtuple` :class:`.AdamParameters` containing the
       parameters needed by the Optimizer. The type of this parameter is used
       to select one of the GD variants.
+
+    :param optimizee_bounding_func:
+      Function that bounds the individuals to the valid parameter space
+
+    :param optimizee_gradient_func:
+      Optional function returning the exact gradient of the fitness, e.g.
+      :meth:`~l2l.optimizees.optimizee.Optimizee.gradient` of an optimizee
+      whose `provides_gradient` is True, which is checked for the methods of
+      optimizees. It is called with a 2-D array of
+      individuals in the layout of :func:`~l2l.dict_to_list` and returns the
+      gradients of their fitness vectors, of shape (N, K, D). With it, each
+      iteration only evaluates the current individual instead of taking
+      `n_random_steps` random steps to estimate the gradient
     
     """
 
@@ -115,7 +128,8 @@ class GradientDescentOptimizer(Optimizer):
                  optimizee_create_individual,
                  optimizee_fitness_weights,
                  parameters,
-                 optimizee_bounding_func=None):
+                 optimizee_bounding_func=None,
+                 optimizee_gradient_func=None):
         super().__init__(
             traj,
             optimizee_create_individual=optimizee_create_individual,
@@ -124,13 +138,22 @@ class GradientDescentOptimizer(Optimizer):
             optimizee_bounding_func=optimizee_bounding_func)
 
         self.optimizee_bounding_func = optimizee_bounding_func
-
-        _, self.optimizee_individual_dict_spec = dict_to_list(
-            self.optimizee_create_individual(), get_dict_spec=True)
+        self.optimizee_gradient_func = optimizee_gradient_func
+        if optimizee_gradient_func is not None:
+            optimizee = getattr(optimizee_gradient_func, '__self__', None)
+            if isinstance(optimizee, Optimizee):
+                assert optimizee.provides_gradient, \
+                    "The optimizee does not provide exact gradients"
+            logger.info("Using the exact gradients of the optimizee instead "
+                        "of random steps")
+
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(
+            self.optimizee_create_individual())
 
         exploration_step_size = parameters.exploration_step_size
         if isinstance(exploration_step_size, dict):
-            exploration_step_size = dict_to_list(exploration_step_size)
+            exploration_step_size = self.optimizee_individual_dict_spec.encode(
+                exploration_step_size)
 
 
 
@@ -157,8 +180,8 @@ class GradientDescentOptimizer(Optimizer):
         # This is because this array is used within the context of the
         # gradient descent algorithm and thus needs to handle the optimizee
         # individuals as vectors
-        self.current_individual = np.array(
-            dict_to_list(self.optimizee_create_individual()))
+        self.current_individual = self.optimizee_individual_dict_spec.encode(
+            self.optimizee_create_individual())
 
         # Depending on the algorithm used, initialize the necessary variables
         self.update_function = None
@@ -186,22 +209,22 @@ class GradientDescentOptimizer(Optimizer):
                                                 'across a generation')
 
         # Explore the neighbourhood in the parameter space of current
-        # individual
-        new_individual_list = [
-            list_to_dict((self.current_individual +
-                          self.random_state.normal(
-                              0.0,
-                              exploration_step_size,
-                              self.current_individual.size)).tolist(),
-                         self.optimizee_individual_dict_spec)
-            for _ in range(parameters.n_random_steps)
-        ]
+        # individual, unless the gradient is known
+        new_individual_list = []
+        if optimizee_gradient_func is None:
+            new_individual_list = \
+                self.optimizee_individual_dict_spec.decode_batch(np.array([
+                    self.current_individual +
+                    self.random_state.normal(
+                        0.0,
+                        exploration_step_size,
+                        self.current_individual.size)
+                    for _ in range(parameters.n_random_steps)]))
 
         # Also add the current individual to determine it's fitness
         new_individual_list.append(
-            list_to_dict(
-                list(self.current_individual),
-                self.optimizee_individual_dict_spec))
+            self.optimizee_individual_dict_spec.decode(
+                self.current_individual))
 
         if optimizee_bounding_func is not None:
             new_individual_list = [self.optimizee_bounding_func(ind)
@@ -223,12 +246,15 @@ class GradientDescentOptimizer(Optimizer):
 
         logger.info("  Evaluating %i individuals" % len(fitnesses_results))
 
-        assert len(fitnesses_results) - 1 == traj.n_random_steps
+        n_random_steps = traj.n_random_steps
+        if self.optimizee_gradient_func is not None:
+            n_random_steps = 0
+        assert len(fitnesses_results) - 1 == n_random_steps
 
         # We need to collect the directions of the random steps along with
         # the fitness evaluated there
-        fitnesses = np.zeros(traj.n_random_steps)
-        dx = np.zeros((traj.n_random_steps, len(self.current_individual)))
+        fitnesses = np.zeros(n_random_steps)
+        dx = np.zeros((n_random_steps, len(self.current_individual)))
         weighted_fitness_list = []
 
         for i, (run_index, fitness) in enumerate(fitnesses_results):
@@ -251,15 +277,15 @@ class GradientDescentOptimizer(Optimizer):
                 self.current_fitness = weighted_fitness
             else:
                 fitnesses[i] = weighted_fitness
-                dx[i] = np.array(
-                    dict_to_list(individual)) - self.current_individual
+                dx[i] = self.optimizee_individual_dict_spec.encode(
+                    individual) - self.current_individual
         traj.v_idx = -1  # set the trajectory back to default
 
         # Performs descending arg-sort of weighted fitness
         fitness_sorting_indices = list(
             reversed(np.argsort(weighted_fitness_list)))
-        old_eval_pop_as_array = np.array(
-            [dict_to_list(x) for x in old_eval_pop])
+        old_eval_pop_as_array = \
+            self.optimizee_individual_dict_spec.encode_batch(old_eval_pop)
 
         # Sorting the data according to fitness
         sorted_population = old_eval_pop_as_array[fitness_sorting_indices]
@@ -273,9 +299,8 @@ class GradientDescentOptimizer(Optimizer):
         logger.info('  Best Fitness: %.4f', sorted_fitness[0])
         logger.info("  Best individual is %s", sorted_population[0])
 	
-        curr_ind_dict =  list_to_dict(
-                    self.current_individual,
-                    self.optimizee_individual_dict_spec)
+        curr_ind_dict = self.optimizee_individual_dict_spec.decode(
+            self.current_individual)
 
         generation_result_dict = {
             'generation': self.g,
@@ -297,31 +322,35 @@ class GradientDescentOptimizer(Optimizer):
         max_g = traj.n_iteration - 1
         if self.g < max_g and traj.stop_criterion > self.current_fitness:
             # Create new individual using the appropriate gradient descent
-            self.update_function(
-                traj,
-                np.dot(np.linalg.pinv(dx), fitnesses - self.current_fitness))
+            if self.optimizee_gradient_func is not None:
+                gradient = self._exact_gradient()
+            else:
+                gradient = np.dot(np.linalg.pinv(dx),
+                                  fitnesses - self.current_fitness)
+            self.update_function(traj, gradient)
 
-            current_individual_dict = list_to_dict(
-                list(self.current_individual),
-                self.optimizee_individual_dict_spec)
+            current_individual_dict = \
+                self.optimizee_individual_dict_spec.decode(
+                    self.current_individual)
             if self.optimizee_bounding_func is not None:
                 current_individual_dict = self.optimizee_bounding_func(
                     current_individual_dict)
-            self.current_individual = np.array(
-                dict_to_list(current_individual_dict))
+            self.current_individual = \
+                self.optimizee_individual_dict_spec.encode(
+                    current_individual_dict)
 
             # Explore the neighbourhood in the parameter space of the
-            # current individual
-            new_individual_list = [
-                list_to_dict(
-                    self.current_individual +
-                    self.random_state.normal(
-                        0.0,
-                        traj.exploration_step_size,
-                        self.current_individual.size),
-                    self.optimizee_individual_dict_spec)
-                for _ in range(traj.n_random_steps)
-            ]
+            # current individual, unless the gradient is known
+            new_individual_list = []
+            if self.optimizee_gradient_func is None:
+                new_individual_list = \
+                    self.optimizee_individual_dict_spec.decode_batch(np.array([
+                        self.current_individual +
+                        self.random_state.normal(
+                            0.0,
+                            traj.exploration_step_size,
+                            self.current_individual.size)
+                        for _ in range(traj.n_random_steps)]))
             if self.optimizee_bounding_func is not None:
                 new_individual_list = [self.optimizee_bounding_func(ind)
                                        for ind in new_individual_list]
@@ -332,12 +361,24 @@ class GradientDescentOptimizer(Optimizer):
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
+    def _exact_gradient(self):
+        """
+        Computes the gradient of the weighted fitness at the current
+        individual with the gradient function of the optimizee.
+        :return: the gradient, as a numpy array
+        """
+        gradients = np.asarray(self.optimizee_gradient_func(
+            self.current_individual[np.newaxis]))
+        gradients = gradients.reshape(len(self.optimizee_fitness_weights),
+                                      len(self.current_individual))
+        return np.dot(self.optimizee_fitness_weights, gradients)
+
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
-        best_last_indiv_dict = list_to_dict(
-            list(self.current_individual), self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(
+            self.current_individual)
 
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', self.current_fitness)
@@ -1,3 +1,4 @@
+import heapq
 import logging
 from collections import namedtuple
 
@@ -5,12 +6,15 @@ import numpy as np
 from l2l.utils.tools import cartesian_product
 
 from l2l import DictEntryType
-from l2l import dict_to_list
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
+from l2l.utils.individual import Population
 
 logger = logging.getLogger("optimizers.gridsearch")
 
-GridSearchParameters = namedtuple('GridSearchParameters', ['param_grid'])
+GridSearchParameters = namedtuple('GridSearchParameters',
+                                  ['param_grid', 'chunk_size', 'top_k', 'shard_index', 'n_shards'])
+GridSearchParameters.__new__.__defaults__ = (None, 1, 0, 1)
 GridSearchParameters.__doc__ = """
 :param dict param_grid: This is the data structure specifying the grid over which to search. This should be a
     dictionary as follows::
@@ -23,6 +27,22 @@ GridSearchParameters.__doc__ = """
     Note that there must be as many keys as there are in the `Individual-Dict` returned by the function
     :meth:`.Optimizee.create_individual`. Also, if any of the parameters of the individuals is an array, then the above
     grid specification applies to each element of the array.
+
+:param int chunk_size: If given, the grid is searched lazily: instead of expanding the whole grid into a single
+    generation, the grid points are enumerated from their index and evaluated in generations of at most `chunk_size`
+    individuals. Only the `top_k` best individuals are kept, and the individuals of a generation are dropped from the
+    trajectory once evaluated, so that the memory used does not depend on the size of the grid. For the same reason,
+    the result table of the trajectory is disabled, i.e. `traj.result_table` is set to None. By default (None), the
+    whole grid is evaluated in one generation
+
+:param int top_k: Number of best individuals kept in lazy mode (default 1). They are stored in the trajectory as the
+    result `top_k_individuals`, sorted from the best
+
+:param int shard_index: In lazy mode, index of the part of the grid searched by this optimizer, between 0 and
+    `n_shards - 1` (default 0). Running one optimizer per shard, e.g. in independent processes, covers the whole grid
+    and the best individuals of the shards can be combined with :meth:`.GridSearchOptimizer.merge_top_k`
+
+:param int n_shards: In lazy mode, number of contiguous parts the grid is split into (default 1)
 """
 
 
@@ -74,27 +94,13 @@ class GridSearchOptimizer(Optimizer):
 
         # Generate parameter dictionary based on optimizee_param_grid
         self.param_list = {}
-        _, optimizee_individual_param_spec = dict_to_list(sample_individual, get_dict_spec=True)
-        self.optimizee_individual_dict_spec = optimizee_individual_param_spec
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(sample_individual)
 
         optimizee_param_grid = parameters.param_grid
         # Assert validity of optimizee_param_grid
         assert set(sample_individual.keys()) == set(optimizee_param_grid.keys()), \
             "The Parameters of optimizee_param_grid don't match those of the optimizee individual"
 
-        for param_name, param_type, param_length in optimizee_individual_param_spec:
-            param_lower_bound, param_upper_bound, param_n_steps = optimizee_param_grid[param_name]
-            if param_type == DictEntryType.Scalar:
-                self.param_list[param_name] = np.linspace(param_lower_bound, param_upper_bound, param_n_steps)
-            elif param_type == DictEntryType.Sequence:
-                curr_param_list = np.linspace(param_lower_bound, param_upper_bound, param_n_steps)
-                curr_param_list = np.meshgrid(*([curr_param_list] * param_length), indexing='ij')
-                curr_param_list = [x.ravel() for x in curr_param_list]
-                curr_param_list = np.stack(curr_param_list, axis=-1)
-                self.param_list[param_name] = curr_param_list
-
-        self.param_list = cartesian_product(self.param_list, tuple(sorted(optimizee_param_grid.keys())))
-
         # Adding the bounds information to the trajectory
         traj.f_add_parameter_group('grid_spec')
         for param_name, param_grid_spec in optimizee_param_grid.items():
@@ -102,14 +108,31 @@ class GridSearchOptimizer(Optimizer):
             traj.f_add_parameter_to_group('grid_spec', param_name + '.upper_bound', param_grid_spec[1])
             traj.f_add_parameter_to_group('grid_spec', param_name + '.step', param_grid_spec[2])
 
-        # Expanding the trajectory
-        self.param_list = {('individual.' + key): value for key, value in self.param_list.items()}
-        k0 = list(self.param_list.keys())[0]
-        self.param_list['generation'] = [0]
-        self.param_list['ind_idx'] = np.arange(len(self.param_list[k0]))
+        self.chunk_size = parameters.chunk_size
+        if self.chunk_size is None:
+            for param_name, param_type, param_length in self.optimizee_individual_dict_spec:
+                param_lower_bound, param_upper_bound, param_n_steps = optimizee_param_grid[param_name]
+                if param_type == DictEntryType.Scalar:
+                    self.param_list[param_name] = np.linspace(param_lower_bound, param_upper_bound, param_n_steps)
+                elif param_type == DictEntryType.Sequence:
+                    curr_param_list = np.linspace(param_lower_bound, param_upper_bound, param_n_steps)
+                    curr_param_list = np.meshgrid(*([curr_param_list] * param_length), indexing='ij')
+                    curr_param_list = [x.ravel() for x in curr_param_list]
+                    curr_param_list = np.stack(curr_param_list, axis=-1)
+                    self.param_list[param_name] = curr_param_list
+
+            self.param_list = cartesian_product(self.param_list, tuple(sorted(optimizee_param_grid.keys())))
+            # Expanding the trajectory
+            self.param_list = {('individual.' + key): value for key, value in self.param_list.items()}
+            k0 = list(self.param_list.keys())[0]
+            self.param_list['generation'] = [0]
+            self.param_list['ind_idx'] = np.arange(len(self.param_list[k0]))
+
+            traj.f_expand(self.param_list)
+            traj.par['n_iteration'] = 1
+        else:
+            self._init_lazy_grid(traj, parameters)
 
-        traj.f_expand(self.param_list)
-        traj.par['n_iteration'] = 1
         #: The current generation number
         self.g = 0
         #: The population (i.e. list of individuals) to be evaluated at the next iteration
@@ -118,13 +141,159 @@ class GridSearchOptimizer(Optimizer):
         self.current_fitness = -np.Inf
         self.traj = traj
 
+        if self.chunk_size is not None:
+            self._expand_grid_chunk(traj)
         # self._expand_trajectory(traj)
 
+    def _init_lazy_grid(self, traj, parameters):
+        """
+        Prepares the lazy enumeration of the grid. Every element of a parameter is an axis of the grid, and the grid
+        points are numbered in the same order as in the full expansion, i.e. the parameters sorted by name and the
+        last axis varying fastest, so that a grid point can be computed from its index with :func:`numpy.unravel_index`
+        """
+        assert self.chunk_size > 0, "chunk_size must be positive"
+        assert parameters.top_k > 0, "top_k must be positive"
+        assert 0 <= parameters.shard_index < parameters.n_shards, "shard_index must be in [0, n_shards)"
+
+        #: The points of each parameter, in the order of the dict spec
+        self.grid_points = []
+        grid_shape = []
+        for param_name, _, param_length in self.optimizee_individual_dict_spec:
+            param_lower_bound, param_upper_bound, param_n_steps = parameters.param_grid[param_name]
+            self.grid_points.append(np.linspace(param_lower_bound, param_upper_bound, param_n_steps))
+            grid_shape.extend([param_n_steps] * param_length)
+        self.grid_shape = tuple(grid_shape)
+        grid_size = 1
+        for n_steps in self.grid_shape:
+            grid_size *= int(n_steps)
+
+        # Each shard is a contiguous range of grid indices
+        self.shard_start = grid_size * parameters.shard_index // parameters.n_shards
+        self.shard_stop = grid_size * (parameters.shard_index + 1) // parameters.n_shards
+        self.top_k = parameters.top_k
+        #: Min-heap of the best (weighted_fitness, -grid_index, fitness) found so far
+        self.top_individuals = []
+
+        traj.f_add_parameter('chunk_size', self.chunk_size, comment='Number of grid points per generation')
+        traj.f_add_parameter('top_k', self.top_k, comment='Number of best individuals kept')
+        traj.f_add_parameter('shard_index', parameters.shard_index, comment='Index of the searched part of the grid')
+        traj.f_add_parameter('n_shards', parameters.n_shards, comment='Number of parts the grid is split into')
+        traj.par['n_iteration'] = -(-(self.shard_stop - self.shard_start) // self.chunk_size)
+        if traj.result_table is not None:
+            # The table would keep one row per grid point
+            logger.info('Disabling the result table of the trajectory in lazy mode')
+            traj.result_table = None
+        logger.info('Searching grid points %d to %d of %d in %d generations', self.shard_start, self.shard_stop,
+                    grid_size, traj.par['n_iteration'])
+
+    def _expand_grid_chunk(self, traj):
+        """
+        Adds the grid points of the current generation to the trajectory. They are computed from their indices and
+        stored directly in a :class:`~l2l.utils.individual.Population`
+        """
+        start = self.shard_start + self.g * self.chunk_size
+        stop = min(start + self.chunk_size, self.shard_stop)
+        if start >= stop:
+            return
+        positions = np.unravel_index(np.arange(start, stop), self.grid_shape)
+        spec = self.optimizee_individual_dict_spec
+        columns = []
+        shapes = []
+        for points, key_slice, is_sequence in zip(self.grid_points, spec.slices, spec.is_sequence):
+            columns.extend(points[axis_positions] for axis_positions in positions[key_slice])
+            shapes.append((key_slice.stop - key_slice.start,) if is_sequence else ())
+        names = ['individual.' + name for name in spec.names]
+        traj.f_add_population(Population(self.g, np.arange(stop - start), names, shapes, np.column_stack(columns)))
+
+    def grid_individual(self, grid_index):
+        """
+        Computes the individual at a given index of the grid, in lazy mode
+
+        :param int grid_index: Index of the grid point
+
+        :return: The Individual-Dict of the grid point
+        """
+        positions = np.unravel_index(grid_index, self.grid_shape)
+        spec = self.optimizee_individual_dict_spec
+        individual = {}
+        for name, points, key_slice, is_sequence in zip(spec.names, self.grid_points, spec.slices,
+                                                         spec.is_sequence):
+            if is_sequence:
+                individual[name] = points[list(positions[key_slice])]
+            else:
+                individual[name] = points[positions[key_slice.start]]
+        return individual
+
+    @staticmethod
+    def merge_top_k(top_k_lists, top_k):
+        """
+        Combines the best individuals found by several lazy grid searches, e.g. one per shard of the grid
+
+        :param list top_k_lists: The `top_k_individuals` results of the searches
+        :param int top_k: The number of individuals to keep
+
+        :return: The `top_k` best individuals of all the lists, in the same format as the `top_k_individuals` result
+        """
+        entries = [entry for top_k_list in top_k_lists for entry in top_k_list]
+        entries.sort(key=lambda entry: (-entry['weighted_fitness'], entry['grid_index']))
+        return entries[:top_k]
+
+    def _sorted_top_k(self):
+        """
+        Returns the best individuals found so far, from the best
+        """
+        return [{'grid_index': -negative_index,
+                 'individual': self.grid_individual(-negative_index),
+                 'fitness': fitness,
+                 'weighted_fitness': weighted_fitness}
+                for weighted_fitness, negative_index, fitness in sorted(self.top_individuals, reverse=True)]
+
+    def _post_process_chunk(self, traj, fitnesses_results):
+        """
+        Lazy mode counterpart of :meth:`post_process`. It merges the fitnesses of the generation into the running
+        top-k, drops the generation from the trajectory and expands the next chunk of the grid
+        """
+        chunk_start = self.shard_start + self.g * self.chunk_size
+        run_idx_array = np.array([x[0] for x in fitnesses_results])
+        fitness_array = np.array([x[1] for x in fitnesses_results])
+        optimizee_fitness_weights = np.reshape(np.array(self.optimizee_fitness_weights), (-1, 1))
+        weighted_fitness_array = np.matmul(fitness_array, optimizee_fitness_weights).ravel()
+
+        # Only the best top_k of the generation can enter the running top-k
+        n_best = min(self.top_k, len(weighted_fitness_array))
+        for i in np.argpartition(-weighted_fitness_array, n_best - 1)[:n_best]:
+            # On equal fitness, the lower grid index is kept
+            entry = (float(weighted_fitness_array[i]), -(chunk_start + int(run_idx_array[i])),
+                     tuple(fitness_array[i]))
+            if len(self.top_individuals) < self.top_k:
+                heapq.heappush(self.top_individuals, entry)
+            elif entry > self.top_individuals[0]:
+                heapq.heapreplace(self.top_individuals, entry)
+
+        best_weighted_fitness, best_negative_index, best_fitness = max(self.top_individuals)
+        self.best_individual = self.grid_individual(-best_negative_index)
+        self.best_fitness = np.array(best_fitness)
+        logger.info('-- End of generation %d of %d --', self.g, traj.n_iteration)
+        logger.info('  Best weighted fitness in generation: %s', np.max(weighted_fitness_array))
+        logger.info('  Best weighted fitness so far: %s at grid index %d', best_weighted_fitness,
+                    -best_negative_index)
+
+        # The evaluated grid points are not kept
+        del traj.individuals[self.g]
+        fitnesses_results.clear()
+        self.g += 1
+        self._expand_grid_chunk(traj)
+
     def post_process(self, traj, fitnesses_results):
         """
         In this optimizer, the post_proces function merely returns the best individual out of the grid and
-        does not expand the trajectory. It also stores any relevant results
+        does not expand the trajectory. It also stores any relevant results. In lazy mode, see
+        :meth:`._post_process_chunk`
         """
+        if self.chunk_size is not None:
+            self._post_process_chunk(traj, fitnesses_results)
+            return
+
         logger.info('Finished Simulation')
         logger.info('-------------------')
         logger.info('')
@@ -165,10 +334,21 @@ class GridSearchOptimizer(Optimizer):
         self.g += 1
         traj.v_idx = -1
 
+    def save_state(self):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.save_state`. The trajectory is left out, as it is restored
+        by the environment
+        """
+        state = super().save_state()
+        state['attributes'].pop('traj', None)
+        return state
+
     def end(self, traj):
         """
         Run any code required to clean-up, print final individuals etc.
         """
+        if self.chunk_size is not None:
+            traj.f_add_result('top_k_individuals', self._sorted_top_k())
         traj.f_add_result('final_individual', self.best_individual)
         traj.f_add_result('final_fitness', self.best_fitness)
         traj.f_add_result('n_iteration', self.g)
@@ -3,7 +3,7 @@ from collections import namedtuple
 
 import numpy as np
 
-from l2l import dict_to_list, list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.naturalevolutionstrategies")
@@ -147,8 +147,9 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
 
         self.random_state = np.random.RandomState(traj.parameters.seed)
 
-        self.current_individual_arr, self.optimizee_individual_dict_spec = dict_to_list(
-            self.optimizee_create_individual(), get_dict_spec=True)
+        individual = self.optimizee_create_individual()
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(individual)
+        self.current_individual_arr = self.optimizee_individual_dict_spec.encode(individual)
 
         traj.f_add_derived_parameter(
             'dimension',
@@ -173,15 +174,15 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
 
         # Generate initial distribution
         self.current_perturbations = self._get_perturbations(traj)
-        current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
+        current_eval_pop_arr = self.mu + self.sigma * self.current_perturbations
 
-        self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
+        self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(current_eval_pop_arr)
 
         # Bounding function has to be applied AFTER the individual has been converted to a dict
         if optimizee_bounding_func is not None:
             self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
 
-        self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+        self.eval_pop_arr = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
 
         self._expand_trajectory(traj)
 
@@ -288,8 +289,12 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         # **************************************************************************************************************
         # Update the parameters of the search distribution using the natural gradient in natural coordinates
         # **************************************************************************************************************
-        self.mu += traj.learning_rate_mu * traj.sigma * np.dot(fitnesses_to_fit, sorted_perturbations)
+        self.mu += traj.learning_rate_mu * self.sigma * np.dot(fitnesses_to_fit, sorted_perturbations)
         self.sigma *= np.exp(traj.learning_rate_sigma / 2. * np.dot(fitnesses_to_fit, sorted_perturbations ** 2 - 1.))
+        # The trajectory parameters only share the arrays of the optimizer until a state is restored, so they are set
+        # again
+        traj.par['mu'] = self.mu
+        traj.par['sigma'] = self.sigma
 
         # **************************************************************************************************************
         # Create the next generation by sampling the inferred distribution
@@ -301,15 +306,15 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         # check if to stop
         if self.g < n_iteration - 1 and self.best_fitness_in_run < stop_criterion:
             self.current_perturbations = self._get_perturbations(traj)
-            current_eval_pop_arr = (self.mu + self.sigma * self.current_perturbations).tolist()
+            current_eval_pop_arr = self.mu + self.sigma * self.current_perturbations
 
-            self.eval_pop = [list_to_dict(ind, self.optimizee_individual_dict_spec) for ind in current_eval_pop_arr]
+            self.eval_pop = self.optimizee_individual_dict_spec.decode_batch(current_eval_pop_arr)
 
             # Bounding function has to be applied AFTER the individual has been converted to a dict
             if self.optimizee_bounding_func is not None:
                 self.eval_pop = [self.optimizee_bounding_func(ind) for ind in self.eval_pop]
 
-            self.eval_pop_arr = np.array([dict_to_list(ind) for ind in self.eval_pop])
+            self.eval_pop_arr = self.optimizee_individual_dict_spec.encode_batch(self.eval_pop)
 
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
@@ -325,7 +330,7 @@ class NaturalEvolutionStrategiesOptimizer(Optimizer):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
         """
-        best_last_indiv_dict = list_to_dict(self.best_individual_in_run.tolist(), self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(self.best_individual_in_run.tolist())
 
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', self.best_fitness_in_run)
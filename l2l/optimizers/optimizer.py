@@ -1,5 +1,9 @@
+import random
 from collections import namedtuple
 
+import numpy as np
+
+from l2l.utils.individual import Population
 from l2l.utils.tools import cartesian_product
 
 from l2l import get_grouped_dict
@@ -69,6 +73,59 @@ class Optimizer:
         self.g += 1
         self._expand_trajectory(traj)
 
+    def ask(self, traj):
+        """
+        Incremental counterpart of :meth:`.post_process` used by the asynchronous evaluation mode of the
+        :class:`~l2l.utils.environment.Environment` (see :meth:`~l2l.utils.environment.Environment.run_async`).
+        It returns the next individual that should be evaluated, without waiting for the evaluation of the other
+        individuals to finish.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that contains the parameters of the optimizer
+
+        :return: An Individual-Dict to be evaluated, or None if the optimizer has no new candidate at the moment,
+            either because it waits for pending evaluations or because the optimization is finished
+        """
+        raise NotImplementedError()
+
+    def tell(self, traj, individual, fitness):
+        """
+        Reports the fitness of an individual previously returned by :meth:`.ask`. Implementations update their
+        internal state, and :attr:`.Optimizer.g` once a generation worth of evaluations has been told.
+
+        :param  ~l2l.utils.trajectory.Trajectory traj: The trajectory that contains the parameters of the optimizer
+
+        :param dict individual: The Individual-Dict object returned by :meth:`.ask`
+
+        :param tuple fitness: The fitness returned by the optimizee for this individual
+        """
+        raise NotImplementedError()
+
+    def save_state(self):
+        """
+        Returns everything needed to continue the optimization from the current point in a new process, e.g. after an
+        interruption (see :meth:`~l2l.utils.environment.Environment.resume`). By default, this is made of all the
+        attributes of the optimizer which are not callables, which includes its own random number generators, and the
+        state of the global `random` and `numpy.random` generators, used by some optimizers. Optimizers holding
+        attributes which can not be pickled or are rebuilt in `__init__` should override this method.
+
+        :return: A picklable dictionary with the state of the optimizer
+        """
+        attributes = {key: val for key, val in self.__dict__.items() if not callable(val)}
+        return {'attributes': attributes,
+                'random_state': random.getstate(),
+                'np_random_state': np.random.get_state()}
+
+    def restore_state(self, state):
+        """
+        Restores a state returned by :meth:`.save_state` into an optimizer created with the same parameters, so that
+        the next call to :meth:`.post_process` produces the same individuals as in the original run.
+
+        :param dict state: The state returned by :meth:`.save_state`
+        """
+        self.__dict__.update(state['attributes'])
+        random.setstate(state['random_state'])
+        np.random.set_state(state['np_random_state'])
+
     def end(self, traj):
         """
         Run any code required to clean-up, print final individuals etc.
@@ -92,6 +149,12 @@ class Optimizer:
         :return:
         """
 
+        # Populations of float parameters are stacked into an array directly, without the cartesian product below
+        population = Population.from_dicts(self.g, self.eval_pop, prefix='individual.')
+        if population is not None:
+            traj.f_add_population(population)
+            return
+
         grouped_params_dict = get_grouped_dict(self.eval_pop)
         grouped_params_dict = {'individual.' + key: val for key, val in grouped_params_dict.items()}
 
@@ -7,8 +7,7 @@ import numpy as np
 from enum import Enum
 
 from l2l.optimizers.optimizer import Optimizer
-from l2l import dict_to_list
-from l2l import list_to_dict
+from l2l import DictSpec
 
 logger = logging.getLogger("optimizers.paralleltempering")
 
@@ -27,7 +26,8 @@ ParallelTemperingParameters.__doc__ = """
     and the second entry is the ending temperature
 """
 
-AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE')
+AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE',
+                                 qualname='AvailableCoolingSchedules')
 
 """
 
@@ -190,12 +190,12 @@ class ParallelTemperingOptimizer(Optimizer):
         traj.f_add_parameter('cooling_schedules', cooling_schedules_string,
                              comment='The used cooling schedule')
 
-        _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(self.optimizee_create_individual())
 
         # Note that this array stores individuals as an np.array of floats as opposed to Individual-Dicts
         # This is because this array is used within the context of the simulated annealing algorithm and
         # Thus needs to handle the optimizee individuals as vectors
-        self.current_individual_list = [np.array(dict_to_list(self.optimizee_create_individual()))
+        self.current_individual_list = [self.optimizee_individual_dict_spec.encode(self.optimizee_create_individual())
                                         for _ in range(parameters.n_parallel_runs)]
 
         traj.f_add_result('fitnesses', [], comment='Fitnesses of all individuals')
@@ -209,11 +209,10 @@ class ParallelTemperingOptimizer(Optimizer):
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
         self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
 
-        new_individual_list = [
-            list_to_dict(ind_as_list + np.random.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step,
-                         self.optimizee_individual_dict_spec)
+        new_individual_list = self.optimizee_individual_dict_spec.decode_batch(np.array([
+            ind_as_list + np.random.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step
             for ind_as_list in self.current_individual_list
-        ]
+        ]))
         if optimizee_bounding_func is not None:
             new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
 
@@ -318,15 +317,15 @@ class ParallelTemperingOptimizer(Optimizer):
             # Accept
             if r < p or weighted_fitness >= current_fitness_value_i:
                 self.current_fitness_value_list[i] = weighted_fitness
-                self.current_individual_list[i] = np.array(dict_to_list(individual))
+                self.current_individual_list[i] = self.optimizee_individual_dict_spec.encode(individual)
 
             traj.f_add_result('$set.$.individual', individual)
             # Watchout! if weighted fitness is a tuple/np array it should be converted to a list first here
             traj.f_add_result('$set.$.fitness', weighted_fitness)
 
             current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(current_individual + np.random.randn(current_individual.size) * noisy_step * self.T,
-                                          self.optimizee_individual_dict_spec)
+            new_individual = self.optimizee_individual_dict_spec.decode(
+                current_individual + np.random.randn(current_individual.size) * noisy_step * self.T)
             if self.optimizee_bounding_func is not None:
                 new_individual = self.optimizee_bounding_func(new_individual)
 
@@ -364,7 +363,15 @@ class ParallelTemperingOptimizer(Optimizer):
             fitnesses_results.clear()
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
-        
+
+    def restore_state(self, state):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.restore_state`. The current temperatures are a view on the
+        first column of the temperature bounds, which the cooling schedules read, and which is lost when pickling
+        """
+        super().restore_state(state)
+        self.T_all = self.temperature_bounds[:, 0]
+
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
@@ -374,7 +381,7 @@ class ParallelTemperingOptimizer(Optimizer):
         best_last_indiv = self.current_individual_list[best_last_indiv_index]
         best_last_fitness = self.current_fitness_value_list[best_last_indiv_index]
 
-        best_last_indiv_dict = list_to_dict(best_last_indiv.tolist(), self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(best_last_indiv)
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', best_last_fitness)
         traj.f_add_result('n_iteration', self.g + 1)
@@ -4,8 +4,7 @@ from collections import namedtuple
 import numpy as np
 from enum import Enum
 
-from l2l import dict_to_list
-from l2l import list_to_dict
+from l2l import DictSpec
 from l2l.optimizers.optimizer import Optimizer
 
 logger = logging.getLogger("optimizers.simulatedannealing")
@@ -23,7 +22,8 @@ SimulatedAnnealingParameters.__doc__ = """
 
 """
 
-AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE')
+AvailableCoolingSchedules = Enum('Schedule', 'DEFAULT LOGARITHMIC EXPONENTIAL LINEAR_MULTIPLICATIVE QUADRATIC_MULTIPLICATIVE LINEAR_ADDAPTIVE QUADRATIC_ADDAPTIVE EXPONENTIAL_ADDAPTIVE TRIGONOMETRIC_ADDAPTIVE',
+                                 qualname='AvailableCoolingSchedules')
 
 """
 Multiplicative Monotonic Cooling
@@ -136,12 +136,12 @@ class SimulatedAnnealingOptimizer(Optimizer):
         traj.f_add_parameter('stop_criterion', parameters.stop_criterion, comment='Stopping criterion parameter')
         traj.f_add_parameter('seed', np.uint32(parameters.seed), comment='Seed for RNG')
 
-        _, self.optimizee_individual_dict_spec = dict_to_list(self.optimizee_create_individual(), get_dict_spec=True)
+        self.optimizee_individual_dict_spec = DictSpec.from_dict(self.optimizee_create_individual())
 
         # Note that this array stores individuals as an np.array of floats as opposed to Individual-Dicts
         # This is because this array is used within the context of the simulated annealing algorithm and
         # Thus needs to handle the optimizee individuals as vectors
-        self.current_individual_list = [np.array(dict_to_list(self.optimizee_create_individual()))
+        self.current_individual_list = [self.optimizee_individual_dict_spec.encode(self.optimizee_create_individual())
                                         for _ in range(parameters.n_parallel_runs)]
         self.random_state = np.random.RandomState(parameters.seed)
 
@@ -152,17 +152,20 @@ class SimulatedAnnealingOptimizer(Optimizer):
         # Keep track of current fitness value to decide whether we want the next individual to be accepted or not
         self.current_fitness_value_list = [-np.Inf] * parameters.n_parallel_runs
 
-        new_individual_list = [
-            list_to_dict(
-                ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
+        new_individual_list = self.optimizee_individual_dict_spec.decode_batch(np.array([
+            ind_as_list + self.random_state.normal(0.0, parameters.noisy_step, ind_as_list.size) * traj.noisy_step * self.T
             for ind_as_list in self.current_individual_list
-        ]
+        ]))
         if optimizee_bounding_func is not None:
             new_individual_list = [self.optimizee_bounding_func(ind) for ind in new_individual_list]
 
         self.eval_pop = new_individual_list
         self._expand_trajectory(traj)
+
+        # Bookkeeping of the asynchronous (ask/tell) mode
+        self.n_asked = 0
+        self.n_told = 0
+        self.async_pending = {}
         
         self.cooling_schedule = parameters.cooling_schedule
 
@@ -217,41 +220,24 @@ class SimulatedAnnealingOptimizer(Optimizer):
 
         assert len(fitnesses_results) == traj.n_parallel_runs
         weighted_fitness_list = []
+        # We need to convert the current run indices into ind_idx
+        # (index of individual within one generation)
+        ind_indices = traj.run_index_to_ind_idx()
         for i, (run_index, fitness) in enumerate(fitnesses_results):
 
             weighted_fitness = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
             weighted_fitness_list.append(weighted_fitness)
 
-            # We need to convert the current run index into an ind_idx
-            # (index of individual within one generation)
+            # The run index is still needed by the $set.$ paths of the results added below
             traj.v_idx = run_index
-            ind_index = traj.par.ind_idx
+            ind_index = ind_indices[run_index]
             individual = old_eval_pop[ind_index]
 
-            # Accept or reject the new solution
-            current_fitness_value_i = self.current_fitness_value_list[i]
-            r = self.random_state.rand()
-            p = np.exp((weighted_fitness - current_fitness_value_i) / self.T)
-            
-            # Accept
-            if r < p or weighted_fitness >= current_fitness_value_i:
-                self.current_fitness_value_list[i] = weighted_fitness
-                self.current_individual_list[i] = np.array(dict_to_list(individual))
-
             traj.f_add_result('$set.$.individual', individual)
             # Watchout! if weighted fitness is a tuple/np array it should be converted to a list first here
             traj.f_add_result('$set.$.fitness', weighted_fitness)
 
-            current_individual = self.current_individual_list[i]
-            new_individual = list_to_dict(
-                current_individual + self.random_state.randn(current_individual.size) * noisy_step * self.T,
-                self.optimizee_individual_dict_spec)
-            if self.optimizee_bounding_func is not None:
-                new_individual = self.optimizee_bounding_func(new_individual)
-
-            logger.debug("Current best fitness for individual %d is %.2f. New individual is %s",
-                         i, self.current_fitness_value_list[i], new_individual)
-            self.eval_pop.append(new_individual)
+            self.eval_pop.append(self._anneal_step(i, individual, weighted_fitness, noisy_step))
 
         logger.debug("Current best fitness within population is %.2f", max(self.current_fitness_value_list))
 
@@ -265,6 +251,74 @@ class SimulatedAnnealingOptimizer(Optimizer):
             self.g += 1  # Update generation counter
             self._expand_trajectory(traj)
 
+    def _anneal_step(self, i, individual, weighted_fitness, noisy_step):
+        """
+        Accepts or rejects the evaluated individual of the annealing run `i` and creates the next individual of the
+        run by taking a random step from its current solution.
+
+        :param i: Index of the annealing run
+        :param individual: The evaluated Individual-Dict
+        :param weighted_fitness: The weighted fitness of `individual`
+        :param noisy_step: Size of the random step
+        :return: The next Individual-Dict to be evaluated for this run
+        """
+        # Accept or reject the new solution
+        current_fitness_value_i = self.current_fitness_value_list[i]
+        r = self.random_state.rand()
+        p = np.exp((weighted_fitness - current_fitness_value_i) / self.T)
+
+        # Accept
+        if r < p or weighted_fitness >= current_fitness_value_i:
+            self.current_fitness_value_list[i] = weighted_fitness
+            self.current_individual_list[i] = self.optimizee_individual_dict_spec.encode(individual)
+
+        current_individual = self.current_individual_list[i]
+        new_individual = self.optimizee_individual_dict_spec.decode(
+            current_individual + self.random_state.randn(current_individual.size) * noisy_step * self.T)
+        if self.optimizee_bounding_func is not None:
+            new_individual = self.optimizee_bounding_func(new_individual)
+
+        logger.debug("Current best fitness for individual %d is %.2f. New individual is %s",
+                     i, self.current_fitness_value_list[i], new_individual)
+        return new_individual
+
+    def ask(self, traj):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.ask`
+
+        Each of the parallel annealing runs has at most one individual under evaluation. The individual of an idle
+        run is returned, or None if all the runs are busy or the optimization is finished.
+        """
+        if self.n_asked >= traj.n_iteration * traj.n_parallel_runs or \
+                traj.stop_criterion <= max(self.current_fitness_value_list):
+            return None
+        busy_runs = set(self.async_pending.values())
+        for i, individual in enumerate(self.eval_pop):
+            if i not in busy_runs:
+                self.async_pending[id(individual)] = i
+                self.n_asked += 1
+                return individual
+        return None
+
+    def tell(self, traj, individual, fitness):
+        """
+        See :meth:`~l2l.optimizers.optimizer.Optimizer.tell`
+
+        The annealing run the individual belongs to takes its step right away. As in post_process, the temperature
+        is cooled before the first step of each block of `n_parallel_runs` evaluations.
+        """
+        i = self.async_pending.pop(id(individual))
+        weighted_fitness = sum(f * w for f, w in zip(fitness, self.optimizee_fitness_weights))
+        if self.n_told % traj.n_parallel_runs == 0:
+            self.T = self.cooling(self.T, self.cooling_schedule, traj.temp_decay, 0, traj.n_iteration)
+        self.eval_pop[i] = self._anneal_step(i, individual, weighted_fitness, traj.noisy_step)
+
+        self.n_told += 1
+        # As in post_process, the generation counter is not advanced after the last generation
+        if self.n_told % traj.n_parallel_runs == 0 and self.n_told < traj.n_iteration * traj.n_parallel_runs:
+            logger.info("-- End of generation {} --".format(self.g))
+            self.g += 1
+
     def end(self, traj):
         """
         See :meth:`~l2l.optimizers.optimizer.Optimizer.end`
@@ -274,7 +328,7 @@ class SimulatedAnnealingOptimizer(Optimizer):
         best_last_indiv = self.current_individual_list[best_last_indiv_index]
         best_last_fitness = self.current_fitness_value_list[best_last_indiv_index]
 
-        best_last_indiv_dict = list_to_dict(best_last_indiv.tolist(), self.optimizee_individual_dict_spec)
+        best_last_indiv_dict = self.optimizee_individual_dict_spec.decode(best_last_indiv)
         traj.f_add_result('final_individual', best_last_indiv_dict)
         traj.f_add_result('final_fitness', best_last_fitness)
         traj.f_add_result('n_iteration', self.g + 1)
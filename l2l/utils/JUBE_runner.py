@@ -1,9 +1,12 @@
 from jube2.main import main
 import os.path
 import pickle
-import time
 import logging
 
+from l2l.utils.dispatch import write_individuals, write_static_trajectory
+from l2l.utils.file_watcher import wait_for_files
+from l2l.utils.results_store import read_results
+
 logger = logging.getLogger("JUBERunner")
 
 
@@ -53,6 +56,10 @@ class JUBERunner(object):
         if 'scheduler' in args.keys():
             self.scheduler = args.get('scheduler'),
 
+        # If given, the files handed to the optimizee runs are compressed
+        # with this codec (see l2l.utils.compression)
+        self.compression = args.get('compression', None)
+        self.compression_level = args.get('compression_level', None)
         self.executor = args['exec']
         self.filename = ""
         self.path = args['work_path']
@@ -69,6 +76,10 @@ class JUBERunner(object):
             os.makedirs(self.work_paths[d], exist_ok=True)
 
         self.zeepath = os.path.join(self.path, "optimizee.bin")
+        # The parameters of the trajectory are shared by all the individuals
+        # and generations
+        self.static_trajectory_path = os.path.join(
+            self.work_paths["trajectories"], "trajectory_static.bin")
 
     def write_pop_for_jube(self, trajectory, generation):
         """
@@ -206,19 +217,23 @@ class JUBERunner(object):
     def collect_results_from_run(self, generation, individuals):
         """
         Collects the results generated by each individual in the generation.
-        Results are, for the moment, stored in individual binary files.
+        Results are stored in a single results file per generation, which is
+        read at once.
         :param generation: generation id
         :param individuals: list of individuals which were executed in this
                             generation
         :return results: a list containing objects produced as results of
                          the execution of each individual
         """
+        resfname = "results_%s.bin" % generation
+        generation_results = read_results(
+            os.path.join(self.work_paths["results"], resfname))
         results = []
         for ind in individuals:
-            indfname = "results_%s_%s.bin" % (ind.ind_idx, generation)
-            indpath = os.path.join(self.work_paths["results"], indfname)
-            with open(indpath, "rb") as handle:
-                results.append((ind.ind_idx, pickle.load(handle)))
+            if ind.ind_idx not in generation_results:
+                raise Exception("Result of individual %d of generation %d "
+                                "not found" % (ind.ind_idx, generation))
+            results.append((ind.ind_idx, generation_results[ind.ind_idx]))
 
         return results
 
@@ -240,13 +255,16 @@ class JUBERunner(object):
                                   "ready_%d_" % generation)
         self.prepare_run_file(path_ready)
 
-        # Dump all trajectories for each optimizee run in the generation
-        for ind in self.trajectory.individuals[generation]:
-            trajectory.individual = ind
-            trajfname = "trajectory_%s_%s.bin" % (ind.ind_idx, generation)
-            trajpath = os.path.join(self.work_paths["trajectories"], trajfname)
-            with open(trajpath, "wb") as handle:
-                pickle.dump(trajectory, handle, pickle.HIGHEST_PROTOCOL)
+        # Dump the parameters, if they changed, and the individuals of the
+        # generation. Each optimizee run rebuilds its trajectory from them
+        write_static_trajectory(trajectory, self.static_trajectory_path,
+                                self.compression, self.compression_level)
+        individuals = self.trajectory.individuals[generation]
+        indfname = "individuals_%s.bin" % generation
+        write_individuals(
+            individuals, os.path.join(self.work_paths["trajectories"], indfname),
+            self.compression, self.compression_level)
+        for ind in individuals:
             ready_files.append(path_ready + str(ind.ind_idx))
 
         # Call the main function from JUBE
@@ -254,8 +272,7 @@ class JUBERunner(object):
         main(args)
 
         # Wait for ready files to be written
-        while not self.is_done(ready_files):
-            time.sleep(10)
+        wait_for_files(ready_files)
 
         # Touch done generation
         logger.info("JUBE finished generation: " + str(self.generation))
@@ -276,49 +293,46 @@ class JUBERunner(object):
         :param files: list of ready files to check
         :return true if all files are present, false otherwise
         """
-        done = True
-        for f in files:
-            if not os.path.isfile(f):  # self.scheduler_config['ready_file']
-                done = False
-        return done
+        return all(os.path.isfile(f) for f in files)
 
     def prepare_run_file(self, path_ready):
         """
         Writes a python run file which takes care of loading the optimizee
-        from a binary file, the trajectory object of each individual. Then
-        executes the 'simulate' function of the optimizee using the trajectory
-        and writes the results in a binary file.
+        from a binary file and rebuilding the trajectory of each individual
+        from the static trajectory and individuals files. Then executes the
+        'simulate' function of the optimizee using the trajectory and appends
+        the results to the results file of the generation.
         :param path_ready: path to store the ready files
         :return true if all files are present, false otherwise
         """
-        trajpath = os.path.join(
+        indpath = os.path.join(
             self.work_paths["trajectories"],
-            'trajectory_" + str(idx) + "_" + str(iteration) + ".bin')
+            'individuals_" + str(iteration) + ".bin')
         respath = os.path.join(
             self.work_paths['results'],
-            'results_" + str(idx) + "_" + str(iteration) + ".bin')
+            'results_" + str(iteration) + ".bin')
         zee_path = os.path.join(
             self.work_paths["run_files"], "run_optimizee.py")
         with open(zee_path, "w") as f:
             zstr = (
                 'import pickle\n'
                 'import sys\n'
+                'from l2l.utils.dispatch import load_trajectory\n'
+                'from l2l.utils.results_store import append_result\n'
                 'idx = sys.argv[1]\n'
                 'iteration = sys.argv[2]\n'
-                'handle_trajectory = open("{}", "rb")\n'
-                'trajectory = pickle.load(handle_trajectory)\n'
-                'handle_trajectory.close()\n'
+                'trajectory = load_trajectory("{}", "{}", int(idx), '
+                'int(iteration))\n'
                 'handle_optimizee = open("{}", "rb")\n'
                 'optimizee = pickle.load(handle_optimizee)\n'
                 'handle_optimizee.close()\n\n'
                 'res = optimizee.simulate(trajectory)\n\n'
-                'handle_res = open("{}", "wb")\n' +
-                'pickle.dump(res, handle_res, pickle.HIGHEST_PROTOCOL)\n' +
-                'handle_res.close()\n\n' +
+                'append_result("{}", int(idx), res)\n\n' +
                 'handle_res = open("{}" + str(idx), "wb")\n' +
                 'handle_res.close()')
             f.write(
-                zstr.format(trajpath, self.zeepath, respath, path_ready)
+                zstr.format(self.static_trajectory_path, indpath,
+                            self.zeepath, respath, path_ready)
             )
 
 
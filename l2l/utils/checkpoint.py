@@ -0,0 +1,276 @@
+import logging
+import os
+import pickle
+import struct
+
+from l2l.utils import compression
+from l2l.utils.groups import ResultGroup
+
+logger = logging.getLogger("utils.checkpoint")
+
+# Every record is preceded by the size of its pickle. The size is written
+# once the record is complete, so that a record whose write was interrupted
+# has the size 0
+_RECORD_SIZE = struct.Struct('<Q')
+
+
+def _parameters_of(trajectory):
+    """
+    Returns the parameters of the trajectory as a plain dictionary, without
+    the reference of the parameter dictionary to its trajectory.
+    """
+    return {key: val for key, val in trajectory.par._data.items()
+            if key != 'trajectory'}
+
+
+class CheckpointWriter(object):
+    """
+    CheckpointWriter stores a trajectory incrementally in an append-only log.
+    The first record holds the parameters of the trajectory and the first
+    individuals to evaluate. Afterwards, each generation appends a record
+    holding only what changed in it: the results of the generation and their
+    rows of the result table, the new entries of the result groups (e.g.
+    generation_params), the individuals of the next generation and, if they
+    changed, the parameters and the results added to the trajectory by the
+    optimizer. The cost of storing a generation does therefore not grow with
+    the length of the run. The trajectory, or any prefix of it, can be
+    rebuilt with :func:`load_checkpoint`.
+    """
+
+    def __init__(self, path, codec=None, level=None):
+        """
+        :param path: path of the checkpoint log. Writing the header replaces
+                     an existing log, e.g. of an earlier run in the same
+                     directory, while the generations are appended to it
+        :param codec: If given, each record is compressed with this codec of
+                      :mod:`l2l.utils.compression`
+        :param level: compression level, the default of the codec if None
+        """
+        self.path = path
+        self.codec = codec
+        self.level = level
+        self._written_keys = {}
+        self._last_root_results = {}
+        self._last_parameters = None
+        self._last_trajectory_results = None
+
+    def write_header(self, trajectory, generation):
+        """
+        Writes the first record of the log, which holds the parameters of the
+        trajectory and the individuals of the first generation. An existing
+        log at the same path is truncated.
+        :param trajectory: the trajectory to store
+        :param generation: id of the first generation
+        """
+        static_trajectory = trajectory.static_copy()
+        self._last_parameters = pickle.dumps(
+            _parameters_of(trajectory), pickle.HIGHEST_PROTOCOL)
+        self._mark_written(trajectory)
+        if os.path.isfile(self.path):
+            logger.warning("Overwriting the checkpoint log %s", self.path)
+        self._append({
+            'type': 'header',
+            'trajectory': static_trajectory,
+            'individuals': {
+                generation: trajectory.individuals.get(generation, [])},
+        }, truncate=True)
+
+    def write_generation(self, trajectory, generation, results,
+                         optimizer_state=None):
+        """
+        Appends the record of a generation, to be called once the
+        postprocessing of the generation finished.
+        :param trajectory: the trajectory to store
+        :param generation: id of the evaluated generation
+        :param results: the list of tuples (ind_idx, fitness) of the
+                        generation. The postprocessing of several optimizers
+                        clears the list stored in the trajectory, so a copy
+                        taken before has to be passed.
+        :param optimizer_state: state of the optimizer at the end of the
+                                postprocessing, as returned by
+                                :meth:`~l2l.optimizers.optimizer.Optimizer.save_state`.
+                                It allows resuming the run from this
+                                generation
+        """
+        if not os.path.isfile(self.path):
+            raise Exception("The checkpoint header has to be written before "
+                            "the generations")
+        result_groups = {}
+        root_results = {}
+        for name, value in trajectory.results._data.items():
+            if name == 'all_results':
+                continue
+            if isinstance(value, ResultGroup):
+                written = self._written_keys.setdefault(name, set())
+                new_entries = {key: val for key, val in value._data.items()
+                               if key not in written}
+                if new_entries:
+                    result_groups[name] = new_entries
+                    written.update(new_entries)
+            else:
+                data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                if self._last_root_results.get(name) != data:
+                    root_results[name] = value
+                    self._last_root_results[name] = data
+
+        parameters = pickle.dumps(
+            _parameters_of(trajectory), pickle.HIGHEST_PROTOCOL)
+        trajectory_results = pickle.dumps(
+            trajectory._results, pickle.HIGHEST_PROTOCOL)
+        record = {
+            'type': 'generation',
+            'generation': generation,
+            'results': list(results),
+            'result_groups': result_groups,
+            'root_results': root_results,
+            'parameters': None,
+            'trajectory_results': None,
+            'individuals': {},
+            'optimizer_state': optimizer_state,
+            'result_rows': None,
+        }
+        if trajectory.result_table is not None:
+            record['result_rows'] = trajectory.result_table.select(generation)
+        if parameters != self._last_parameters:
+            record['parameters'] = _parameters_of(trajectory)
+            self._last_parameters = parameters
+        if trajectory_results != self._last_trajectory_results:
+            record['trajectory_results'] = trajectory._results
+            self._last_trajectory_results = trajectory_results
+        if generation + 1 in trajectory.individuals:
+            record['individuals'][generation + 1] = \
+                trajectory.individuals[generation + 1]
+        self._append(record)
+
+    def resume(self, trajectory):
+        """
+        Prepares the writer to append the following generations of a
+        trajectory rebuilt from its log with :func:`load_checkpoint`, instead
+        of writing a new header.
+        :param trajectory: the trajectory loaded from the log
+        """
+        self._last_parameters = pickle.dumps(
+            _parameters_of(trajectory), pickle.HIGHEST_PROTOCOL)
+        self._last_trajectory_results = pickle.dumps(
+            trajectory._results, pickle.HIGHEST_PROTOCOL)
+        self._last_root_results = {
+            name: pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            for name, value in trajectory.results._data.items()
+            if name != 'all_results' and not isinstance(value, ResultGroup)}
+        self._mark_written(trajectory)
+
+    def _mark_written(self, trajectory):
+        """
+        Marks the result entries already present in the trajectory as written
+        """
+        for name, value in trajectory.results._data.items():
+            if name != 'all_results' and isinstance(value, ResultGroup):
+                self._written_keys[name] = set(value._data.keys())
+
+    def _append(self, record, truncate=False):
+        # The record is pickled straight into the file rather than into
+        # bytes, which would hold another copy of its arrays
+        with open(self.path, "wb" if truncate else "r+b") as handle:
+            start = handle.seek(0, os.SEEK_END)
+            handle.write(_RECORD_SIZE.pack(0))
+            if self.codec is None:
+                pickle.dump(record, handle, pickle.HIGHEST_PROTOCOL)
+            else:
+                compression.write(record, handle, self.codec, self.level)
+            end = handle.tell()
+            handle.seek(start)
+            handle.write(_RECORD_SIZE.pack(end - start - _RECORD_SIZE.size))
+
+
+def read_checkpoint_records(path):
+    """
+    Iterates over the records of a checkpoint log written by
+    :class:`CheckpointWriter`. An incomplete last record, e.g. from an
+    interrupted write, is ignored.
+    :param path: path of the checkpoint log
+    :return: generator of the records, as dictionaries
+    """
+    with open(path, "rb") as handle:
+        file_size = os.fstat(handle.fileno()).st_size
+        while True:
+            header = handle.read(_RECORD_SIZE.size)
+            if len(header) < _RECORD_SIZE.size:
+                return
+            size, = _RECORD_SIZE.unpack(header)
+            start = handle.tell()
+            if size == 0 or start + size > file_size:
+                logger.warning("Ignoring incomplete record at the end of %s",
+                               path)
+                return
+            # Compressed and plain records can be mixed, e.g. after resuming
+            # with another codec
+            yield compression.read(compression.BoundedReader(handle, size))
+            handle.seek(start + size)
+
+
+def load_checkpoint(path, generation=None):
+    """
+    Rebuilds a trajectory from a checkpoint log written by
+    :class:`CheckpointWriter`.
+    :param path: path of the checkpoint log
+    :param generation: If given, only the generations up to this one are
+                       loaded. The individuals of the following generation
+                       are included, as they were in the trajectory at the
+                       end of the postprocessing of `generation`
+    :return: the trajectory
+    """
+    trajectory = None
+    for record in read_checkpoint_records(path):
+        if record['type'] == 'header':
+            trajectory = record['trajectory']
+            trajectory.individuals.update(record['individuals'])
+            continue
+        g = record['generation']
+        if generation is not None and g > generation:
+            break
+
+        if record['parameters'] is not None:
+            parameters = trajectory.par._data
+            for key in list(parameters.keys()):
+                if key != 'trajectory':
+                    del parameters[key]
+            parameters.update(record['parameters'])
+        if record['trajectory_results'] is not None:
+            trajectory._results = record['trajectory_results']
+
+        results = trajectory.results
+        results.f_add_result_to_group('all_results', g, record['results'])
+        for name, entries in record['result_groups'].items():
+            if name not in results._data:
+                results.f_add_result_group(name)
+            results._data[name]._data.update(entries)
+        results._data.update(record['root_results'])
+
+        trajectory.individuals.update(record['individuals'])
+        if record.get('result_rows') is not None and \
+                trajectory.result_table is not None:
+            trajectory.result_table.extend(record['result_rows'])
+        trajectory.current_results = record['results']
+        trajectory.par['generation'] = g
+
+    if trajectory is None:
+        raise Exception("No checkpoint header found in " + path)
+    return trajectory
+
+
+def load_optimizer_state(path):
+    """
+    Returns the optimizer state stored with the last generation of a
+    checkpoint log written by :class:`CheckpointWriter`.
+    :param path: path of the checkpoint log
+    :return: tuple (generation, optimizer_state) of the last generation
+             stored with an optimizer state
+    """
+    last = None
+    for record in read_checkpoint_records(path):
+        if record['type'] == 'generation' and \
+                record.get('optimizer_state') is not None:
+            last = (record['generation'], record['optimizer_state'])
+    if last is None:
+        raise Exception("No optimizer state found in " + path)
+    return last
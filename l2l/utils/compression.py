@@ -0,0 +1,261 @@
+"""
+Compressed serialization of trajectories, checkpoint records and the files
+handed to the workers, with the codecs of the standard library.
+
+An object is written as a short uncompressed header naming the codec,
+followed by a compressed stream holding the pickle of the object and then
+the raw buffers of its numerical arrays. Arrays are left out of the pickle
+(see :meth:`pickle.Pickler.persistent_id`) and their memory is written and
+read back chunk by chunk, so that neither the pickle nor the compressed data
+of a large array is ever held in memory next to the array itself.
+
+Files without the header are read as plain pickles, so that :func:`load`
+and :func:`loads` read the uncompressed files written before as well.
+
+Several objects can be stored one after another in a file, as the records
+of a checkpoint log. Each of them is then read through a
+:class:`BoundedReader`, which ends the file after the object, so that the
+decompressor does not read into the next one.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import pickle
+import struct
+
+import numpy as np
+
+#: The available codecs. 'zlib' writes a gzip stream, 'none' writes the
+#: arrays as raw buffers without compressing them
+CODECS = ('none', 'zlib', 'lzma', 'bz2')
+#: Compression level used when none is given. For lzma, it is the preset
+DEFAULT_LEVELS = {'none': None, 'zlib': 6, 'lzma': 6, 'bz2': 9}
+
+_MAGIC = b'L2LZ'
+_HEADER = struct.Struct('<4sBB')
+_VERSION = 1
+# Arrays smaller than this are pickled as usual
+_MIN_RAW_BYTES = 1024
+# Size of the chunks of the raw buffers
+_CHUNK_BYTES = 1 << 20
+
+
+def _open_stream(raw, codec, level, mode):
+    """
+    Wraps a binary file object into a compressing or decompressing stream.
+    """
+    if codec == 'none':
+        return raw
+    if codec == 'zlib':
+        # The modification time is left out so that equal objects give equal
+        # files
+        if mode == 'wb':
+            return gzip.GzipFile(fileobj=raw, mode=mode, compresslevel=level,
+                                 mtime=0)
+        return gzip.GzipFile(fileobj=raw, mode=mode)
+    if codec == 'lzma':
+        if mode == 'wb':
+            return lzma.LZMAFile(raw, mode=mode, preset=level)
+        return lzma.LZMAFile(raw, mode=mode)
+    if codec == 'bz2':
+        if mode == 'wb':
+            return bz2.BZ2File(raw, mode=mode, compresslevel=level)
+        return bz2.BZ2File(raw, mode=mode)
+    raise Exception("Unknown compression codec: %s" % codec)
+
+
+class _ArrayPickler(pickle.Pickler):
+    """
+    Pickler which leaves the numerical arrays out of the pickle and collects
+    them to be written as raw buffers after it.
+    """
+
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.arrays = []
+        self._indices = {}
+
+    def persistent_id(self, obj):
+        # Structured arrays are written as raw buffers as well, unless they
+        # hold python objects
+        if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biufcV' and \
+                not obj.dtype.hasobject and obj.nbytes >= _MIN_RAW_BYTES:
+            # The list keeps the arrays alive, so their ids stay unique
+            index = self._indices.get(id(obj))
+            if index is None:
+                index = len(self.arrays)
+                self._indices[id(obj)] = index
+                self.arrays.append(obj)
+            # The dtype itself is pickled, as its string does not describe
+            # the fields of a structured array
+            return ('ndarray', index, obj.dtype, obj.shape,
+                    obj.flags.writeable)
+        return None
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """
+    Unpickler creating empty arrays for the arrays left out of the pickle, to
+    be filled with the raw buffers which follow it.
+    """
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.arrays = {}
+
+    def persistent_load(self, pid):
+        kind, index, dtype, shape, writeable = pid
+        if kind != 'ndarray':
+            raise pickle.UnpicklingError("Unknown persistent id %s" % kind)
+        if index not in self.arrays:
+            self.arrays[index] = (np.empty(shape, dtype=dtype), writeable)
+        return self.arrays[index][0]
+
+
+class BoundedReader(io.RawIOBase):
+    """
+    Read-only view of the next `size` bytes of a binary file object, from its
+    current position. The view ends after these bytes, and seeking is
+    limited to them.
+    """
+
+    def __init__(self, raw, size):
+        """
+        :param raw: binary file object, opened for reading
+        :param size: number of bytes of the view
+        """
+        super().__init__()
+        self._raw = raw
+        self._start = raw.tell()
+        self._size = size
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = min(max(offset, 0), self._size)
+        self._raw.seek(self._start + self._position)
+        return self._position
+
+    def readinto(self, buffer):
+        buffer = memoryview(buffer).cast('B')
+        size = min(len(buffer), self._size - self._position)
+        if size <= 0:
+            return 0
+        size = self._raw.readinto(buffer[:size])
+        self._position += size
+        return size
+
+
+def _write_arrays(stream, arrays):
+    for array in arrays:
+        data = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+        for start in range(0, len(data), _CHUNK_BYTES):
+            stream.write(data[start:start + _CHUNK_BYTES].data)
+
+
+def _read_arrays(stream, arrays):
+    for index in sorted(arrays):
+        array, writeable = arrays[index]
+        data = memoryview(array.reshape(-1).view(np.uint8))
+        offset = 0
+        while offset < len(data):
+            size = stream.readinto(data[offset:offset + _CHUNK_BYTES])
+            if not size:
+                raise Exception("Unexpected end of the compressed data")
+            offset += size
+        array.flags.writeable = writeable
+
+
+def write(obj, raw, codec='zlib', level=None):
+    """
+    Writes an object to a binary file object.
+    :param obj: the object, it must be picklable
+    :param raw: the file object, opened for writing
+    :param codec: one of :data:`CODECS`
+    :param level: compression level, the default of the codec if None
+    """
+    if codec not in CODECS:
+        raise Exception("Unknown compression codec: %s" % codec)
+    if level is None:
+        level = DEFAULT_LEVELS[codec]
+    raw.write(_HEADER.pack(_MAGIC, _VERSION, CODECS.index(codec)))
+    stream = _open_stream(raw, codec, level, 'wb')
+    pickler = _ArrayPickler(stream)
+    pickler.dump(obj)
+    _write_arrays(stream, pickler.arrays)
+    if stream is not raw:
+        # Flushes the end of the compressed stream, without closing raw
+        stream.close()
+
+
+def read(raw):
+    """
+    Reads an object written by :func:`write`, or a plain pickle.
+    :param raw: binary file object, opened for reading
+    :return: the object
+    """
+    start = raw.tell()
+    header = raw.read(_HEADER.size)
+    if len(header) < _HEADER.size or header[:len(_MAGIC)] != _MAGIC:
+        raw.seek(start)
+        return pickle.load(raw)
+    _, version, codec_index = _HEADER.unpack(header)
+    if version != _VERSION:
+        raise Exception("Unsupported compressed format version %d" % version)
+    stream = _open_stream(raw, CODECS[codec_index], None, 'rb')
+    unpickler = _ArrayUnpickler(stream)
+    obj = unpickler.load()
+    _read_arrays(stream, unpickler.arrays)
+    return obj
+
+
+def dump(obj, path, codec='zlib', level=None):
+    """
+    Writes an object to a file. See :func:`write`.
+    :param obj: the object, it must be picklable
+    :param path: path of the file
+    :param codec: one of :data:`CODECS`
+    :param level: compression level, the default of the codec if None
+    """
+    with open(path, "wb") as handle:
+        write(obj, handle, codec, level)
+
+
+def load(path):
+    """
+    Reads an object from a file written by :func:`dump`, or from a plain
+    pickle file.
+    :param path: path of the file
+    :return: the object
+    """
+    with open(path, "rb") as handle:
+        return read(handle)
+
+
+def dumps(obj, codec='zlib', level=None):
+    """
+    Same as :func:`dump`, returning the data as bytes.
+    """
+    buffer = io.BytesIO()
+    write(obj, buffer, codec, level)
+    return buffer.getvalue()
+
+
+def loads(data):
+    """
+    Same as :func:`load`, reading the object from bytes.
+    """
+    return read(io.BytesIO(data))
@@ -0,0 +1,108 @@
+import filecmp
+import logging
+import os
+import pickle
+import struct
+
+from l2l.utils import compression
+
+logger = logging.getLogger("utils.dispatch")
+
+# The individuals file starts with the position of the pickled index, which
+# follows the pickled individuals
+_INDEX_POSITION = struct.Struct('<Q')
+
+
+def write_static_trajectory(trajectory, path, codec=None, level=None):
+    """
+    Writes the parameters of the trajectory, without individuals or results,
+    to a file shared by all the individuals and generations. The generation
+    number is left out, so the file is only rewritten when the parameters
+    change.
+    :param trajectory: the trajectory holding the parameters
+    :param path: path of the file
+    :param codec: If given, the file is compressed with this codec of
+                  :mod:`l2l.utils.compression`
+    :param level: compression level, the default of the codec if None
+    :return: True if the file was written, False if it was up to date
+    """
+    static_trajectory = trajectory.static_copy()
+    static_trajectory.par._data.pop('generation', None)
+    # The new file is written next to the former one and compared with it
+    temporary_path = path + '.tmp'
+    with open(temporary_path, "wb") as handle:
+        _dump(static_trajectory, handle, codec, level)
+    if os.path.isfile(path) and \
+            filecmp.cmp(path, temporary_path, shallow=False):
+        os.remove(temporary_path)
+        return False
+    os.replace(temporary_path, path)
+    logger.info("Written static trajectory to: " + path)
+    return True
+
+
+def _dump(obj, handle, codec, level):
+    if codec is None:
+        pickle.dump(obj, handle, pickle.HIGHEST_PROTOCOL)
+    else:
+        compression.write(obj, handle, codec, level)
+
+
+def write_individuals(individuals, path, codec=None, level=None):
+    """
+    Writes the individuals of a generation to a single file with an index of
+    their positions, so that each individual can be read without loading the
+    others.
+    :param individuals: list of individuals of the generation
+    :param path: path of the file
+    :param codec: If given, each individual is compressed with this codec of
+                  :mod:`l2l.utils.compression`
+    :param level: compression level, the default of the codec if None
+    """
+    index = {}
+    with open(path, "wb") as handle:
+        handle.write(_INDEX_POSITION.pack(0))
+        # The individuals are pickled straight into the file, and their
+        # positions are known once they are written
+        for ind in individuals:
+            start = handle.tell()
+            _dump(ind, handle, codec, level)
+            index[ind.ind_idx] = (start, handle.tell() - start)
+        index_position = handle.tell()
+        pickle.dump(index, handle, pickle.HIGHEST_PROTOCOL)
+        handle.seek(0)
+        handle.write(_INDEX_POSITION.pack(index_position))
+
+
+def read_individual(path, ind_idx):
+    """
+    Reads one individual from a file written by :func:`write_individuals`.
+    :param path: path of the file
+    :param ind_idx: index of the individual to read
+    :return: the individual
+    """
+    with open(path, "rb") as handle:
+        index_position, = _INDEX_POSITION.unpack(
+            handle.read(_INDEX_POSITION.size))
+        handle.seek(index_position)
+        index = pickle.load(handle)
+        start, size = index[ind_idx]
+        handle.seek(start)
+        return compression.read(compression.BoundedReader(handle, size))
+
+
+def load_trajectory(static_path, individuals_path, ind_idx, generation):
+    """
+    Rebuilds a light trajectory for the evaluation of a single individual.
+    :param static_path: path of the file written by
+                        :func:`write_static_trajectory`
+    :param individuals_path: path of the file written by
+                             :func:`write_individuals`
+    :param ind_idx: index of the individual to evaluate
+    :param generation: id of the generation
+    :return: a trajectory holding the parameters and the individual
+    """
+    trajectory = compression.load(static_path)
+    trajectory.par['generation'] = generation
+    trajectory.individual = read_individual(individuals_path, ind_idx)
+    return trajectory
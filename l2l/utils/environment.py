@@ -2,9 +2,25 @@ import inspect
 import logging
 import os
 import pickle
+import queue
+from collections import OrderedDict
 
+import numpy as np
+
+from l2l import dict_to_list
+from l2l.optimizees.optimizee import Optimizee
+from l2l.optimizers.optimizer import Optimizer
+from l2l.utils import compression
+from l2l.utils.checkpoint import CheckpointWriter, load_checkpoint, \
+    load_optimizer_state
+from l2l.utils.individual import Individual, Population
 from l2l.utils.JUBE_runner import JUBERunner
+from l2l.utils.pool_runner import PoolRunner
+from l2l.utils.result_table import ResultTable
+from l2l.utils.spill import SpillingDict
 from l2l.utils.trajectory import Trajectory
+from l2l.utils.trajectory_store import write_trajectory_store
+from l2l.utils.worker_daemon import WorkerDaemonRunner
 
 logger = logging.getLogger("utils.Environment")
 
@@ -23,7 +39,13 @@ class Environment:
         Initializes an Environment
         :param args: arguments passed to the environment initialization
         :param keyword_args: arguments by keyword. Relevant keywords are
-                             trajectory and filename.
+                             trajectory, filename, automatic_storing,
+                             storage_format, multiprocessing, n_processes,
+                             n_worker_daemons, worker_daemon_address,
+                             worker_daemon_authkey, start_worker_daemons,
+                             worker_daemon_timeout, batch, fitness_cache,
+                             result_table, memory_window, columnar_store,
+                             compression and compression_level.
         The trajectory object holds individual parameters and history per
         generation of the exploration process.
         """
@@ -46,11 +68,91 @@ class Environment:
         os.makedirs(self.per_gen_path, exist_ok=True)
 
         self.automatic_storing = keyword_args.get('automatic_storing', True)
+        # With automatic storing, 'pickle' writes the whole trajectory every
+        # generation and 'incremental' appends the changes of each generation
+        # to a checkpoint log (see l2l.utils.checkpoint)
+        self.storage_format = keyword_args.get('storage_format', 'pickle')
+        if self.storage_format not in ('pickle', 'incremental'):
+            raise Exception("Unknown storage format: %s" % self.storage_format)
+        self.checkpoint_path = os.path.join(
+            self.per_gen_path, 'Trajectory_checkpoint.bin')
+        self.checkpoint = None
+        # If given, the stored trajectories and checkpoint records are
+        # compressed with this codec (see l2l.utils.compression)
+        self.compression = keyword_args.get('compression', None)
+        self.compression_level = keyword_args.get('compression_level', None)
+        if self.compression is not None and \
+                self.compression not in compression.CODECS:
+            raise Exception("Unknown compression codec: %s" %
+                            self.compression)
 
         self.postprocessing = None
         self.multiprocessing = True
         if 'multiprocessing' in keyword_args:
             self.multiprocessing = keyword_args['multiprocessing']
+        # If larger than 0, the individuals are evaluated on a pool of
+        # n_processes local worker processes instead of JUBE or sequential
+        # calls
+        self.n_processes = keyword_args.get('n_processes', 0)
+        # If larger than 0, the individuals are evaluated by n_worker_daemons
+        # long-lived worker daemons connected through a socket. They are
+        # started locally unless start_worker_daemons is False, and waited
+        # for at most worker_daemon_timeout seconds if it is not None
+        self.n_worker_daemons = keyword_args.get('n_worker_daemons', 0)
+        self.worker_daemon_address = keyword_args.get(
+            'worker_daemon_address', ('localhost', 0))
+        self.worker_daemon_authkey = keyword_args.get(
+            'worker_daemon_authkey', None)
+        self.start_worker_daemons = keyword_args.get(
+            'start_worker_daemons', True)
+        self.worker_daemon_timeout = keyword_args.get(
+            'worker_daemon_timeout', None)
+        # If True, whole generations are evaluated by a single call to the
+        # simulate_batch function of the optimizee, which must set
+        # provides_batch. JUBE and the worker processes are then not used
+        self.batch = keyword_args.get('batch', False)
+        if self.batch:
+            if self.n_processes > 0 or self.n_worker_daemons > 0:
+                raise Exception("Batched evaluation can not be combined "
+                                "with worker processes or worker daemons")
+            if keyword_args.get('multiprocessing', False):
+                logger.warning("Batched evaluation is enabled, the "
+                               "individuals are not evaluated with JUBE")
+        # If given, a FitnessCache (see l2l.utils.fitness_cache) in front of
+        # the evaluation of the individuals. Only individuals whose fitness
+        # is not cached are evaluated
+        self.fitness_cache = keyword_args.get('fitness_cache', None)
+        # The result table of the trajectory holds one row per evaluated
+        # individual (see l2l.utils.result_table). With 'params' the rows
+        # hold the parameters of the individuals as well, and False disables
+        # the table
+        self.result_table = keyword_args.get('result_table', True)
+        if self.result_table not in (True, False, 'params'):
+            raise Exception("Unknown result table setting: %s" %
+                            self.result_table)
+        if 'trajectory' in keyword_args:
+            if not self.result_table:
+                self.trajectory.result_table = None
+            elif self.result_table == 'params':
+                self.trajectory.result_table = ResultTable(store_params=True)
+        # If given, only the individuals and results of the last
+        # memory_window generations are kept in memory. Older generations are
+        # spilled to the per generation directory and loaded back on access
+        # (see l2l.utils.spill)
+        self.memory_window = keyword_args.get('memory_window', None)
+        if self.memory_window is not None and self.memory_window < 1:
+            raise Exception("The memory window must hold at least one "
+                            "generation")
+        # If True and with automatic storing, the results are also written
+        # at the end of the run to a columnar store in the per generation
+        # directory, which can be read without unpickling the trajectory
+        # (see l2l.utils.trajectory_store)
+        self.columnar_store = keyword_args.get('columnar_store', False)
+        if self.columnar_store and not self.result_table:
+            raise Exception("The columnar store is written from the result "
+                            "table, which is disabled")
+        self.columnar_store_path = os.path.join(
+            self.per_gen_path, 'trajectory_store')
         self.run_id = 0
 
         self.logging = False
@@ -58,73 +160,522 @@ class Environment:
 
     def run(self, runfunc):
         """
-        Runs the optimizees using either JUBE or sequential calls.
+        Runs the optimizees using either local worker processes, worker
+        daemons, JUBE or sequential calls. With `batch`, the whole generation
+        is instead evaluated by a single call to
+        :meth:`~l2l.optimizees.optimizee.Optimizee.simulate_batch` of the
+        optimizee `runfunc` belongs to.
+        :param runfunc: The function to be called from the optimizee
+        :return: the results of running a whole generation. Dictionary
+                 indexed by generation id. With a memory window, it holds
+                 the spilled generations as well
+        """
+        # The worker runners are kept alive for all the generations, so that
+        # the optimizee is sent to the workers only once
+        runner = None
+        if self._get_batch_func(runfunc) is not None:
+            logger.info("Environment run evaluating whole generations with "
+                        "simulate_batch")
+        elif self.n_worker_daemons > 0:
+            runner = WorkerDaemonRunner(
+                self.trajectory, runfunc, self.n_worker_daemons,
+                address=self.worker_daemon_address,
+                authkey=self.worker_daemon_authkey,
+                start_workers=self.start_worker_daemons,
+                timeout=self.worker_daemon_timeout)
+        elif self.n_processes > 0:
+            runner = PoolRunner(self.trajectory, runfunc, self.n_processes)
+        try:
+            result = self._run_generations(runfunc, runner)
+        except Exception:
+            if runner is not None:
+                runner.close(terminate=True)
+            raise
+        if runner is not None:
+            runner.close()
+        return result
+
+    def _run_generations(self, runfunc, runner):
+        """
+        Executes all the remaining generations of the trajectory.
         :param runfunc: The function to be called from the optimizee
+        :param runner: the PoolRunner or WorkerDaemonRunner used to evaluate
+                       the individuals, or None
         :return: the results of running a whole generation. Dictionary
                  indexed by generation id.
         """
         result = {}
+        if self.memory_window is not None:
+            result = self._bound_memory()
+        batch_func = self._get_batch_func(runfunc)
         gen = self.trajectory.par['generation']
         n_loops = self.trajectory.par['n_iteration']
+        incremental = self.automatic_storing and \
+            self.storage_format == 'incremental'
+        if incremental and self.checkpoint is None:
+            self.checkpoint = CheckpointWriter(
+                self.checkpoint_path, self.compression,
+                self.compression_level)
+            self.checkpoint.write_header(self.trajectory, gen)
         for it in range(gen, n_loops):
-            result[it] = []
-            if self.multiprocessing:
-                # Multiprocessing is done through JUBE, either with or
-                # without scheduler
-                logging.info(
-                    "Environment run starting JUBERunner for n iterations: " +
-                    str(self.trajectory.par['n_iteration']))
-                jube = JUBERunner(self.trajectory)
-                # Initialize new JUBE run and execute it
-                try:
-                    jube.write_pop_for_jube(self.trajectory, it)
-                    result[it][:] = jube.run(self.trajectory, it)
-                except Exception as e:
-                    if self.logging:
-                        logger.exception(
-                            "Error launching JUBE run: %s" % str(e.__cause__))
-                    raise e
-
+            if self.fitness_cache is not None:
+                result[it] = self._run_cached(
+                    runfunc, runner, batch_func, it)
             else:
-                # Sequential calls to the runfunc in the optimizee
-                # Call runfunc on each individual from the trajectory
-                try:
-                    for ind in self.trajectory.individuals[it]:
-                        self.trajectory.individual = ind
-                        fitness = runfunc(self.trajectory)
-                        result[it].append((ind.ind_idx, fitness))
-                        self.run_id = self.run_id + 1
-
-                        import gc
-                        gc.collect()
-
-                except Exception as e:
-                    if self.logging:
-                        logger.exception(
-                            "Error during serial execution "
-                            "of individuals: {}".format(e.__cause__)
-                        )
-                    raise e
+                result[it] = self._evaluate(runfunc, runner, batch_func, it)
 
             # Add results to the trajectory
             self.trajectory.results.f_add_result_to_group(
                 "all_results", it, result[it])
+            if self.trajectory.result_table is not None:
+                self.trajectory.result_table.append_results(
+                    it, result[it], self.trajectory.individuals[it],
+                    self._get_fitness_weights())
             self.trajectory.current_results = result[it]
             self.trajectory.par['generation'] = it
 
-            if self.automatic_storing:
-                trajfname = "Trajectory_{}_{:020d}.bin".format('final', it)
-                traj_path = os.path.join(self.per_gen_path, trajfname)
-                with open(traj_path, "wb") as handle:
-                    pickle.dump(
-                        self.trajectory, handle, pickle.HIGHEST_PROTOCOL)
+            if self.automatic_storing and not incremental:
+                self._store_trajectory(it)
 
+            # The postprocessing may clear the list of results
+            generation_results = list(result[it])
             # Perform the postprocessing step in order to generate the new
             # parameter set
             self.postprocessing(self.trajectory, result[it])
 
+            if incremental:
+                self.checkpoint.write_generation(
+                    self.trajectory, it, generation_results,
+                    optimizer_state=self._get_optimizer_state())
+
+            if self.memory_window is not None:
+                oldest = it - self.memory_window + 1
+                self.trajectory.individuals.spill_older_than(oldest)
+                result.spill_older_than(oldest)
+
+        if self.automatic_storing and self.columnar_store:
+            self._write_columnar_store()
         return result
 
+    def _evaluate(self, runfunc, runner, batch_func, generation):
+        """
+        Evaluates the individuals of a generation with the batched
+        simulation function, the worker runner, JUBE or sequential calls.
+        :param runfunc: The function to be called from the optimizee
+        :param runner: the PoolRunner or WorkerDaemonRunner used to evaluate
+                       the individuals, or None
+        :param batch_func: The simulate_batch function of the optimizee, or
+                           None
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        if batch_func is not None:
+            return self._run_batch(batch_func, generation)
+        elif runner is not None:
+            return self._run_workers(runner, generation)
+        elif self.multiprocessing:
+            return self._run_jube(generation)
+        else:
+            return self._run_serial(runfunc, generation)
+
+    def _run_cached(self, runfunc, runner, batch_func, generation):
+        """
+        Evaluates only the individuals of a generation whose fitness is not
+        in the fitness cache. Individuals of the generation sharing the same
+        key are evaluated once.
+        :param runfunc: The function to be called from the optimizee
+        :param runner: the PoolRunner or WorkerDaemonRunner used to evaluate
+                       the individuals, or None
+        :param batch_func: The simulate_batch function of the optimizee, or
+                           None
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        cache = self.fitness_cache
+        individuals = self.trajectory.individuals[generation]
+        fitnesses = {}
+        to_evaluate = OrderedDict()
+        for ind in individuals:
+            key = cache.key(ind)
+            if key in to_evaluate:
+                to_evaluate[key].append(ind)
+                continue
+            fitness = cache.get(key, generation)
+            if fitness is None:
+                to_evaluate[key] = [ind]
+            else:
+                fitnesses[ind.ind_idx] = fitness
+
+        if to_evaluate:
+            # The backends evaluate the individuals listed in the trajectory
+            self.trajectory.individuals[generation] = \
+                [inds[0] for inds in to_evaluate.values()]
+            try:
+                evaluated = dict(
+                    self._evaluate(runfunc, runner, batch_func, generation))
+            finally:
+                self.trajectory.individuals[generation] = individuals
+            for key, inds in to_evaluate.items():
+                fitness = evaluated[inds[0].ind_idx]
+                cache.put(key, fitness)
+                for ind in inds:
+                    fitnesses[ind.ind_idx] = fitness
+        cache.report(generation)
+        return [(ind.ind_idx, fitnesses[ind.ind_idx]) for ind in individuals]
+
+    def _bound_memory(self):
+        """
+        Replaces the dictionaries of the individuals and of the results of
+        the trajectory with dictionaries spilling to disk, and moves the
+        result table to a memory-mapped file.
+        :return: the dictionary of the results, indexed by generation
+        """
+        spill_path = os.path.join(self.per_gen_path, 'spilled')
+        trajectory = self.trajectory
+        if not isinstance(trajectory.individuals, SpillingDict):
+            trajectory.individuals = SpillingDict(
+                spill_path, 'individuals', trajectory.individuals)
+        all_results = trajectory.results._data['all_results']
+        if not isinstance(all_results._data, SpillingDict):
+            all_results._data = SpillingDict(
+                spill_path, 'results', all_results._data)
+        if trajectory.result_table is not None and \
+                trajectory.result_table.path is None:
+            trajectory.result_table.move_to_file(
+                os.path.join(spill_path, 'result_table.npy'))
+        return all_results._data
+
+    def _get_fitness_weights(self):
+        """
+        Returns the fitness weights of the optimizer whose post_process
+        method is the postprocessing step, or None if they are not known
+        """
+        optimizer = getattr(self.postprocessing, '__self__', None)
+        return getattr(optimizer, 'optimizee_fitness_weights', None)
+
+    def _get_optimizer_state(self):
+        """
+        Returns the state of the optimizer whose post_process method is the
+        postprocessing step, or None if the postprocessing is not bound to an
+        optimizer
+        """
+        optimizer = getattr(self.postprocessing, '__self__', None)
+        if optimizer is None or not hasattr(optimizer, 'save_state'):
+            return None
+        return optimizer.save_state()
+
+    def resume(self, checkpoint_path, optimizer):
+        """
+        Restores an interrupted run from the last generation stored in a
+        checkpoint log, written with storage_format='incremental'. The
+        trajectory of the environment is replaced by the one rebuilt from the
+        log and the state of the optimizer, including its random number
+        generators, is restored, so that a following call to :meth:`run`
+        continues with the next generation exactly as the interrupted run
+        would have. The generations already stored are not evaluated again.
+        The state of the optimizee, e.g. the random number generator of a
+        noisy function, is not part of the checkpoint.
+        :param checkpoint_path: path of the checkpoint log
+        :param optimizer: an optimizer created with the same parameters as in
+                          the interrupted run
+        :return: the restored trajectory
+        """
+        generation, optimizer_state = load_optimizer_state(checkpoint_path)
+        self.trajectory = load_checkpoint(checkpoint_path, generation)
+        optimizer.restore_state(optimizer_state)
+        self.trajectory.par['generation'] = generation + 1
+        if self.postprocessing is None:
+            self.add_postprocessing(optimizer.post_process)
+        # The following generations are appended to the same log
+        if self.automatic_storing and self.storage_format == 'incremental':
+            self.checkpoint_path = checkpoint_path
+            self.checkpoint = CheckpointWriter(
+                checkpoint_path, self.compression, self.compression_level)
+            self.checkpoint.resume(self.trajectory)
+        logger.info("Resuming the run from generation %d of %s",
+                    generation + 1, checkpoint_path)
+        return self.trajectory
+
+    def run_async(self, runfunc, optimizer):
+        """
+        Runs the optimizees asynchronously, without a barrier at the end of
+        each generation. The optimizer is asked for new individuals through
+        :meth:`~l2l.optimizers.optimizer.Optimizer.ask` as long as there are
+        free workers, and each fitness is handed back with
+        :meth:`~l2l.optimizers.optimizer.Optimizer.tell` as soon as its
+        evaluation finishes. The evaluations are done on the local process
+        pool if `n_processes` is larger than 0 and sequentially otherwise.
+
+        Each evaluated individual is recorded in the trajectory under the
+        generation of the optimizer at the time it was asked for, with a
+        running index as ind_idx. With automatic storing, the whole
+        trajectory is pickled whenever the optimizer finishes a generation,
+        regardless of the storage format.
+        :param runfunc: The function to be called from the optimizee
+        :param optimizer: The optimizer, which must implement ask and tell
+        :return: the results of all the evaluations. Dictionary indexed by
+                 generation id.
+        """
+        # Checked before anything is evaluated, the base class methods raise
+        # NotImplementedError
+        optimizer_class = type(optimizer)
+        if getattr(optimizer_class, 'ask', None) in (None, Optimizer.ask) or \
+                getattr(optimizer_class, 'tell', None) in (None, Optimizer.tell):
+            raise Exception("{} does not implement ask and tell and cannot "
+                            "be run asynchronously".format(
+                                optimizer_class.__name__))
+        # The individuals expanded by the optimizer initialization are handed
+        # out again through ask, and recorded once they are evaluated
+        self.trajectory.individuals = {}
+        if self.memory_window is not None:
+            # Late results of earlier generations would be lost once spilled
+            logger.warning("The memory window is not supported in "
+                           "asynchronous mode and is ignored")
+        pool = None
+        if self.n_processes > 0:
+            pool = PoolRunner(self.trajectory, runfunc, self.n_processes)
+        try:
+            result = self._run_steady_state(runfunc, optimizer, pool)
+        except Exception:
+            if pool is not None:
+                pool.close(terminate=True)
+            raise
+        if pool is not None:
+            pool.close()
+        return result
+
+    def _run_steady_state(self, runfunc, optimizer, pool):
+        """
+        Keeps the workers busy with individuals asked from the optimizer
+        until it has no further candidates and no evaluation is pending.
+        :param runfunc: The function to be called from the optimizee
+        :param optimizer: The optimizer, which must implement ask and tell
+        :param pool: the PoolRunner used to evaluate the individuals or None
+        :return: the results of all the evaluations. Dictionary indexed by
+                 generation id.
+        """
+        result = {}
+        # Finished evaluations are put in this queue by the pool callbacks
+        finished = queue.Queue()
+        pending = {}
+        n_slots = self.n_processes if pool is not None else 1
+        ind_idx = 0
+        while True:
+            while len(pending) < n_slots:
+                individual = optimizer.ask(self.trajectory)
+                if individual is None:
+                    break
+                ind = Individual(
+                    optimizer.g, ind_idx,
+                    [{'individual.' + key: val}
+                     for key, val in individual.items()])
+                key = None
+                fitness = None
+                if self.fitness_cache is not None:
+                    key = self.fitness_cache.key(ind)
+                    fitness = self.fitness_cache.get(key, optimizer.g)
+                # Cached fitnesses are not stored again
+                pending[ind_idx] = \
+                    (individual, ind, key if fitness is None else None)
+                ind_idx += 1
+                if fitness is not None:
+                    finished.put((ind.ind_idx, fitness))
+                elif pool is not None:
+                    pool.submit(ind, finished.put, finished.put)
+                else:
+                    self.trajectory.individual = ind
+                    finished.put((ind.ind_idx, runfunc(self.trajectory)))
+            if not pending:
+                break
+
+            evaluation = finished.get()
+            if isinstance(evaluation, Exception):
+                if self.logging:
+                    logger.exception(
+                        "Error during asynchronous execution "
+                        "of individuals: {}".format(evaluation))
+                raise evaluation
+            run_index, fitness = evaluation
+            individual, ind, key = pending.pop(run_index)
+            if key is not None:
+                self.fitness_cache.put(key, fitness)
+            self.run_id = self.run_id + 1
+
+            # Add results to the trajectory
+            generation = ind.generation
+            if generation not in result:
+                result[generation] = []
+                self.trajectory.individuals[generation] = []
+                self.trajectory.results.f_add_result_to_group(
+                    "all_results", generation, result[generation])
+            result[generation].append((run_index, fitness))
+            self.trajectory.individuals[generation].append(ind)
+            if self.trajectory.result_table is not None:
+                self.trajectory.result_table.append_results(
+                    generation, [(run_index, fitness)], [ind],
+                    optimizer.optimizee_fitness_weights)
+            self.trajectory.current_results = result[generation]
+
+            last_generation = optimizer.g
+            optimizer.tell(self.trajectory, individual, fitness)
+            self.trajectory.par['generation'] = optimizer.g
+            if optimizer.g != last_generation:
+                if self.fitness_cache is not None:
+                    self.fitness_cache.report(last_generation)
+                if self.automatic_storing:
+                    self._store_trajectory(last_generation)
+
+        if self.automatic_storing and self.columnar_store:
+            self._write_columnar_store()
+        return result
+
+    def _write_columnar_store(self):
+        """
+        Writes the columnar store of the trajectory, unless its result table
+        was disabled during the run, e.g. by a lazy grid search
+        """
+        if self.trajectory.result_table is None:
+            logger.warning("The result table of the trajectory was disabled, "
+                           "the columnar store is not written")
+            return
+        write_trajectory_store(self.trajectory, self.columnar_store_path)
+
+    def _store_trajectory(self, generation):
+        """
+        Stores the whole trajectory in the per generation directory.
+        :param generation: id of the generation which was evaluated last
+        """
+        trajfname = "Trajectory_{}_{:020d}.bin".format('final', generation)
+        traj_path = os.path.join(self.per_gen_path, trajfname)
+        if self.compression is not None:
+            compression.dump(self.trajectory, traj_path, self.compression,
+                             self.compression_level)
+            return
+        with open(traj_path, "wb") as handle:
+            pickle.dump(
+                self.trajectory, handle, pickle.HIGHEST_PROTOCOL)
+
+    def _get_batch_func(self, runfunc):
+        """
+        Returns the batched simulation function of the optimizee `runfunc`
+        belongs to, if batched evaluation is enabled.
+        :param runfunc: The function to be called from the optimizee
+        :return: the bound simulate_batch method or None
+        """
+        if not self.batch:
+            return None
+        optimizee = getattr(runfunc, '__self__', None)
+        if not isinstance(optimizee, Optimizee) or \
+                not optimizee.provides_batch:
+            raise Exception("Batched evaluation needs an optimizee which "
+                            "provides simulate_batch")
+        return optimizee.simulate_batch
+
+    def _run_batch(self, batch_func, generation):
+        """
+        Evaluates all the individuals of a generation with a single call to
+        the batched simulation function of the optimizee.
+        :param batch_func: The simulate_batch function of the optimizee
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        individuals = self.trajectory.individuals[generation]
+        try:
+            # Rows follow the dict_to_list layout, i.e. sorted parameter
+            # names, which is shared by the optimizers
+            if isinstance(individuals, Population):
+                individuals_array = individuals.data
+            else:
+                individuals_array = np.array(
+                    [dict_to_list(ind.params) for ind in individuals])
+            fitnesses = np.asarray(batch_func(individuals_array))
+            assert fitnesses.shape[0] == len(individuals), \
+                "simulate_batch must return one row of fitnesses per " \
+                "individual"
+            fitnesses = fitnesses.reshape(len(individuals), -1)
+            results = [(ind.ind_idx, tuple(fitness))
+                       for ind, fitness in zip(individuals, fitnesses)]
+            self.run_id = self.run_id + len(results)
+        except Exception as e:
+            if self.logging:
+                logger.exception(
+                    "Error during batch execution "
+                    "of individuals: {}".format(e.__cause__))
+            raise e
+        return results
+
+    def _run_workers(self, runner, generation):
+        """
+        Evaluates the individuals of a generation on the local worker
+        processes or the worker daemons.
+        :param runner: the PoolRunner or WorkerDaemonRunner used to evaluate
+                       the individuals
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        try:
+            results = runner.run(self.trajectory, generation)
+            self.run_id = self.run_id + len(results)
+        except Exception as e:
+            if self.logging:
+                logger.exception(
+                    "Error during execution of individuals "
+                    "on the workers: {}".format(e.__cause__))
+            raise e
+        return results
+
+    def _run_jube(self, generation):
+        """
+        Evaluates the individuals of a generation using JUBE.
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        # Multiprocessing is done through JUBE, either with or
+        # without scheduler
+        logging.info(
+            "Environment run starting JUBERunner for n iterations: " +
+            str(self.trajectory.par['n_iteration']))
+        jube = JUBERunner(self.trajectory)
+        # Initialize new JUBE run and execute it
+        try:
+            jube.write_pop_for_jube(self.trajectory, generation)
+            results = jube.run(self.trajectory, generation)
+        except Exception as e:
+            if self.logging:
+                logger.exception(
+                    "Error launching JUBE run: %s" % str(e.__cause__))
+            raise e
+        return results
+
+    def _run_serial(self, runfunc, generation):
+        """
+        Evaluates the individuals of a generation with sequential calls.
+        :param runfunc: The function to be called from the optimizee
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, fitness)
+        """
+        results = []
+        # Sequential calls to the runfunc in the optimizee
+        # Call runfunc on each individual from the trajectory
+        try:
+            for ind in self.trajectory.individuals[generation]:
+                self.trajectory.individual = ind
+                fitness = runfunc(self.trajectory)
+                results.append((ind.ind_idx, fitness))
+                self.run_id = self.run_id + 1
+
+                import gc
+                gc.collect()
+
+        except Exception as e:
+            if self.logging:
+                logger.exception(
+                    "Error during serial execution "
+                    "of individuals: {}".format(e.__cause__)
+                )
+            raise e
+        return results
+
     def add_postprocessing(self, func):
         """
         Function to add a postprocessing step
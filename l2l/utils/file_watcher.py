@@ -0,0 +1,132 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+logger = logging.getLogger("utils.FileWatcher")
+
+# Constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class FileWatcher(object):
+    """
+    Minimal inotify based watcher of the files created in a set of
+    directories. It is only available on Linux, use :meth:`.create` to get
+    None instead of an error on other systems.
+    """
+
+    def __init__(self, directories):
+        """
+        Starts watching the given directories.
+        :param directories: iterable with the paths of the directories to watch
+        """
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        mask = _IN_CREATE | _IN_CLOSE_WRITE | _IN_MOVED_TO
+        for directory in set(directories):
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, "inotify_add_watch failed", directory)
+            self.directories[wd] = directory
+
+    @classmethod
+    def create(cls, directories):
+        """
+        Creates a watcher if inotify is available.
+        :param directories: iterable with the paths of the directories to watch
+        :return: a FileWatcher or None if inotify can not be used
+        """
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            return cls(directories)
+        except (OSError, AttributeError) as e:
+            logger.info("inotify not available, falling back to polling: %s",
+                        e)
+            return None
+
+    def wait(self, timeout):
+        """
+        Waits until files are created in the watched directories.
+        :param timeout: maximum time to wait, in seconds
+        :return: list of the paths of the created files, empty if the timeout
+                 expired first
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        paths = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and wd in self.directories:
+                paths.append(
+                    os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        """
+        Stops watching and releases the inotify file descriptor.
+        """
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def wait_for_files(files, min_interval=0.001, max_interval=10.):
+    """
+    Blocks until all the given files exist. File creation events are
+    received through inotify where available, so the function returns
+    milliseconds after the last file appears. Since inotify does not report
+    files written by other nodes on shared filesystems, the files which are
+    still missing are also checked with an exponential backoff, from
+    `min_interval` up to `max_interval` seconds. Without inotify, only the
+    backoff polling is used.
+    :param files: list of paths of the files to wait for
+    :param min_interval: first polling interval, in seconds
+    :param max_interval: maximum polling interval, in seconds
+    """
+    files = [os.path.abspath(f) for f in files]
+    # The watch is started before the first check so that no file created in
+    # between is missed
+    watcher = FileWatcher.create(os.path.dirname(f) for f in files)
+    try:
+        missing = set(f for f in files if not os.path.isfile(f))
+        interval = min_interval
+        while missing:
+            if watcher is not None:
+                created = watcher.wait(interval)
+                if created:
+                    missing.difference_update(created)
+                    continue
+            else:
+                time.sleep(interval)
+            # Only the files which are still missing are checked again
+            missing = set(f for f in missing if not os.path.isfile(f))
+            interval = min(interval * 2, max_interval)
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import pickle
+import shelve
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger("utils.FitnessCache")
+
+
+class FitnessCache(object):
+    """
+    FitnessCache memoizes the fitness of the evaluated individuals, so that
+    individuals with the same parameters as an earlier one, e.g. offspring
+    left unchanged by crossover and mutation or points falling together after
+    bounding, are not simulated again. It is only meaningful for
+    deterministic optimizees.
+    Individuals are identified by a hash of their parameters. With a
+    tolerance, numerical parameters are rounded to multiples of it before
+    hashing, so that individuals closer than the tolerance share their
+    fitness. The most recently used entries are kept in memory and, with a
+    path, all the entries are also stored on disk with :mod:`shelve`, so that
+    they survive restarts.
+    The number of hits and misses are counted per generation.
+    """
+
+    def __init__(self, max_size=None, tolerance=None, path=None):
+        """
+        :param max_size: maximum number of entries kept in memory, the least
+                         recently used ones are evicted first. None for no
+                         limit
+        :param tolerance: If given, numerical parameters are quantized to
+                          multiples of this value before hashing
+        :param path: If given, path of the shelve file where the entries are
+                     stored as well
+        """
+        assert max_size is None or max_size > 0, \
+            "The size of the fitness cache must be positive"
+        assert tolerance is None or tolerance > 0, \
+            "The tolerance of the fitness cache must be positive"
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.path = path
+        self._entries = OrderedDict()
+        self._disk = shelve.open(path) if path is not None else None
+        #: Dictionary of tuples (hits, misses) indexed by generation
+        self.generation_stats = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, individual):
+        """
+        Computes the key of an individual, a hash of its sorted parameters.
+        :param individual: an :class:`~l2l.utils.individual.Individual` or an
+                           Individual-Dict
+        :return: the key, as a hexadecimal string
+        """
+        params = getattr(individual, 'params', individual)
+        digest = hashlib.sha1()
+        for name in sorted(params.keys()):
+            value = np.asarray(params[name])
+            digest.update(name.encode())
+            if value.dtype.kind in 'biuf':
+                # Integers, floats and -0.0 map to the same float value
+                value = value.astype(np.float64) + 0.
+                if self.tolerance is not None:
+                    value = np.round(value / self.tolerance).astype(np.int64)
+                digest.update(str(value.shape).encode())
+                digest.update(np.ascontiguousarray(value).tobytes())
+            else:
+                digest.update(pickle.dumps(params[name], protocol=2))
+        return digest.hexdigest()
+
+    def get(self, key, generation=None):
+        """
+        Looks up a fitness and counts the hit or miss.
+        :param key: key of the individual, as returned by :meth:`key`
+        :param generation: id of the generation the hit or miss is counted in
+        :return: the fitness, or None if it is not cached
+        """
+        fitness = self._entries.get(key)
+        if fitness is not None:
+            self._entries.move_to_end(key)
+        elif self._disk is not None and key in self._disk:
+            fitness = self._disk[key]
+            self._store(key, fitness)
+        hits, misses = self.generation_stats.get(generation, (0, 0))
+        if fitness is None:
+            self.misses += 1
+            self.generation_stats[generation] = (hits, misses + 1)
+        else:
+            self.hits += 1
+            self.generation_stats[generation] = (hits + 1, misses)
+        return fitness
+
+    def put(self, key, fitness):
+        """
+        Stores the fitness of an individual.
+        :param key: key of the individual, as returned by :meth:`key`
+        :param fitness: the fitness returned by the optimizee
+        """
+        self._store(key, fitness)
+        if self._disk is not None:
+            self._disk[key] = fitness
+
+    def report(self, generation):
+        """
+        Logs the number of hits and misses of a generation.
+        :param generation: id of the generation
+        """
+        hits, misses = self.generation_stats.get(generation, (0, 0))
+        logger.info("Fitness cache in generation %s: %d hits, %d misses",
+                    generation, hits, misses)
+
+    def close(self):
+        """
+        Closes the on-disk storage, if any.
+        """
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, fitness):
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -10,6 +10,7 @@ class ParameterGroup:
     This class is a Dictionary which can be used to store parameters. It is
     used to fit the pypet already existing interface with the trajectory
     """
+    __slots__ = ('params',)
 
     def __init__(self):
         self.params = {}
@@ -31,10 +32,13 @@ class ParameterGroup:
         return self.params.__repr__()
 
     def __getstate__(self):
-        return self.__dict__
+        return {'params': self.params}
 
     def __setstate__(self, d):
-        self.__dict__.update(d)
+        # Also restores the instance dictionaries of groups pickled before
+        # the slots were introduced
+        for key, val in d.items():
+            setattr(self, key, val)
 
 
 class ResultGroup(sdictm):
@@ -132,8 +136,7 @@ class ParameterDict(sdictm):
         if attr == '__getstate__':
             raise AttributeError()
         if attr == 'ind_idx':
-            return [i[0] for i in self.trajectory.current_results].index(
-                self.trajectory.v_idx)
+            return self.trajectory.result_position(self.trajectory.v_idx)
         if attr in self._INSTANCE_VAR_LIST:
             return object.__getattribute__(self, attr)
         if '.' in attr:
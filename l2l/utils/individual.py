@@ -1,5 +1,190 @@
+import struct
+from collections.abc import MutableMapping
+
+import numpy as np
+
 from l2l.utils.groups import ParameterGroup
 
+_PREFIX = 'individual.'
+_DOUBLE = struct.Struct('d')
+
+
+class _Layout(object):
+    """
+    Names of the parameters of individuals, shared by all the individuals
+    with the same parameters, together with the tables from the names, e.g.
+    `individual.coords`, and the attribute names, e.g. `coords`, to the
+    position of the values in the individuals.
+    """
+    __slots__ = ('names', 'positions', 'attributes')
+
+    def __init__(self, names):
+        self.names = names
+        self.positions = {name: i for i, name in enumerate(names)}
+        self.attributes = {
+            name[len(_PREFIX):]: i for i, name in enumerate(names)
+            if isinstance(name, str) and name.startswith(_PREFIX)}
+
+    def __reduce__(self):
+        # The common 'individual.' prefix is left out of the pickle
+        if self.names and len(self.attributes) == len(self.names):
+            return (_get_prefixed_layout,
+                    (tuple(name[len(_PREFIX):] for name in self.names),))
+        return (_get_layout, (self.names,))
+
+
+# Layouts indexed by the tuple of the parameter names
+_LAYOUTS = {}
+
+
+def _get_layout(names):
+    layout = _LAYOUTS.get(names)
+    if layout is None:
+        layout = _LAYOUTS.setdefault(names, _Layout(names))
+    return layout
+
+
+def _get_prefixed_layout(attributes):
+    return _get_layout(tuple(_PREFIX + name for name in attributes))
+
+
+class _Packing(object):
+    """
+    How the float parameters of individuals with the same layout and shapes
+    are packed into bytes when pickled. Packings are shared like the
+    layouts, so that a list of individuals pickles the names and shapes once
+    and only refers to them for the following individuals.
+    """
+    __slots__ = ('layout', 'shapes', 'floats_only', '_slices')
+
+    def __init__(self, layout, shapes):
+        """
+        :param layout: the :class:`_Layout` of the individuals
+        :param shapes: for each parameter, the shape of the array, None for
+                       a Python float or 0 for a numpy float64
+        """
+        self.layout = layout
+        self.shapes = shapes
+        self.floats_only = all(shape is None for shape in shapes)
+        self._slices = []
+        start = 0
+        for shape in shapes:
+            stop = start + (int(np.prod(shape, dtype=int)) if shape else 1)
+            self._slices.append((shape, start, stop))
+            start = stop
+
+    def __reduce__(self):
+        layout = self.layout
+        if layout.names and len(layout.attributes) == len(layout.names):
+            return (_get_prefixed_packing,
+                    (tuple(name[len(_PREFIX):] for name in layout.names),
+                     self.shapes))
+        return (_get_packing, (layout, self.shapes))
+
+    def unpack(self, data):
+        """
+        Returns the list of the values packed into `data`.
+        """
+        flat = np.frombuffer(data, dtype=np.float64)
+        if self.floats_only:
+            return flat.tolist()
+        flat = flat.copy()
+        values = []
+        for shape, start, stop in self._slices:
+            if shape is None:
+                values.append(float(flat[start]))
+            elif shape == 0:
+                values.append(flat[start])
+            elif len(shape) == 1:
+                values.append(flat[start:stop])
+            else:
+                values.append(flat[start:stop].reshape(shape))
+        return values
+
+
+# Packings indexed by the layout and the shapes
+_PACKINGS = {}
+
+
+def _get_packing(layout, shapes):
+    key = (layout, shapes)
+    packing = _PACKINGS.get(key)
+    if packing is None:
+        packing = _PACKINGS.setdefault(key, _Packing(layout, shapes))
+    return packing
+
+
+def _get_prefixed_packing(attributes, shapes):
+    return _get_packing(_get_prefixed_layout(attributes), shapes)
+
+
+# Attributes of the individuals, which are never looked up in the parameters
+_ATTRIBUTES = frozenset(['params', 'generation', 'ind_idx', 'keys'])
+
+
+def _rebuild_individual(generation, ind_idx, packing, data):
+    """
+    Rebuilds an individual pickled by :meth:`Individual.__reduce__`.
+    :param generation: ID of the generation of the individual
+    :param ind_idx: index of the individual
+    :param packing: the :class:`_Packing` of the float parameters packed
+                    into `data`, or the :class:`_Layout` of the individual
+                    if the parameters are not packed
+    :param data: bytes with the float64 values of the packed parameters, or
+                 the tuple of the values if they are not packed
+    :return: the individual
+    """
+    if isinstance(packing, _Layout):
+        return Individual._from_layout(generation, ind_idx, packing,
+                                       list(data))
+    return Individual._from_layout(generation, ind_idx, packing.layout,
+                                   packing.unpack(data))
+
+
+class _ParamsView(MutableMapping):
+    """
+    The `params` of an individual: a dictionary-like view of its names and
+    values, which writes through to the individual.
+    """
+    __slots__ = ('_individual',)
+
+    def __init__(self, individual):
+        self._individual = individual
+
+    def __getitem__(self, key):
+        individual = self._individual
+        return individual._values[individual._layout.positions[key]]
+
+    def __setitem__(self, key, val):
+        self._individual.f_add_parameter(key, val)
+
+    def __delitem__(self, key):
+        individual = self._individual
+        position = individual._layout.positions[key]
+        names = list(individual._layout.names)
+        del names[position]
+        individual._layout = _get_layout(tuple(names))
+        del individual._values[position]
+
+    def __contains__(self, key):
+        return key in self._individual._layout.positions
+
+    def __iter__(self):
+        return iter(self._individual._layout.names)
+
+    def __len__(self):
+        return len(self._individual._values)
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def __reduce__(self):
+        # Pickled as a plain dictionary
+        return (dict, (list(self.items()),))
+
 
 class Individual(ParameterGroup):
     """
@@ -7,7 +192,12 @@ class Individual(ParameterGroup):
     from a Parameter group.
     The main elements which make an individual are the ID of its generation,
     its individual ID and the params specific for its run.
+    The values of the parameters are kept in a list, and their names in a
+    layout shared by the individuals with the same parameters, which also
+    maps the attribute names to the values. `params` is a view of the names
+    and values which writes through to the individual.
     """
+    __slots__ = ('generation', 'ind_idx', '_layout', '_values')
 
     def __init__(self, generation=0, ind_idx=0, params=[]):
         """
@@ -18,46 +208,294 @@ class Individual(ParameterGroup):
         :param params: individual parameters which are used to execute the
                        optimizee simulate function
         """
-        super(ParameterGroup, self).__init__()
-        self.params = {}
+        self._layout = _get_layout(())
+        self._values = []
         for i in params:
             k = list(i.keys())[0]
             self.f_add_parameter(k, i[k])
         self.generation = generation
         self.ind_idx = ind_idx
 
+    @classmethod
+    def _from_layout(cls, generation, ind_idx, layout, values):
+        ind = cls.__new__(cls)
+        ind.generation = generation
+        ind.ind_idx = ind_idx
+        ind._layout = layout
+        ind._values = values
+        return ind
+
+    @property
+    def params(self):
+        """
+        Dictionary-like view of the parameters of the individual. Changes
+        made through it are changes of the individual.
+        """
+        return _ParamsView(self)
+
+    @params.setter
+    def params(self, params):
+        self._layout = _get_layout(tuple(params.keys()))
+        self._values = list(params.values())
+
+    def f_add_parameter(self, key, val, comment=""):
+        """
+        Adds parameter with name key and value val
+        :param key: Name of the parameter
+        :param val: Value of the parameter
+        :param comment: Ignored for the moment
+        """
+        position = self._layout.positions.get(key)
+        if position is not None:
+            self._values[position] = val
+        else:
+            self._layout = _get_layout(self._layout.names + (key,))
+            self._values.append(val)
+
+    def _items(self):
+        """
+        Returns the list of tuples (name, value) of the parameters
+        """
+        return list(zip(self._layout.names, self._values))
+
     def __getattr__(self, attr):
-        if attr == 'keys':
-            return self.params.keys()
-        ret = self.params.get('individual.' + attr)
-        return ret
+        # Prevents recursions while the slots are not set, e.g. when
+        # unpickling
+        if attr == '_layout':
+            raise AttributeError(attr)
+        position = self._layout.attributes.get(attr)
+        if position is not None:
+            return self._values[position]
+        # Private and special attributes are never parameters
+        if attr[:1] == '_' or attr in _ATTRIBUTES:
+            if attr == 'keys':
+                return self.params.keys()
+            raise AttributeError(attr)
+        return None
 
     def __getitem__(self, key):
         return self.__getattr__(key)
 
-    def __getstate__(self):
-        return self.__dict__
+    def __reduce__(self):
+        """
+        Pickles the individual compactly: float parameters are packed into a
+        single bytes object, and the names and shapes are referred to
+        through a packing shared by the individuals with the same
+        parameters, so that pickling a list of individuals stores them once.
+        """
+        values = self._values
+        shapes = []
+        for value in values:
+            if type(value) is float:
+                shapes.append(None)
+            elif type(value) is np.float64:
+                shapes.append(0)
+            elif isinstance(value, np.ndarray) and \
+                    value.dtype == np.float64:
+                shapes.append(value.shape)
+            else:
+                # Other types are pickled as they are
+                return (_rebuild_individual,
+                        (self.generation, self.ind_idx, self._layout,
+                         tuple(values)))
+        data = b''.join(_DOUBLE.pack(value) if type(value) is float
+                        else value.tobytes() for value in values)
+        return (_rebuild_individual,
+                (self.generation, self.ind_idx,
+                 _get_packing(self._layout, tuple(shapes)), data))
 
     def __setstate__(self, d):
-        self.__dict__.update(d)
+        # Individuals pickled before the slots were introduced
+        for key, val in d.items():
+            setattr(self, key, val)
 
     def copy(self):
-        ind = Individual(self.generation, self.ind_idx)
-        ind.params = self.params.copy()
-        return ind
+        return Individual(self.generation, self.ind_idx,
+                          [{key: val} for key, val in self._items()])
 
     def __repr__(self):
         return self.__str__()
 
     def __str__(self):
         s = ""
-        for k in sorted(self.params.keys()):
-            s += "{}: {:10.4f}, ".format(k, self.params[k])
+        for k, v in sorted(self._items()):
+            s += "{}: {:10.4f}, ".format(k, v)
 
         return "{%s}" % (s[:-2])
 
     def tolist(self):
-        return [self.params[k] for k in sorted(self.params.keys())]
+        return [v for _, v in sorted(self._items())]
 
     def todict(self):
-        return {k: self.params[k] for k in sorted(self.params.keys())}
+        return dict(sorted(self._items()))
+
+
+def _is_float_value(value):
+    """
+    Checks if a parameter value can be stored in a float64 column without
+    changing its type: a float scalar or a float64 array of at least one
+    dimension.
+    """
+    if isinstance(value, np.ndarray):
+        return value.dtype == np.float64 and value.ndim > 0
+    return isinstance(value, float)
+
+
+class Population(object):
+    """
+    Columnar storage of the individuals of a generation. The parameters of
+    all the individuals are held in a single contiguous 2-D float64 array,
+    with one row per individual and the parameters flattened next to each
+    other, sorted by name. The rows have therefore the same layout as the
+    lists returned by :func:`~l2l.dict_to_list` for one-dimensional
+    parameters.
+    Population behaves as the list of individuals it replaces: indexing and
+    iterating returns :class:`Individual` objects whose values are read-only
+    views of the rows, which are only created when accessed.
+    """
+
+    def __init__(self, generation, ind_indices, names, shapes, data):
+        """
+        :param generation: ID of the generation of the individuals
+        :param ind_indices: array with the ind_idx of each row
+        :param names: sorted names of the parameters
+        :param shapes: shape of each parameter, () for scalars
+        :param data: 2-D float64 array with one row per individual
+        """
+        self.generation = generation
+        self.ind_indices = np.asarray(ind_indices, dtype=int)
+        self.names = list(names)
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.data = data
+        # The rows are shared by the views of the individuals
+        self.data.flags.writeable = False
+        self._slices = []
+        start = 0
+        for shape in self.shapes:
+            stop = start + int(np.prod(shape, dtype=int))
+            self._slices.append(slice(start, stop))
+            start = stop
+        self._layout = _get_layout(tuple(self.names))
+        assert data.shape == (len(self.ind_indices), start), \
+            "The population array does not match the parameter shapes"
+
+    @classmethod
+    def from_params(cls, generation, ind_indices, params):
+        """
+        Builds a population from the parameter lists given to
+        :meth:`~l2l.utils.trajectory.Trajectory.f_expand`.
+        :param generation: ID of the generation of the individuals
+        :param ind_indices: the ind_idx of each individual
+        :param params: dictionary with a list of values, one per individual,
+                       for each parameter name
+        :return: the population, or None if some parameter is not a float
+                 scalar or a float64 array of the same shape for all the
+                 individuals, in which case a list of
+                 :class:`Individual` has to be used instead
+        """
+        ind_indices = list(ind_indices)
+        names = sorted(params.keys())
+        return cls._from_values(
+            generation, ind_indices, names,
+            ([params[name][i] for i in ind_indices] for name in names))
+
+    @classmethod
+    def from_dicts(cls, generation, dicts, prefix=''):
+        """
+        Builds a population directly from a list of Individual-Dicts, e.g.
+        the `eval_pop` of an optimizer. The ind_idx of the individuals are
+        their positions in the list.
+        :param generation: ID of the generation of the individuals
+        :param dicts: list of Individual-Dicts, all with the same keys
+        :param prefix: prefix added to the keys to get the parameter names,
+                       e.g. 'individual.'
+        :return: the population, or None under the same conditions as
+                 :meth:`from_params`
+        """
+        if not dicts:
+            return None
+        keys = sorted(dicts[0].keys())
+        # Adding a common prefix keeps the names sorted
+        return cls._from_values(
+            generation, range(len(dicts)), [prefix + key for key in keys],
+            ([d[key] for d in dicts] for key in keys))
+
+    @classmethod
+    def _from_values(cls, generation, ind_indices, names, value_lists):
+        """
+        Stacks the values of each parameter into the population array.
+        :param value_lists: iterable with, for each name, the list of the
+                            values of all the individuals
+        """
+        if not len(ind_indices) or not names:
+            return None
+        columns = []
+        shapes = []
+        for values in value_lists:
+            if not all(map(_is_float_value, values)):
+                return None
+            try:
+                column = np.asarray(values, dtype=np.float64)
+            except ValueError:
+                # Arrays of different shapes
+                return None
+            shapes.append(column.shape[1:])
+            columns.append(column.reshape(len(ind_indices), -1))
+        return cls(generation, ind_indices, names, shapes,
+                   np.hstack(columns))
+
+    def individual(self, row):
+        """
+        Returns the individual of a row. Its array parameters are read-only
+        views into the population array.
+        :param row: position of the individual in the population
+        :return: the :class:`Individual`
+        """
+        row_data = self.data[row]
+        values = []
+        for shape, columns in zip(self.shapes, self._slices):
+            if shape:
+                values.append(row_data[columns].reshape(shape))
+            else:
+                values.append(row_data[columns.start])
+        return Individual._from_layout(
+            self.generation, int(self.ind_indices[row]), self._layout, values)
+
+    def column(self, name):
+        """
+        Returns the values of a parameter for all the individuals.
+        :param name: name of the parameter
+        :return: read-only array of shape (n_individuals,) + parameter shape
+        """
+        i = self.names.index(name)
+        return self.data[:, self._slices[i]].reshape(
+            (len(self),) + self.shapes[i])
+
+    def __len__(self):
+        return len(self.ind_indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("population index out of range")
+        return self.individual(index)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.individual(row)
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        del d['_layout']
+        return d
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+        self._layout = _get_layout(tuple(self.names))
+
+    def __repr__(self):
+        return "Population(generation={}, size={}, parameters={})".format(
+            self.generation, len(self), self.names)
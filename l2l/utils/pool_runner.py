@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+
+logger = logging.getLogger("utils.PoolRunner")
+
+# These globals only exist inside the worker processes. They are set once by
+# the pool initializer so that the optimizee does not have to be sent along
+# with every individual.
+_worker_runfunc = None
+_worker_trajectory = None
+
+
+def _init_worker(runfunc, trajectory):
+    """
+    Initializer of the pool worker processes. Stores the function to be run
+    and the trajectory used to pass the individuals to it.
+    :param runfunc: The function to be called from the optimizee
+    :param trajectory: A static copy of the trajectory (see
+                       :meth:`~l2l.utils.trajectory.Trajectory.static_copy`)
+    """
+    global _worker_runfunc, _worker_trajectory
+    _worker_runfunc = runfunc
+    _worker_trajectory = trajectory
+
+
+def _run_individual(individual):
+    """
+    Executes the optimizee on one individual inside a worker process.
+    :param individual: the individual to evaluate
+    :return: a tuple (ind_idx, fitness)
+    """
+    _worker_trajectory.individual = individual
+    fitness = _worker_runfunc(_worker_trajectory)
+    return individual.ind_idx, fitness
+
+
+class PoolRunner(object):
+    """
+    PoolRunner evaluates the individuals of a generation on a pool of
+    persistent local worker processes. The optimizee (through the function
+    passed as `runfunc`) and the static parameters of the trajectory are
+    shipped to each worker only once, when the pool is started. Afterwards
+    only the individuals are sent to the workers and the fitnesses are sent
+    back.
+    """
+
+    def __init__(self, trajectory, runfunc, n_processes):
+        """
+        Starts the pool of worker processes.
+
+        :param trajectory: A trajectory object holding the parameters which
+                           are passed to the optimizee
+        :param runfunc: The function to be called from the optimizee
+        :param n_processes: Number of worker processes to start
+        """
+        self.n_processes = n_processes
+        self.pool = multiprocessing.Pool(
+            n_processes, initializer=_init_worker,
+            initargs=(runfunc, trajectory.static_copy()))
+        logger.info("Started pool of %d worker processes", n_processes)
+
+    def run(self, trajectory, generation):
+        """
+        Evaluates all the individuals of a generation in the pool.
+        :param trajectory: trajectory object storing individual parameters
+                           for each generation
+        :param generation: id of the generation
+        :return results: a list of tuples (ind_idx, fitness) in the same order
+                         as the individuals of the generation
+        """
+        individuals = trajectory.individuals[generation]
+        # A few chunks per process keeps the load balanced while reducing the
+        # number of messages exchanged with the workers
+        chunksize = max(1, len(individuals) // (4 * self.n_processes))
+        logger.info("Pool running generation: " + str(generation))
+        return list(self.pool.imap(_run_individual, individuals, chunksize))
+
+    def submit(self, individual, callback, error_callback):
+        """
+        Schedules the evaluation of a single individual without waiting for
+        it to finish. Used by the asynchronous mode of the environment.
+        :param individual: the individual to evaluate
+        :param callback: called in the master process with the tuple
+                         (ind_idx, fitness) once the evaluation finished
+        :param error_callback: called in the master process with the
+                               exception raised by a failed evaluation
+        """
+        self.pool.apply_async(_run_individual, (individual,),
+                              callback=callback,
+                              error_callback=error_callback)
+
+    def close(self, terminate=False):
+        """
+        Stops the worker processes.
+        :param terminate: If True, the workers are stopped without waiting
+                          for pending work to finish
+        """
+        if terminate:
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
@@ -0,0 +1,381 @@
+import logging
+import os
+import time
+
+import numpy as np
+
+from l2l.utils.individual import Population
+
+logger = logging.getLogger("utils.ResultTable")
+
+_PREFIX = 'individual.'
+
+
+class ResultTable(object):
+    """
+    ResultTable holds one row per evaluated individual in a preallocated
+    structured numpy array, with the fields:
+
+    * `generation` and `ind_idx` of the individual
+    * `fitness`, the raw fitness vector returned by the optimizee
+    * `weighted_fitness`, the dot product of the fitness with the fitness
+      weights of the optimizer, NaN if they are not known
+    * `wall_time`, the time (as returned by :func:`time.time`) at which the
+      fitness was received
+    * `params`, only with `store_params`, the float parameters of the
+      individual flattened in the order of :attr:`param_layout`, NaN if they
+      can not be stored as floats. Without `store_params` the field has no
+      columns
+
+    Rows are appended in bulk, a generation at a time, and the array grows by
+    doubling its capacity. With a path, the array is a memory-mapped .npy
+    file instead, so that its rows do not stay resident. The queries
+    (:meth:`best`, :meth:`generation_stats`, :meth:`region`, ...) run on the
+    whole array with numpy operations.
+    """
+
+    def __init__(self, store_params=False, path=None, initial_bytes=1 << 20):
+        """
+        :param store_params: If True, the parameters of the individuals are
+                             stored as well, which makes the rows as large as
+                             the individuals
+        :param path: If given, path of the .npy file holding the rows
+        :param initial_bytes: size of the array allocated by the first
+                              append. It holds at least the rows appended
+        """
+        self.store_params = store_params
+        self.path = path
+        self.initial_bytes = initial_bytes
+        #: List of tuples (name, shape) of the parameters, as in the
+        #: Individual-Dicts, set by the first rows holding parameters
+        self.param_layout = None
+        self._slices = {}
+        self._data = None
+        self._size = 0
+        self._warned = False
+
+    @property
+    def rows(self):
+        """
+        Read-only view of the rows of the table, a structured array
+        """
+        if self._data is None:
+            return np.zeros(0, self._dtype(0, 0))
+        rows = self._data[:self._size]
+        rows.flags.writeable = False
+        return rows
+
+    def __len__(self):
+        return self._size
+
+    def append(self, generation, ind_indices, fitnesses, weighted_fitnesses,
+               wall_time=None, params=None, param_layout=None):
+        """
+        Appends the results of several individuals.
+        :param generation: id of the generation of the individuals
+        :param ind_indices: the ind_idx of each individual
+        :param fitnesses: the fitness of each individual, tuples or a 2-D
+                          array with one row per individual
+        :param weighted_fitnesses: the weighted fitness of each individual,
+                                   or None if not known
+        :param wall_time: time at which the fitnesses were received, now if
+                          None
+        :param params: If given, 2-D array with the flattened parameters of
+                       each individual
+        :param param_layout: list of tuples (name, shape) describing the
+                             columns of `params`
+        """
+        ind_indices = np.asarray(ind_indices, dtype=np.int64)
+        n_rows = len(ind_indices)
+        if n_rows == 0:
+            return
+        fitnesses = np.asarray(fitnesses, dtype=np.float64).reshape(
+            n_rows, -1)
+        if not self.store_params:
+            params = None
+        if params is not None:
+            params = np.asarray(params, dtype=np.float64).reshape(n_rows, -1)
+            if self._data is None:
+                self._set_layout(param_layout)
+            elif self.param_layout is None or \
+                    list(param_layout) != self.param_layout:
+                self._warn("The parameters of generation %s do not match "
+                           "those of the table and are not stored",
+                           generation)
+                params = None
+        if self._data is None:
+            dtype = self._dtype(fitnesses.shape[1], self._n_params())
+            self._data = self._allocate(self._initial_rows(dtype, n_rows),
+                                        dtype)
+        elif fitnesses.shape[1] != self._data.dtype['fitness'].shape[0]:
+            raise Exception("The fitnesses of generation %s do not have the "
+                            "dimension of the table" % generation)
+        self._reserve(self._size + n_rows)
+
+        rows = self._data[self._size:self._size + n_rows]
+        rows['generation'] = generation
+        rows['ind_idx'] = ind_indices
+        rows['fitness'] = fitnesses
+        rows['weighted_fitness'] = np.nan if weighted_fitnesses is None \
+            else weighted_fitnesses
+        rows['wall_time'] = time.time() if wall_time is None else wall_time
+        rows['params'] = np.nan if params is None else params
+        self._size += n_rows
+
+    def append_results(self, generation, results, individuals,
+                       fitness_weights=None, wall_time=None):
+        """
+        Appends the results of a generation as returned by the evaluation of
+        the :class:`~l2l.utils.environment.Environment`.
+        :param generation: id of the generation
+        :param results: list of tuples (ind_idx, fitness)
+        :param individuals: the individuals of the generation, a
+                            :class:`~l2l.utils.individual.Population` or a
+                            list of :class:`~l2l.utils.individual.Individual`
+        :param fitness_weights: the fitness weights of the optimizer, if known
+        :param wall_time: time at which the fitnesses were received, now if
+                          None
+        """
+        if not results:
+            return
+        ind_indices = np.array([result[0] for result in results],
+                               dtype=np.int64)
+        fitnesses = np.array([np.ravel(result[1]) for result in results],
+                             dtype=np.float64)
+        weighted_fitnesses = None
+        if fitness_weights is not None and \
+                len(fitness_weights) == fitnesses.shape[1]:
+            weighted_fitnesses = fitnesses.dot(
+                np.asarray(fitness_weights, dtype=np.float64))
+
+        params = None
+        param_layout = None
+        if not self.store_params:
+            population = None
+        elif isinstance(individuals, Population):
+            population = individuals
+            row_ids = individuals.ind_indices
+        else:
+            population = Population.from_dicts(
+                generation, [ind.params for ind in individuals])
+            row_ids = np.array([ind.ind_idx for ind in individuals])
+        if population is not None:
+            param_layout = [
+                (name[len(_PREFIX):] if name.startswith(_PREFIX) else name,
+                 shape)
+                for name, shape in zip(population.names, population.shapes)]
+            if np.array_equal(row_ids, ind_indices):
+                params = population.data
+            else:
+                positions = {ind_idx: i for i, ind_idx in enumerate(row_ids)}
+                params = population.data[
+                    [positions[ind_idx] for ind_idx in ind_indices.tolist()]]
+        self.append(generation, ind_indices, fitnesses, weighted_fitnesses,
+                    wall_time, params, param_layout)
+
+    def extend(self, other):
+        """
+        Appends the rows of another table with the same layout, e.g. one
+        returned by :meth:`select`.
+        :param other: the :class:`ResultTable`
+        """
+        rows = other.rows
+        if not len(rows):
+            return
+        if self._data is None:
+            if other.param_layout is not None:
+                self._set_layout(other.param_layout)
+            self._data = self._allocate(
+                self._initial_rows(rows.dtype, len(rows)), rows.dtype)
+        elif rows.dtype != self._data.dtype:
+            raise Exception("Only tables with the same layout can be merged")
+        self._reserve(self._size + len(rows))
+        self._data[self._size:self._size + len(rows)] = rows
+        self._size += len(rows)
+
+    def select(self, generation):
+        """
+        Returns a new table holding the rows of one generation.
+        :param generation: id of the generation
+        :return: the :class:`ResultTable`
+        """
+        rows = self.generation(generation)
+        table = ResultTable(store_params=self.store_params)
+        table.param_layout = self.param_layout
+        table._slices = self._slices
+        if len(rows):
+            table._data = rows.copy()
+            table._size = len(rows)
+        return table
+
+    def generation(self, generation):
+        """
+        Returns the rows of one generation.
+        :param generation: id of the generation
+        :return: structured array of the rows
+        """
+        rows = self.rows
+        return rows[rows['generation'] == generation]
+
+    def best(self, k=1):
+        """
+        Returns the rows of the k individuals with the highest weighted
+        fitness, over all the generations.
+        :param k: number of individuals
+        :return: structured array of the rows, from the best
+        """
+        rows = self.rows
+        rows = rows[~np.isnan(rows['weighted_fitness'])]
+        if k < len(rows):
+            rows = rows[np.argpartition(-rows['weighted_fitness'], k - 1)[:k]]
+        return rows[np.argsort(-rows['weighted_fitness'], kind='mergesort')]
+
+    def generation_stats(self):
+        """
+        Computes statistics of the weighted fitness of each generation.
+        :return: structured array with one row per generation and the fields
+                 generation, n_runs, best, mean, std and worst
+        """
+        rows = self.rows
+        order = np.argsort(rows['generation'], kind='mergesort')
+        generations = rows['generation'][order]
+        fitness = rows['weighted_fitness'][order]
+        ids, starts, counts = np.unique(generations, return_index=True,
+                                        return_counts=True)
+        stats = np.zeros(len(ids), [('generation', np.int64),
+                                    ('n_runs', np.int64),
+                                    ('best', np.float64),
+                                    ('mean', np.float64),
+                                    ('std', np.float64),
+                                    ('worst', np.float64)])
+        if not len(ids):
+            return stats
+        stats['generation'] = ids
+        stats['n_runs'] = counts
+        stats['best'] = np.maximum.reduceat(fitness, starts)
+        stats['worst'] = np.minimum.reduceat(fitness, starts)
+        mean = np.add.reduceat(fitness, starts) / counts
+        stats['mean'] = mean
+        variance = np.add.reduceat(fitness ** 2, starts) / counts - mean ** 2
+        stats['std'] = np.sqrt(np.maximum(variance, 0.))
+        return stats
+
+    def column(self, name):
+        """
+        Returns the values of a parameter in all the rows.
+        :param name: name of the parameter, as in the Individual-Dicts
+        :return: array of shape (n_rows,) + shape of the parameter
+        """
+        if not self.store_params:
+            raise Exception("The parameters are not stored in the result "
+                            "table")
+        if name not in self._slices:
+            raise KeyError(name)
+        columns, shape = self._slices[name]
+        return self.rows['params'][:, columns].reshape((len(self),) + shape)
+
+    def region(self, bounds):
+        """
+        Returns the fitness history of a region of the parameter space, i.e.
+        the rows of the individuals whose parameters are within bounds,
+        ordered by generation.
+        :param bounds: dictionary of tuples (lower, upper) indexed by
+                       parameter name. For an array parameter, the bounds
+                       apply to every element and can be arrays. Parameters
+                       that are not given are not constrained
+        :return: structured array of the rows
+        """
+        rows = self.rows
+        mask = np.ones(len(rows), dtype=bool)
+        for name, (lower, upper) in bounds.items():
+            values = self.column(name).reshape(len(rows), -1)
+            lower = np.ravel(lower)
+            upper = np.ravel(upper)
+            mask &= np.all((values >= lower) & (values <= upper), axis=1)
+        rows = rows[mask]
+        return rows[np.argsort(rows['generation'], kind='mergesort')]
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        # Only the used rows are stored, in memory
+        d['path'] = None
+        if self._data is not None:
+            d['_data'] = self._data[:self._size].copy()
+        return d
+
+    def __setstate__(self, d):
+        self.__dict__.update(d)
+
+    def __repr__(self):
+        return "ResultTable(rows={}, parameters={})".format(
+            self._size, [name for name, _ in self.param_layout or []])
+
+    def _dtype(self, n_objectives, n_params):
+        return np.dtype([('generation', np.int64),
+                         ('ind_idx', np.int64),
+                         ('fitness', np.float64, (n_objectives,)),
+                         ('weighted_fitness', np.float64),
+                         ('wall_time', np.float64),
+                         ('params', np.float64, (n_params,))])
+
+    def _set_layout(self, param_layout):
+        self.param_layout = [(name, tuple(shape))
+                             for name, shape in param_layout]
+        start = 0
+        for name, shape in self.param_layout:
+            stop = start + int(np.prod(shape, dtype=int))
+            self._slices[name] = (slice(start, stop), shape)
+            start = stop
+
+    def _n_params(self):
+        if not self._slices:
+            return 0
+        return max(columns.stop for columns, _ in self._slices.values())
+
+    def _initial_rows(self, dtype, n_rows):
+        return max(self.initial_bytes // dtype.itemsize, n_rows, 1)
+
+    def _reserve(self, size):
+        if size <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < size:
+            capacity *= 2
+        data = self._allocate(capacity, self._data.dtype, self._data)
+        self._data = data
+
+    def _allocate(self, capacity, dtype, old_data=None):
+        """
+        Allocates the array of the rows, in memory or in the file of the
+        table, and copies the used rows of `old_data` into it
+        """
+        if self.path is None:
+            data = np.zeros(capacity, dtype)
+        else:
+            # The rows are copied to a new file, which replaces the former one
+            temporary_path = self.path + '.tmp'
+            data = np.lib.format.open_memmap(temporary_path, mode='w+',
+                                             dtype=dtype, shape=(capacity,))
+        if old_data is not None:
+            data[:self._size] = old_data[:self._size]
+        if self.path is not None:
+            data.flush()
+            os.replace(temporary_path, self.path)
+        return data
+
+    def move_to_file(self, path):
+        """
+        Moves the rows of the table to a memory-mapped .npy file, which holds
+        the rows appended afterwards as well.
+        :param path: path of the file
+        """
+        self.path = path
+        if self._data is not None:
+            self._data = self._allocate(len(self._data), self._data.dtype,
+                                        self._data)
+
+    def _warn(self, message, *args):
+        # The mismatch is reported once, not for every generation
+        if not self._warned:
+            logger.warning(message, *args)
+            self._warned = True
@@ -0,0 +1,51 @@
+import os
+import pickle
+import struct
+
+# Every record is a header with the index of the individual and the size of
+# the pickled result, followed by the pickled result
+_RECORD_HEADER = struct.Struct('<qQ')
+
+
+def append_result(path, ind_idx, result):
+    """
+    Appends the result of one individual to a results file shared by all the
+    individuals of a generation. The record is written with a single write
+    call on a file opened in append mode, so records written concurrently by
+    several processes do not interleave on local and POSIX compliant
+    parallel filesystems.
+    :param path: path of the results file
+    :param ind_idx: index of the individual
+    :param result: the result of the individual, it must be picklable
+    """
+    data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    record = _RECORD_HEADER.pack(ind_idx, len(data)) + data
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        written = os.write(fd, record)
+    finally:
+        os.close(fd)
+    if written != len(record):
+        raise Exception("Incomplete write of the result of individual "
+                        "%d to %s" % (ind_idx, path))
+
+
+def read_results(path):
+    """
+    Reads all the results written to a results file by :func:`append_result`
+    :param path: path of the results file
+    :return: dictionary of the results indexed by the individual index
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    results = {}
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(data):
+        ind_idx, size = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        if offset + size > len(data):
+            # Record still being written
+            break
+        results[ind_idx] = pickle.loads(data[offset:offset + size])
+        offset += size
+    return results
@@ -0,0 +1,126 @@
+import itertools
+import logging
+import os
+import pickle
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from l2l.utils.individual import Population
+
+logger = logging.getLogger("utils.spill")
+
+
+class SpillingDict(MutableMapping):
+    """
+    SpillingDict is a dictionary of per generation values, e.g. the
+    individuals or the results of the generations, whose entries can be
+    spilled to files in a directory to bound the memory used by long runs.
+    Spilled entries are loaded back whenever they are accessed, so that the
+    dictionary behaves as if they were still in memory.
+    The float parameters of a :class:`~l2l.utils.individual.Population` are
+    written to a .npy file and loaded back as a read-only memory-mapped
+    array. Other values are pickled.
+    A spilled entry is loaded again on every access and is not kept in
+    memory, so changes made to a loaded value are not stored.
+    """
+
+    def __init__(self, path, name, resident=None):
+        """
+        :param path: directory where the spilled entries are written
+        :param name: prefix of the files of the entries
+        :param resident: dictionary with the initial entries, kept in memory
+        """
+        self.path = path
+        self.name = name
+        self._resident = dict(resident or {})
+        self._spilled = set()
+        os.makedirs(path, exist_ok=True)
+
+    def spill(self, key):
+        """
+        Writes an entry to disk and removes it from memory.
+        :param key: key of the entry, e.g. the generation
+        """
+        value = self._resident.pop(key)
+        if isinstance(value, Population):
+            np.save(self._file(key, '.npy'), value.data)
+            header = ('population', value.generation, value.ind_indices,
+                      value.names, value.shapes)
+        else:
+            header = ('pickle', value)
+        with open(self._file(key, '.pkl'), 'wb') as handle:
+            pickle.dump(header, handle, pickle.HIGHEST_PROTOCOL)
+        self._spilled.add(key)
+        logger.debug("Spilled %s of generation %s to %s", self.name, key,
+                     self.path)
+
+    def spill_older_than(self, key):
+        """
+        Spills all the entries in memory whose key is lower than `key`.
+        :param key: the lowest key kept in memory
+        """
+        for old_key in [k for k in self._resident if k < key]:
+            self.spill(old_key)
+
+    def is_spilled(self, key):
+        """
+        :param key: key of an entry
+        :return: True if the entry is on disk
+        """
+        return key in self._spilled
+
+    def _file(self, key, extension):
+        return os.path.join(self.path,
+                            '{}_{}{}'.format(self.name, key, extension))
+
+    def _load(self, key):
+        with open(self._file(key, '.pkl'), 'rb') as handle:
+            header = pickle.load(handle)
+        if header[0] == 'population':
+            _, generation, ind_indices, names, shapes = header
+            return Population(generation, ind_indices, names, shapes,
+                              np.load(self._file(key, '.npy'),
+                                      mmap_mode='r'))
+        return header[1]
+
+    def __getitem__(self, key):
+        if key in self._resident:
+            return self._resident[key]
+        if key in self._spilled:
+            return self._load(key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._resident[key] = value
+        self._remove_spilled(key)
+
+    def __delitem__(self, key):
+        if key in self._resident:
+            del self._resident[key]
+        elif key in self._spilled:
+            self._remove_spilled(key)
+        else:
+            raise KeyError(key)
+
+    def _remove_spilled(self, key):
+        if key not in self._spilled:
+            return
+        self._spilled.discard(key)
+        for extension in ('.pkl', '.npy'):
+            if os.path.isfile(self._file(key, extension)):
+                os.remove(self._file(key, extension))
+
+    def __contains__(self, key):
+        return key in self._resident or key in self._spilled
+
+    def __iter__(self):
+        # The spilled entries are the oldest ones
+        return itertools.chain(sorted(self._spilled), list(self._resident))
+
+    def __len__(self):
+        return len(self._resident) + len(self._spilled)
+
+    def __repr__(self):
+        return "SpillingDict(path={!r}, resident={}, spilled={})".format(
+            self.path, sorted(self._resident), sorted(self._spilled))
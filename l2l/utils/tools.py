@@ -36,7 +36,7 @@
 # *
 # ***************************************************************************************/
 
-import itertools as itools
+import numpy as np
 
 
 def cartesian_product(parameter_dict, combined_parameters=()):
@@ -76,21 +76,25 @@ def cartesian_product(parameter_dict, combined_parameters=()):
         if isinstance(item, str):
             combined_parameters[idx] = (item,)
 
-    iterator_list = []
-    for item_tuple in combined_parameters:
-        inner_iterator_list = [parameter_dict[key] for key in item_tuple]
-        zipped_iterator = zip(*inner_iterator_list)
-        iterator_list.append(zipped_iterator)
-
     result_dict = {}
     for key in parameter_dict:
         result_dict[key] = []
-
-    cartesian_iterator = itools.product(*iterator_list)
-
-    for cartesian_tuple in cartesian_iterator:
-        for idx, item_tuple in enumerate(combined_parameters):
-            for inneridx, key in enumerate(item_tuple):
-                result_dict[key].append(cartesian_tuple[idx][inneridx])
+    if not combined_parameters:
+        return result_dict
+
+    # Linked parameters are zipped, i.e. truncated to the shortest of them
+    value_lists = [[list(parameter_dict[key]) for key in item_tuple]
+                   for item_tuple in combined_parameters]
+    sizes = [min(len(values) for values in inner_lists)
+             for inner_lists in value_lists]
+
+    # Row i holds the position in each tuple of parameters of the i-th
+    # combination, the last tuple varying fastest as with itertools.product
+    positions = np.indices(sizes).reshape(len(sizes), -1)
+
+    for item_tuple, inner_lists, item_positions in zip(
+            combined_parameters, value_lists, positions.tolist()):
+        for key, values in zip(item_tuple, inner_lists):
+            result_dict[key] = [values[i] for i in item_positions]
 
     return result_dict
@@ -1,6 +1,8 @@
 import time
+import numpy as np
 from l2l.utils.groups import ParameterGroup, ResultGroup, ParameterDict
-from l2l.utils.individual import Individual
+from l2l.utils.individual import Individual, Population
+from l2l.utils.result_table import ResultTable
 import logging
 
 logging = logging.getLogger("Trajectory")
@@ -30,6 +32,8 @@ class Trajectory:
         self._parameters.parameter_group = {}
         self._parameters.parameter = {}
         self.individuals = {}
+        # One row per evaluated individual, filled by the environment
+        self.result_table = ResultTable()
         self.v_idx = 0
 
     def copy(self):
@@ -45,10 +49,94 @@ class Trajectory:
         t.results = cp(self._results)
         t.current_results = cp(self.current_results)
         t.individuals = cp(self.individuals)
+        t.result_table = cp(self.result_table)
         t.v_idx = cp(self.v_idx)
 
         return t
 
+    def static_copy(self):
+        """
+        Returns a light copy of the trajectory which only holds its parameters. Neither the individuals nor the
+        results of previous generations are copied, which keeps the copy cheap to send to worker processes.
+        """
+        t = Trajectory()
+        if '_name' in self.__dict__:
+            t._name = self._name
+        t._timestamp = self._timestamp
+        for key, val in self._parameters._data.items():
+            # The parameter dictionary keeps a reference to its trajectory, which must point to the copy
+            if key != 'trajectory':
+                t._parameters._data[key] = val
+        # The copy gets an empty result table with the same settings
+        if self.result_table is None:
+            t.result_table = None
+        elif self.result_table.store_params:
+            t.result_table = ResultTable(store_params=True)
+        t.v_idx = self.v_idx
+        return t
+
+    @property
+    def current_results(self):
+        """
+        The list of tuples (run_index, fitness) of the generation being post processed
+        """
+        return self._current_results
+
+    @current_results.setter
+    def current_results(self, results):
+        # Setting the same list again, e.g. after appending to it, only indexes the new entries
+        if results is not self.__dict__.get('_current_results'):
+            self._result_positions = (0, {})
+        self._current_results = results
+        self._index_results()
+
+    def _index_results(self):
+        """
+        Updates the dictionary from the run index of each current result to its position in the current results. The
+        results appended since the last update are added to it, and it is rebuilt if results were removed.
+        """
+        n_indexed, positions = self.__dict__.get('_result_positions', (0, {}))
+        if n_indexed > len(self._current_results):
+            n_indexed, positions = 0, {}
+        for position in range(n_indexed, len(self._current_results)):
+            # The first position is kept for repeated run indices
+            positions.setdefault(self._current_results[position][0], position)
+        self._result_positions = (len(self._current_results), positions)
+
+    def result_position(self, run_index):
+        """
+        Returns the position of a run index in the current results, which is the ind_idx given by `traj.par.ind_idx`
+        for `traj.v_idx = run_index`.
+        :param run_index: The run index of the result
+        :return: The position of the result in `current_results`
+        """
+        # The current results may be appended to after they were set, e.g. by the asynchronous runs
+        if self._result_positions[0] != len(self._current_results):
+            self._index_results()
+        position = self._result_positions[1].get(run_index)
+        if position is None or self._current_results[position][0] != run_index:
+            # The results were replaced in place since they were indexed
+            self._result_positions = (0, {})
+            self._index_results()
+            position = self._result_positions[1].get(run_index)
+        if position is None:
+            raise ValueError("{} is not in the current results".format(run_index))
+        return position
+
+    def run_index_to_ind_idx(self):
+        """
+        Returns the mapping from the run indices of the current results to their ind_idx as an array, so that the
+        ind_idx of all the results can be obtained at once instead of setting `v_idx` for each of them.
+        :return: An integer array `a` with `a[run_index]` the ind_idx given by `traj.par.ind_idx` for
+            `traj.v_idx = run_index`, and -1 for the run indices which are not in the current results
+        """
+        if self._result_positions[0] != len(self._current_results):
+            self._index_results()
+        positions = self._result_positions[1]
+        mapping = np.full(max(positions) + 1 if positions else 0, -1, dtype=int)
+        mapping[list(positions.keys())] = list(positions.values())
+        return mapping
+
     def f_add_parameter_group(self, name, comment=""):
         """
         Adds a new parameter group
@@ -125,6 +213,13 @@ class Trajectory:
 
         # TODO: Could/Should the build dictionary have more than one generation in it?
         generation = gen[0]
+        # Float parameters are stored in a single array per generation, other
+        # parameter types fall back to a list of individuals
+        population = Population.from_params(generation, ind_idx, params)
+        if population is not None:
+            self.individuals[generation] = population
+            logging.info("Expanded trajectory for generation: " + str(generation))
+            return
         self.individuals[generation] = []
 
         for i in ind_idx:
@@ -134,6 +229,17 @@ class Trajectory:
             self.individuals[generation].append(ind)
         logging.info("Expanded trajectory for generation: " + str(generation))
 
+    def f_add_population(self, population):
+        """
+        Adds a new generation whose individuals are already stored in a
+        :class:`~l2l.utils.individual.Population`, skipping the per parameter
+        lists of :meth:`f_expand`
+        :param population: The population of the new generation
+        """
+        self.individuals[population.generation] = population
+        logging.info("Expanded trajectory for generation: %s",
+                     population.generation)
+
     def __str__(self):
         return str(self._parameters)
 
@@ -159,8 +265,18 @@ class Trajectory:
         return self.__getattr__(key)
 
     def __getstate__(self):
-        # print(self.__dict__)
-        return self.__dict__
+        # The index of the current results is rebuilt when unpickling
+        d = self.__dict__.copy()
+        d.pop('_result_positions', None)
+        return d
 
     def __setstate__(self, d):
+        # Trajectories pickled before current_results became a property store it under its public name
+        if 'current_results' in d:
+            d = dict(d)
+            d['_current_results'] = d.pop('current_results')
         self.__dict__.update(d)
+        if 'result_table' not in d:
+            self.result_table = ResultTable()
+        self._result_positions = (0, {})
+        self._index_results()
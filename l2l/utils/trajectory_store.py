@@ -0,0 +1,220 @@
+"""
+Columnar on-disk format for the results of a trajectory, meant for the
+analysis of finished runs. A store is a directory holding one .npy file per
+column of the :class:`~l2l.utils.result_table.ResultTable` of the trajectory
+(generation, ind_idx, fitness, weighted_fitness, wall_time and params, which
+has no columns unless the table stores the parameters), with the rows sorted
+by generation, and a JSON header describing them together with the
+parameters of the trajectory. The columns are opened as memory-mapped
+arrays, so that only the parts which are accessed are read.
+Only numpy and the standard library are needed to read a store.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("utils.trajectory_store")
+
+HEADER_FILE = 'header.json'
+COLUMNS = ('generation', 'ind_idx', 'fitness', 'weighted_fitness',
+           'wall_time', 'params')
+FORMAT_VERSION = 1
+
+
+def _to_json(value):
+    """
+    Converts a parameter of the trajectory into a JSON serializable value.
+    Values without a JSON representation are stored as their repr.
+    """
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    # Parameter groups and dictionaries with attribute access
+    for attribute in ('params', '_data'):
+        data = getattr(value, '__dict__', {}).get(attribute)
+        if data is None and attribute in getattr(value, '__slots__', ()):
+            data = getattr(value, attribute)
+        if isinstance(data, dict):
+            return _to_json(data)
+    return repr(value)
+
+
+def write_trajectory_store(trajectory, path):
+    """
+    Writes the results of a trajectory to a columnar store. An existing store
+    in the same directory is overwritten.
+    :param trajectory: the :class:`~l2l.utils.trajectory.Trajectory`, whose
+                       result table holds the results to store
+    :param path: directory of the store
+    """
+    os.makedirs(path, exist_ok=True)
+    table = trajectory.result_table
+    rows = table.rows
+    # The rows of each generation are contiguous in the files
+    order = np.argsort(rows['generation'], kind='mergesort')
+    generations, starts, counts = np.unique(
+        rows['generation'][order], return_index=True, return_counts=True)
+    for column in COLUMNS:
+        np.save(os.path.join(path, column + '.npy'), rows[column][order])
+
+    parameters = {key: _to_json(value)
+                  for key, value in trajectory.par._data.items()
+                  if key != 'trajectory'}
+    header = {
+        'format': FORMAT_VERSION,
+        'name': trajectory.__dict__.get('_name'),
+        'n_rows': int(len(rows)),
+        'n_objectives': int(rows.dtype['fitness'].shape[0]),
+        'param_layout': [[name, list(shape)]
+                         for name, shape in table.param_layout or []],
+        'generations': [[int(g), int(start), int(start + count)]
+                        for g, start, count in zip(generations, starts,
+                                                   counts)],
+        'parameters': parameters,
+    }
+    with open(os.path.join(path, HEADER_FILE), 'w') as handle:
+        json.dump(header, handle, indent=1)
+    logger.info("Wrote %d results of %d generations to %s", len(rows),
+                len(generations), path)
+
+
+class TrajectoryStore(object):
+    """
+    Reader of a store written by :func:`write_trajectory_store`. Opening it
+    only reads the header, and every query opens the columns it needs as
+    memory-mapped arrays and reads only the rows it returns.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: directory of the store
+        """
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE)) as handle:
+            self.header = json.load(handle)
+        if self.header['format'] != FORMAT_VERSION:
+            raise Exception("Unsupported trajectory store format %s" %
+                            self.header['format'])
+        #: Dictionary of the (start, stop) rows of each generation
+        self.generation_rows = {g: (start, stop) for g, start, stop in
+                                self.header['generations']}
+        #: List of tuples (name, shape) of the parameters, as in the
+        #: Individual-Dicts
+        self.param_layout = [(name, tuple(shape)) for name, shape in
+                             self.header['param_layout']]
+        self._slices = {}
+        start = 0
+        for name, shape in self.param_layout:
+            stop = start + int(np.prod(shape, dtype=int))
+            self._slices[name] = (slice(start, stop), shape)
+            start = stop
+
+    @property
+    def parameters(self):
+        """
+        The parameters of the trajectory, as stored in the header
+        """
+        return self.header['parameters']
+
+    @property
+    def generations(self):
+        """
+        The sorted ids of the stored generations
+        """
+        return sorted(self.generation_rows)
+
+    def __len__(self):
+        return self.header['n_rows']
+
+    def column(self, name):
+        """
+        Opens a column of the store.
+        :param name: one of generation, ind_idx, fitness, weighted_fitness,
+                     wall_time and params
+        :return: read-only memory-mapped array
+        """
+        if name not in COLUMNS:
+            raise KeyError(name)
+        return np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+
+    def fitness_history(self):
+        """
+        Reads the fitnesses of all the runs, without the parameters.
+        :return: tuple (generation, fitness, weighted_fitness) of arrays with
+                 one row per run, sorted by generation
+        """
+        return (np.array(self.column('generation')),
+                np.array(self.column('fitness')),
+                np.array(self.column('weighted_fitness')))
+
+    def _row_range(self, start_generation, stop_generation):
+        ranges = [self.generation_rows[g] for g in self.generations
+                  if start_generation <= g < stop_generation]
+        if not ranges:
+            return 0, 0
+        return ranges[0][0], ranges[-1][1]
+
+    def generation_range(self, start_generation, stop_generation=None,
+                         columns=COLUMNS):
+        """
+        Reads the runs of a range of generations.
+        :param start_generation: first generation to read
+        :param stop_generation: generation after the last one to read, only
+                                `start_generation` if None
+        :param columns: names of the columns to read
+        :return: dictionary of arrays indexed by column name
+        """
+        if stop_generation is None:
+            stop_generation = start_generation + 1
+        start, stop = self._row_range(start_generation, stop_generation)
+        return {name: np.array(self.column(name)[start:stop])
+                for name in columns}
+
+    def parameter(self, name, start_generation=None, stop_generation=None):
+        """
+        Reads the values of one parameter.
+        :param name: name of the parameter, as in the Individual-Dicts
+        :param start_generation: If given, first generation to read
+        :param stop_generation: If given, generation after the last one to
+                                read
+        :return: array of shape (n_runs,) + shape of the parameter
+        """
+        columns, shape = self._slices[name]
+        start, stop = 0, len(self)
+        if start_generation is not None or stop_generation is not None:
+            start, stop = self._row_range(
+                start_generation if start_generation is not None
+                else -np.inf,
+                stop_generation if stop_generation is not None else np.inf)
+        values = np.array(self.column('params')[start:stop, columns])
+        return values.reshape((stop - start,) + shape)
+
+    def individuals(self, generation):
+        """
+        Rebuilds the Individual-Dicts of the runs of a generation.
+        :param generation: id of the generation
+        :return: list of tuples (ind_idx, Individual-Dict)
+        """
+        if not self.param_layout:
+            raise Exception("The parameters of the individuals are not in "
+                            "the store")
+        runs = self.generation_range(generation,
+                                     columns=('ind_idx', 'params'))
+        individuals = []
+        for ind_idx, params in zip(runs['ind_idx'], runs['params']):
+            individual = {}
+            for name, (columns, shape) in self._slices.items():
+                value = params[columns]
+                individual[name] = value.reshape(shape) if shape \
+                    else value[0]
+            individuals.append((int(ind_idx), individual))
+        return individuals
@@ -0,0 +1,303 @@
+"""
+Long-lived worker daemons which evaluate individuals sent by the master over a
+socket. A worker is started once, receives the optimizee and the static
+parameters of the trajectory once, and then evaluates individuals for all the
+following generations, which avoids starting a new python process (and
+loading the optimizee again) for every individual.
+
+Workers can either be started on the local node by the
+:class:`WorkerDaemonRunner` or externally, e.g. on compute nodes, with::
+
+    L2L_WORKER_AUTHKEY=<key> python -m l2l.utils.worker_daemon <host> <port>
+
+The function to run is pickled by reference and unpickled in the workers,
+which are separate python processes. The optimizee it belongs to must
+therefore be defined in a module the workers can import, not in the script
+run as ``__main__``.
+"""
+import binascii
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener, wait
+
+logger = logging.getLogger("utils.WorkerDaemon")
+
+#: Environment variable used to pass the authentication key to the workers
+AUTHKEY_VARIABLE = 'L2L_WORKER_AUTHKEY'
+# Interval in seconds at which the local workers are checked while waiting
+# for them to connect
+_POLL_INTERVAL = 1.0
+
+
+class WorkerDaemonRunner(object):
+    """
+    WorkerDaemonRunner is the master side of the worker daemons. It listens
+    on a socket for the workers, hands each connected worker the function to
+    run and a static copy of the trajectory, and then distributes the
+    individuals of every generation among the workers. The runner is meant to
+    be kept alive for all the generations of a run.
+    """
+
+    def __init__(self, trajectory, runfunc, n_workers, address=('localhost', 0),
+                 authkey=None, start_workers=True, timeout=None):
+        """
+        Starts listening for the workers and waits until all of them are
+        connected and have loaded the function to run. An exception is
+        raised, with the exit code and the error output of the worker, if a
+        local worker exits in the meantime.
+
+        :param trajectory: A trajectory object holding the parameters which
+                           are passed to the optimizee
+        :param runfunc: The function to be called from the optimizee. It is
+                        sent to each worker once, so the optimizee it belongs
+                        to must be picklable and importable outside of
+                        ``__main__``.
+        :param n_workers: Number of workers to wait for
+        :param address: (host, port) the master listens on. Port 0 picks a
+                        free port
+        :param authkey: Key used to authenticate the workers. A random key is
+                        generated if None
+        :param start_workers: If True, the workers are started as local
+                              processes. Otherwise they have to be started
+                              externally with the command which is logged
+        :param timeout: Number of seconds to wait for all the workers to be
+                        ready, or None to wait indefinitely
+        """
+        self.n_workers = n_workers
+        self.authkey = authkey if authkey is not None else os.urandom(16)
+        self.listener = Listener(tuple(address), authkey=self.authkey)
+        host, port = self.listener.address
+        hexkey = binascii.hexlify(self.authkey).decode('ascii')
+
+        self.processes = []
+        # The error output of the local workers goes to temporary files
+        # rather than pipes, which could fill up and block the workers
+        self.error_files = []
+        self.connections = []
+        if start_workers:
+            env = dict(os.environ)
+            env[AUTHKEY_VARIABLE] = hexkey
+            for _ in range(n_workers):
+                error_file = tempfile.TemporaryFile()
+                self.error_files.append(error_file)
+                self.processes.append(subprocess.Popen(
+                    [sys.executable, '-m', 'l2l.utils.worker_daemon',
+                     str(host), str(port)], env=env, stderr=error_file))
+        else:
+            logger.info("Waiting for %d workers. Start them with: "
+                        "%s=%s python -m l2l.utils.worker_daemon %s %s",
+                        n_workers, AUTHKEY_VARIABLE, hexkey, host, port)
+
+        # Listener.accept has no timeout, so the workers are accepted in a
+        # helper thread while this one checks the local workers
+        self.accepted = queue.Queue()
+        self.accept_thread = threading.Thread(target=self._accept_workers,
+                                              args=(n_workers,))
+        self.accept_thread.daemon = True
+        self.accept_thread.start()
+
+        deadline = None if timeout is None else time.time() + timeout
+        static_trajectory = trajectory.static_copy()
+        try:
+            for _ in range(n_workers):
+                conn = self._accept(deadline)
+                conn.send((runfunc, static_trajectory))
+                self.connections.append(conn)
+            for conn in self.connections:
+                self._wait_ready(conn, deadline)
+        except Exception:
+            self.close(terminate=True)
+            raise
+        logger.info("Connected %d worker daemons on %s:%s",
+                    n_workers, host, port)
+
+    def _accept(self, deadline):
+        """
+        Accepts the connection of the next worker, while checking that the
+        local workers are alive and that the deadline is not passed.
+        :param deadline: time after which the workers are given up, or None
+        :return: the connection to the worker
+        """
+        while True:
+            try:
+                accepted = self.accepted.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                self._check_workers(deadline)
+                continue
+            if isinstance(accepted, Exception):
+                raise accepted
+            return accepted
+
+    def _accept_workers(self, n_workers):
+        """
+        Accepts the connections of the workers, in the helper thread, and
+        queues them, or the exception which stopped the accepting.
+        :param n_workers: Number of workers to accept
+        """
+        for _ in range(n_workers):
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                self.accepted.put(e)
+                return
+            self.accepted.put(conn)
+
+    def _wait_ready(self, conn, deadline):
+        """
+        Waits until a connected worker has loaded the function to run.
+        :param conn: the connection to the worker
+        :param deadline: time after which the workers are given up, or None
+        """
+        while not conn.poll(_POLL_INTERVAL):
+            self._check_workers(deadline)
+        try:
+            status, value = conn.recv()
+        except EOFError:
+            self._check_workers(deadline, wait_exit=True)
+            raise Exception("Worker daemon connection closed unexpectedly")
+        if status == 'error':
+            raise Exception("Worker daemon could not load the function to "
+                            "run. The optimizee must be importable outside "
+                            "of __main__:\n" + value)
+
+    def _check_workers(self, deadline, wait_exit=False):
+        """
+        Raises an exception if one of the local workers has exited, or if the
+        deadline is passed.
+        :param deadline: time after which the workers are given up, or None
+        :param wait_exit: If True, the local workers are given the poll
+                          interval to exit, e.g. after their connection was
+                          closed
+        """
+        for process, error_file in zip(self.processes, self.error_files):
+            if wait_exit:
+                try:
+                    process.wait(_POLL_INTERVAL)
+                except subprocess.TimeoutExpired:
+                    pass
+            returncode = process.poll()
+            if returncode is not None:
+                error_file.seek(0)
+                errors = error_file.read().decode('utf-8', 'replace')
+                raise Exception("Worker daemon exited with code %d:\n%s" %
+                                (returncode, errors))
+        if deadline is not None and time.time() > deadline:
+            raise Exception("Timeout while waiting for the worker daemons")
+
+    def run(self, trajectory, generation):
+        """
+        Evaluates all the individuals of a generation on the workers. Each
+        worker is given a new individual as soon as it returns a result.
+        :param trajectory: trajectory object storing individual parameters
+                           for each generation
+        :param generation: id of the generation
+        :return results: a list of tuples (ind_idx, fitness) in the same order
+                         as the individuals of the generation
+        """
+        individuals = trajectory.individuals[generation]
+        to_send = list(reversed(individuals))
+        fitnesses = {}
+        busy = []
+        logger.info("Worker daemons running generation: " + str(generation))
+        for conn in self.connections:
+            if to_send:
+                conn.send(('individual', to_send.pop()))
+                busy.append(conn)
+
+        while busy:
+            for conn in wait(busy):
+                try:
+                    status, value = conn.recv()
+                except EOFError:
+                    self._check_workers(None, wait_exit=True)
+                    raise Exception("Worker daemon connection closed "
+                                    "unexpectedly")
+                if status == 'error':
+                    raise Exception("Error in worker daemon:\n" + value)
+                ind_idx, fitness = value
+                fitnesses[ind_idx] = fitness
+                if to_send:
+                    conn.send(('individual', to_send.pop()))
+                else:
+                    busy.remove(conn)
+
+        return [(ind.ind_idx, fitnesses[ind.ind_idx]) for ind in individuals]
+
+    def close(self, terminate=False):
+        """
+        Stops the workers and closes the connections.
+        :param terminate: If True, the local worker processes are killed
+                          instead of being asked to stop
+        """
+        for conn in self.connections:
+            if not terminate:
+                try:
+                    conn.send(('stop', None))
+                except (OSError, EOFError):
+                    pass
+            conn.close()
+        if self.accept_thread.is_alive():
+            # The helper thread is still waiting in Listener.accept, which is
+            # woken up by a connection that fails the authentication
+            try:
+                socket.create_connection(self.listener.address,
+                                         _POLL_INTERVAL).close()
+            except OSError:
+                pass
+            self.accept_thread.join(_POLL_INTERVAL)
+        while not self.accepted.empty():
+            accepted = self.accepted.get()
+            if not isinstance(accepted, Exception):
+                accepted.close()
+        self.listener.close()
+        for process in self.processes:
+            if terminate:
+                process.terminate()
+            process.wait()
+        for error_file in self.error_files:
+            error_file.close()
+
+
+def run_worker(address, authkey):
+    """
+    Main loop of a worker daemon. Connects to the master, receives the
+    function to run and the trajectory once, and evaluates the individuals it
+    receives until it is asked to stop.
+    :param address: (host, port) of the master
+    :param authkey: key used to authenticate with the master
+    """
+    conn = Client(tuple(address), authkey=authkey)
+    try:
+        runfunc, trajectory = conn.recv()
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+        conn.close()
+        return
+    conn.send(('ready', None))
+    while True:
+        try:
+            command, individual = conn.recv()
+        except EOFError:
+            break
+        if command == 'stop':
+            break
+        try:
+            trajectory.individual = individual
+            fitness = runfunc(trajectory)
+            conn.send(('result', (individual.ind_idx, fitness)))
+        except Exception:
+            conn.send(('error', traceback.format_exc()))
+    conn.close()
+
+
+if __name__ == '__main__':
+    run_worker((sys.argv[1], int(sys.argv[2])),
+               binascii.unhexlify(os.environ[AUTHKEY_VARIABLE]))